@@ -0,0 +1,127 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import get_metrics
+
+
+# ------------------ Analysis Cache ------------------
+class AnalysisCache:
+    """Bounded LRU of analysis results keyed by upload content.
+
+    Keys are (sha256 of the uploaded bytes, keyword-file version), so a
+    rerun or a re-upload of the same CV by any user is served without
+    re-extracting or re-analyzing. Entries can expire after `ttl` seconds
+    and evicted entries can spill to `spill_dir` instead of being lost.
+    """
+
+    def __init__(self, max_entries=256, ttl=None, spill_dir=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.spill_dir = spill_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(data, keyword_version=None, digest=None):
+        # digest: sha256 hex of `data`, when the caller already has it
+        return (digest or hashlib.sha256(data).hexdigest(), keyword_version or "none")
+
+    def _expired(self, stored_at):
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, f"{key[0]}_{key[1]}.pkl")
+
+    def _load_spilled(self, key):
+        if not self.spill_dir:
+            return None
+        path = self._spill_path(key)
+        try:
+            with open(path, "rb") as f:
+                stored_at, value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        os.remove(path)
+        if self._expired(stored_at):
+            return None
+        return stored_at, value
+
+    def _spill(self, key, entry):
+        if not self.spill_dir or self._expired(entry[0]):
+            return
+        with open(self._spill_path(key), "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0]):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                entry = self._load_spilled(key)
+                if entry is None:
+                    self.misses += 1
+                    get_metrics().inc("analysis_cache_misses")
+                    return None
+                self.disk_hits += 1
+                get_metrics().inc("analysis_cache_disk_hits")
+                self._store(key, entry)
+            else:
+                self._entries.move_to_end(key)
+            self.hits += 1
+            get_metrics().inc("analysis_cache_hits")
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._store(key, (time.time(), value))
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            old_key, old_entry = self._entries.popitem(last=False)
+            self._spill(old_key, old_entry)
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache(max_entries=256, ttl=None, spill_dir=None):
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnalysisCache(max_entries=max_entries, ttl=ttl, spill_dir=spill_dir)
+        return _cache
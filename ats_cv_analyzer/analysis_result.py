@@ -0,0 +1,164 @@
+import hashlib
+import struct
+import sys
+import weakref
+from array import array
+
+from section_segmenter import SECTION_HEADERS
+
+SECTION_NAMES = tuple(SECTION_HEADERS)
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<B8sBBH")
+
+
+# ------------------ Keyword Vocabulary ------------------
+class Vocabulary:
+    """One interned, ordered keyword list shared by every result of a role."""
+
+    __slots__ = ("keywords", "digest", "__weakref__")
+
+    def __init__(self, keywords):
+        self.keywords = tuple(sys.intern(kw) for kw in keywords)
+        self.digest = hashlib.sha1("\x1f".join(self.keywords).encode("utf-8")).digest()[:8]
+
+    def __len__(self):
+        return len(self.keywords)
+
+
+_vocabularies = weakref.WeakValueDictionary()
+_by_digest = weakref.WeakValueDictionary()
+
+
+def intern_vocabulary(keywords):
+    key = tuple(keywords or ())
+    vocab = _vocabularies.get(key)
+    if vocab is None:
+        vocab = _vocabularies[key] = Vocabulary(key)
+        _by_digest[vocab.digest] = vocab
+    return vocab
+
+
+# ------------------ Analysis Result ------------------
+class AnalysisResult:
+    """Compact result of analyze_cv.
+
+    Matched keywords and detected sections are bitsets over the role's
+    interned vocabulary and SECTION_NAMES; only the top words are kept.
+    The dict-style keys analyze_cv always returned are still available,
+    e.g. result["missing_keywords"], and are decoded on access.
+    """
+
+    __slots__ = ("vocab", "matched_bits", "section_bits", "ats_score", "top_words", "top_counts")
+
+    KEYS = ("sections", "strengths", "weaknesses", "common_words", "matched_keywords", "missing_keywords",
+            "ats_score")
+
+    def __init__(self, vocab, matched_bits, section_bits, ats_score, common_words=()):
+        self.vocab = vocab
+        self.matched_bits = matched_bits
+        self.section_bits = section_bits
+        self.ats_score = ats_score
+        self.top_words = tuple(sys.intern(w) for w, _ in common_words)
+        self.top_counts = array("I", (n for _, n in common_words))
+
+    # ------------------ Decoded views ------------------
+    @property
+    def sections(self):
+        return {sec: bool(self.section_bits >> i & 1) for i, sec in enumerate(SECTION_NAMES)}
+
+    @property
+    def strengths(self):
+        return [f"{sec.capitalize()} section is present." for sec, ok in self.sections.items() if ok]
+
+    @property
+    def weaknesses(self):
+        return [f"{sec.capitalize()} section missing." for sec, ok in self.sections.items() if not ok]
+
+    @property
+    def common_words(self):
+        return list(zip(self.top_words, self.top_counts))
+
+    @property
+    def matched_keywords(self):
+        return [kw for i, kw in enumerate(self.vocab.keywords) if self.matched_bits >> i & 1]
+
+    @property
+    def missing_keywords(self):
+        return [kw for i, kw in enumerate(self.vocab.keywords) if not self.matched_bits >> i & 1]
+
+    @property
+    def matched_count(self):
+        return self.matched_bits.bit_count()
+
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.KEYS
+
+    def get(self, key, default=None):
+        return self[key] if key in self.KEYS else default
+
+    def keys(self):
+        return self.KEYS
+
+    def to_dict(self):
+        return {key: self[key] for key in self.KEYS}
+
+    def __eq__(self, other):
+        if not isinstance(other, AnalysisResult):
+            return NotImplemented
+        return (self.vocab.keywords == other.vocab.keywords and self.matched_bits == other.matched_bits
+                and self.section_bits == other.section_bits and self.ats_score == other.ats_score
+                and self.top_words == other.top_words and self.top_counts == other.top_counts)
+
+    # ------------------ Serialization ------------------
+    def to_bytes(self):
+        # version, vocabulary digest, score, section bits, matched-bitset length,
+        # matched bitset, then the top words as (length, utf-8, count).
+        matched = self.matched_bits.to_bytes((len(self.vocab) + 7) // 8, "little")
+        parts = [_HEADER.pack(FORMAT_VERSION, self.vocab.digest, self.ats_score, self.section_bits, len(matched)),
+                 matched, bytes([len(self.top_words)])]
+        for word, count in zip(self.top_words, self.top_counts):
+            raw = word.encode("utf-8")
+            parts.append(struct.pack("<H", len(raw)) + raw + struct.pack("<I", count))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data, vocab=None):
+        """Decode to_bytes() output. The vocabulary is found by digest among
+        interned ones unless given."""
+        version, digest, score, section_bits, n_matched = _HEADER.unpack_from(data)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported analysis result format {version}")
+        vocab = vocab or _by_digest.get(digest)
+        if vocab is None or vocab.digest != digest:
+            raise KeyError("Keyword vocabulary of this result is not loaded")
+        pos = _HEADER.size
+        matched_bits = int.from_bytes(data[pos:pos + n_matched], "little")
+        pos += n_matched
+        words = []
+        n_words = data[pos]
+        pos += 1
+        for _ in range(n_words):
+            size, = struct.unpack_from("<H", data, pos)
+            word = data[pos + 2:pos + 2 + size].decode("utf-8")
+            pos += 2 + size
+            words.append((word, struct.unpack_from("<I", data, pos)[0]))
+            pos += 4
+        return cls(vocab, matched_bits, section_bits, score, words)
+
+    def __reduce__(self):
+        # Pickles (cache spill, process pools) carry the keywords so they
+        # re-intern the vocabulary on load.
+        return _restore, (self.vocab.keywords, self.to_bytes())
+
+    def __repr__(self):
+        return (f"AnalysisResult(ats_score={self.ats_score}, matched={self.matched_count}/{len(self.vocab)}, "
+                f"sections={self.section_bits:0{len(SECTION_NAMES)}b})")
+
+
+def _restore(keywords, data):
+    return AnalysisResult.from_bytes(data, intern_vocabulary(keywords))
@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from metrics import get_metrics
+
+SCORE_BUCKET_LABELS = [f"{b * 10}-{b * 10 + 9}" for b in range(9)] + ["90-100"]
+
+
+def score_bucket(score):
+    return min(max(int(score), 0) // 10, 9)
+
+
+def _split_keywords(value):
+    return [k.strip() for k in (value or "").split(",") if k.strip()]
+
+
+def summarize_rows(rows, since=None, top_n=20):
+    # Same rollup analytics_summary() computes server-side (sql/analytics_rollups.sql),
+    # used by the local stub and when the SQL functions are not installed.
+    since = since.isoformat() if since else None
+    total, matched_total, missing_total = 0, 0, 0
+    histogram, roles, missing = Counter(), Counter(), Counter()
+    for row in rows:
+        if since and str(row.get("timestamp", ""))[:10] < since:
+            continue
+        total += 1
+        histogram[score_bucket(row.get("ats_score") or 0)] += 1
+        roles[row.get("role") or ""] += 1
+        matched_total += len(_split_keywords(row.get("matched_keywords")))
+        row_missing = _split_keywords(row.get("missing_keywords"))
+        missing_total += len(row_missing)
+        missing.update(row_missing)
+    return {
+        "total": total,
+        "score_histogram": {str(b): n for b, n in histogram.items()},
+        "role_counts": dict(roles),
+        "matched_total": matched_total,
+        "missing_total": missing_total,
+        "top_missing": [[kw, n] for kw, n in sorted(missing.items(), key=lambda kv: (-kv[1], kv[0]))[:top_n]],
+    }
+
+
+# ------------------ Admin Rollups ------------------
+class AnalyticsRollups:
+    """Admin dashboard numbers served from server-side rollups.
+
+    analytics_summary() reads the trigger-maintained rollup tables, so
+    its cost depends on the size of the window, not of the analytics
+    table. Results are cached for `ttl` seconds. Raw rows are only read
+    page by page, on request.
+
+    Whether analytics has the `role` column (added by the migration) is
+    asked of `schema`, the analytics writer, which probes for it in its
+    own thread; until it is known to exist, rows are read without it.
+    """
+
+    def __init__(self, client, ttl=30.0, top_n=20, schema=None):
+        self.client = client
+        self.ttl = ttl
+        self.top_n = top_n
+        self.schema = schema
+        self.server_side = True
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def analytics_columns(self):
+        columns = "cv_name,ats_score,matched_keywords,missing_keywords,timestamp"
+        has_role = self.schema is None or self.schema.has_column("analytics", "role")
+        return columns + ",role" if has_role else columns
+
+    def summary(self, days=None):
+        since = date.today() - timedelta(days=days) if days else None
+        key = ("summary", since)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and time.monotonic() - cached[0] < self.ttl:
+                return cached[1]
+        params = {"since": since.isoformat() if since else None, "top_n": self.top_n}
+        try:
+            with get_metrics().timer("supabase_summary"):
+                result = self.client.rpc("analytics_summary", params).execute().data
+            self.server_side = True
+        except Exception:
+            # SQL functions not installed yet: fall back to scanning rows.
+            self.server_side = False
+            result = summarize_rows(self.iter_rows(columns=self.analytics_columns()), since, self.top_n)
+        histogram = result.get("score_histogram") or {}
+        result["score_histogram"] = {label: int(histogram.get(str(b), 0)) for b, label in enumerate(SCORE_BUCKET_LABELS)}
+        with self._lock:
+            self._cache[key] = (time.monotonic(), result)
+        return result
+
+    def page(self, table, page=0, page_size=100, columns="*", order="timestamp"):
+        start = page * page_size
+        query = self.client.table(table).select(columns)
+        if order:
+            query = query.order(order, desc=True)
+        with get_metrics().timer("supabase_page", table=table):
+            return query.range(start, start + page_size - 1).execute().data
+
+    def iter_rows(self, table="analytics", page_size=1000, columns="*"):
+        page = 0
+        while True:
+            rows = self.page(table, page, page_size, columns, order=None)
+            yield from rows
+            if len(rows) < page_size:
+                return
+            page += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._cache.clear()
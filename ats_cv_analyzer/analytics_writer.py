@@ -0,0 +1,295 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from metrics import get_metrics
+
+# PostgreSQL error classes a retry cannot fix: data exceptions, integrity
+# constraints, undefined tables/columns.
+PERMANENT_SQLSTATE_CLASSES = ("22", "23", "42")
+# PostgREST error codes for a column the table does not have (select / insert).
+MISSING_COLUMN_CODES = ("42703", "PGRST204")
+# Seconds before a column that could not be probed (service down) is probed again.
+SCHEMA_RETRY = 10.0
+
+
+def is_permanent(error):
+    """Whether a failed insert would fail the same way on every retry."""
+    code = str(getattr(error, "code", None) or "")
+    if code.startswith("PGRST"):
+        # PGRST1xx/2xx: the request itself is wrong; PGRST0xx: database unreachable.
+        return code[5:6] in ("1", "2")
+    if len(code) == 5 and code[:2] in PERMANENT_SQLSTATE_CLASSES:
+        return True
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(status, int) and 400 <= status < 500 and status not in (408, 429)
+
+
+def is_missing_column(error):
+    return getattr(error, "code", None) in MISSING_COLUMN_CODES
+
+
+def probe_column(client, table, column):
+    """True/False whether table has column, None if that could not be found out."""
+    try:
+        with get_metrics().timer("supabase_schema_probe", table=table):
+            client.table(table).select(column).range(0, 0).execute()
+        return True
+    except Exception as e:
+        return False if is_missing_column(e) else None
+
+
+# ------------------ Durable Spool ------------------
+class SqliteSpool:
+    """Rows that could not be delivered, kept on disk until the next retry.
+
+    Rows the server refused for good go to the dead_letter table with the
+    error instead, so they are kept for inspection but never retried.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS spool ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, table_name TEXT NOT NULL, payload TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS dead_letter ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, table_name TEXT NOT NULL, payload TEXT NOT NULL, error TEXT,"
+            " created REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS spool_table ON spool (table_name, id)")
+        self._conn.commit()
+
+    def add(self, table, rows):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO spool (table_name, payload, created) VALUES (?, ?, ?)",
+                [(table, json.dumps(row), now) for row in rows],
+            )
+            self._conn.commit()
+
+    def tables(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT table_name FROM spool")]
+
+    def peek(self, table, limit):
+        # Oldest rows of one table, so each table drains on its own.
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT id, payload FROM spool WHERE table_name = ? ORDER BY id LIMIT ?", (table, limit)
+            )
+            ids, rows = [], []
+            for row_id, payload in cur:
+                ids.append(row_id)
+                rows.append(json.loads(payload))
+            return ids, rows
+
+    def bury(self, table, rows, error):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO dead_letter (table_name, payload, error, created) VALUES (?, ?, ?, ?)",
+                [(table, json.dumps(row), error, now) for row in rows],
+            )
+            self._conn.commit()
+
+    def remove(self, ids):
+        with self._lock:
+            self._conn.executemany("DELETE FROM spool WHERE id = ?", [(i,) for i in ids])
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+    def dead_letters(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM dead_letter").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ------------------ Write-Behind Queue ------------------
+class WriteBehindQueue:
+    """Buffers rows in memory and bulk-inserts them from a background thread.
+
+    A batch is sent when `batch_size` rows are pending or every
+    `flush_interval` seconds. A failed batch goes to the SQLite spool and
+    is retried with exponential backoff, oldest rows first, so an outage
+    never reaches the request path. Backoff is kept per table, so a table
+    that keeps failing does not hold up the others. Rows refused for a
+    reason a retry cannot fix (see is_permanent) are dead-lettered.
+
+    `optional_columns` maps a table to columns a migration may not have
+    added yet. The flush thread probes for them every `schema_ttl`
+    seconds and leaves them out of the rows it sends until they are
+    known to exist, so callers never wait on a schema round trip.
+    """
+
+    def __init__(self, client, spool_path="analytics_spool.db", batch_size=50, flush_interval=2.0,
+                 backoff=0.5, max_backoff=60.0, optional_columns=None, schema_ttl=300.0):
+        self.client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.initial_backoff = backoff
+        self.max_backoff = max_backoff
+        self.optional_columns = optional_columns or {}
+        self.schema_ttl = schema_ttl
+        # (table, column) -> (probed at, exists or None)
+        self._columns = {}
+        self._pending = deque()
+        self._spool = SqliteSpool(spool_path)
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._backoff = {}
+        self._retry_at = {}
+        self.enqueued = 0
+        self.sent = 0
+        self.failed_batches = 0
+        self.dead_lettered = 0
+        self.last_error = None
+
+    def enqueue(self, table, row):
+        self._pending.append((table, row))
+        self.enqueued += 1
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="analytics-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=10.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        else:
+            self.flush()
+
+    def has_column(self, table, column):
+        """Whether the flush thread found the column; never a round trip."""
+        known = self._columns.get((table, column))
+        return bool(known and known[1])
+
+    def _probe_columns(self):
+        now = time.monotonic()
+        for table, columns in self.optional_columns.items():
+            for column in columns:
+                known = self._columns.get((table, column))
+                if known is not None and now - known[0] < (self.schema_ttl if known[1] is not None else SCHEMA_RETRY):
+                    continue
+                self._columns[(table, column)] = (now, probe_column(self.client, table, column))
+
+    def _without_missing_columns(self, table, rows):
+        # Spooled rows keep every column; they are only left out on the way out.
+        missing = [c for c in self.optional_columns.get(table, ()) if not self.has_column(table, c)]
+        if not missing:
+            return rows
+        return [{k: v for k, v in row.items() if k not in missing} for row in rows]
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            self._probe_columns()
+            batches = {}
+            while self._pending:
+                table, row = self._pending.popleft()
+                batches.setdefault(table, []).append(row)
+            for table in self._spool.tables():
+                self._drain_spool(table)
+            for table, rows in batches.items():
+                for i in range(0, len(rows), self.batch_size):
+                    chunk = rows[i:i + self.batch_size]
+                    if not self._deliver(table, chunk):
+                        self._spool.add(table, chunk)
+
+    def _drain_spool(self, table):
+        while self._ready(table):
+            ids, rows = self._spool.peek(table, self.batch_size)
+            if not rows or not self._deliver(table, rows):
+                return
+            self._spool.remove(ids)
+
+    def _ready(self, table):
+        return time.monotonic() >= self._retry_at.get(table, 0.0)
+
+    def _deliver(self, table, rows):
+        """Insert rows, dead-lettering the ones refused for good. False if
+        they should be spooled and retried later."""
+        if not self._ready(table):
+            return False
+        error = self._send(table, rows)
+        if error is None:
+            return True
+        if not is_permanent(error):
+            return False
+        if len(rows) > 1:
+            # Find the rows at fault; the others still get in.
+            half = len(rows) // 2
+            first = self._deliver(table, rows[:half])
+            second = self._deliver(table, rows[half:])
+            if first and second:
+                return True
+            # A transient error partway through: spool what is left.
+            if first:
+                self._spool.add(table, rows[half:])
+            elif second:
+                self._spool.add(table, rows[:half])
+            else:
+                return False
+            return True
+        self._spool.bury(table, rows, self.last_error)
+        self.dead_lettered += 1
+        get_metrics().inc("supabase_dead_letters", table=table)
+        return True
+
+    def _send(self, table, rows):
+        try:
+            with get_metrics().timer("supabase_insert", table=table):
+                self.client.table(table).insert(self._without_missing_columns(table, rows)).execute()
+        except Exception as e:
+            get_metrics().inc("supabase_failed_batches", table=table)
+            self.failed_batches += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            if not is_permanent(e):
+                backoff = self._backoff.get(table, self.initial_backoff)
+                self._retry_at[table] = time.monotonic() + backoff
+                self._backoff[table] = min(backoff * 2, self.max_backoff)
+            return e
+        self.sent += len(rows)
+        get_metrics().inc("supabase_rows_sent", len(rows), table=table)
+        self._backoff.pop(table, None)
+        self._retry_at.pop(table, None)
+        return None
+
+    def metrics(self):
+        return {
+            "queue_depth": len(self._pending),
+            "spooled": len(self._spool),
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "failed_batches": self.failed_batches,
+            "dead_letters": self._spool.dead_letters(),
+            "retry_in_s": {table: max(0.0, round(at - time.monotonic(), 2)) for table, at in self._retry_at.items()},
+            "last_error": self.last_error,
+        }
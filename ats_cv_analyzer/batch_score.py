@@ -0,0 +1,304 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from cv_analysis import analyze_cv, build_result, professional_rewrite_cv
+from keyword_index import KeywordIndex
+from keyword_matcher import normalize_keyword
+from keyword_registry import get_registry
+from keyword_weights import IdfStats
+from lemma_matching import DEFAULT_MODEL, get_lemma_matcher, load_nlp, unused_components
+from role_scoring import RoleScorer
+from text_extraction import ExtractionLimits, iter_text
+
+CV_EXTENSIONS = (".pdf", ".docx", ".txt")
+CSV_FIELDS = ["path", "cv_name", "role", "ats_score", "matched_keywords", "missing_keywords", "top_roles", "error",
+              "extract_s", "analyze_s", "rewrite_s"]
+STAGES = ("extract", "analyze", "rewrite")
+
+# Workers of the batch pool are daemonic and cannot start their own page pool.
+BATCH_LIMITS = ExtractionLimits(workers=1)
+
+_worker_options = {}
+_role_scorers = {}
+
+
+# ------------------ Worker ------------------
+def _init_worker(keywords_dir, role_name, rewrite, top_roles=None, detail=False, weights=None):
+    _worker_options.update(keywords_dir=keywords_dir, role_name=role_name, rewrite=rewrite, top_roles=top_roles,
+                           detail=detail, weights=weights)
+    get_registry(keywords_dir)
+
+
+def _role_scorer(keywords_dir):
+    scorer = _role_scorers.get(keywords_dir)
+    if scorer is None:
+        scorer = _role_scorers[keywords_dir] = RoleScorer(get_registry(keywords_dir))
+    return scorer
+
+
+def score_file(path, keywords_dir="job_keywords", role_name=None, rewrite=False, top_roles=None,
+               source=None, detail=False, weights=None):
+    # `source` is an already-open upload (named file-like) to read instead of `path`;
+    # `detail` adds the CV text and the rest of the analysis for interactive callers;
+    # `weights` is the KeywordWeights snapshot the app scores with (see load_weights).
+    cv_name = os.path.splitext(os.path.basename(path))[0]
+    registry = get_registry(keywords_dir)
+    role = registry.get(role_name) if role_name else registry.detect(cv_name)
+    job_keywords = role.keywords if role else []
+    record = {"path": path, "cv_name": cv_name, "role": role.name if role else None, "error": None}
+    timings = {}
+    try:
+        start = time.perf_counter()
+        matcher = role.matcher if role and not top_roles else registry.union_matcher()
+        stream = matcher.stream()
+        for page_text in iter_text(path if source is None else source, BATCH_LIMITS):
+            stream.feed(page_text)
+        scan = stream.finish()
+        timings["extract"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        analysis = analyze_cv(scan.text, job_keywords=job_keywords, scan=scan, weights=weights)
+        timings["analyze"] = time.perf_counter() - start
+        record.update(
+            ats_score=analysis["ats_score"],
+            matched_keywords=analysis["matched_keywords"],
+            missing_keywords=analysis["missing_keywords"],
+            sections=analysis["sections"],
+        )
+        if detail:
+            record.update(text=scan.text, strengths=analysis["strengths"], weaknesses=analysis["weaknesses"],
+                          common_words=analysis["common_words"])
+        if top_roles:
+            record["top_roles"] = _role_scorer(keywords_dir).rank(scan=scan, top_k=top_roles, weights=weights)
+
+        if rewrite:
+            start = time.perf_counter()
+            record["rewritten_cv"] = professional_rewrite_cv(scan.text, job_keywords, scan=scan)
+            timings["rewrite"] = time.perf_counter() - start
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["timings"] = timings
+    return record
+
+
+def _score_in_worker(path):
+    return score_file(path, **_worker_options)
+
+
+def load_weights(path, keywords_dir="job_keywords"):
+    """Current IDF weights from the app's keyword_weights.db, so batch and
+    API scores match the ones the app shows. None (unweighted scoring) when
+    the app has not created the file yet."""
+    if not os.path.exists(path):
+        return None
+    stats = IdfStats(path, get_registry(keywords_dir), readonly=True)
+    try:
+        return stats.weights()
+    finally:
+        stats.close()
+
+
+# ------------------ Lemma Matching ------------------
+def _with_lemmas(records, keywords_dir, nlp, n_process=1, batch_size=16, weights=None):
+    # The CV texts coming back from the workers go through nlp.pipe in
+    # batches; keywords found only by lemma are added to each record.
+    registry = get_registry(keywords_dir)
+    texts = ((record.pop("text", None) or "", record) for record in records)
+    for doc, record in nlp.pipe(texts, as_tuples=True, batch_size=batch_size, n_process=n_process,
+                                disable=unused_components(nlp)):
+        for field in ("strengths", "weaknesses", "common_words"):
+            record.pop(field, None)
+        role = registry.get(record["role"]) if record["role"] else None
+        if role is not None and not record["error"]:
+            lemmas = get_lemma_matcher(nlp, role.keywords).match_doc(doc)
+            matched = set(record["matched_keywords"])
+            analysis = build_result(role.keywords, record["sections"],
+                                    lambda kw: kw in matched or normalize_keyword(kw) in lemmas, [], weights)
+            record.update(ats_score=analysis["ats_score"], matched_keywords=analysis["matched_keywords"],
+                          missing_keywords=analysis["missing_keywords"])
+        yield record
+
+
+# ------------------ Input / Output ------------------
+def iter_cv_files(folder):
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(CV_EXTENSIONS):
+                yield os.path.join(root, name)
+
+
+def _trim_partial_line(path):
+    # A crash can leave a half-written last line; drop it before appending.
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def load_done(output, fmt):
+    if not os.path.exists(output):
+        return set()
+    _trim_partial_line(output)
+    done = set()
+    with open(output, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                done.add(row["path"])
+        else:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["path"])
+                except (ValueError, KeyError):
+                    continue
+    return done
+
+
+class ResultWriter:
+    def __init__(self, output, fmt):
+        self.fmt = fmt
+        new_file = not os.path.exists(output) or os.path.getsize(output) == 0
+        self._file = open(output, "a", newline="", encoding="utf-8")
+        if fmt == "csv":
+            self._csv = csv.DictWriter(self._file, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            if new_file:
+                self._csv.writeheader()
+
+    def write(self, record):
+        if self.fmt == "csv":
+            row = dict(record)
+            row["matched_keywords"] = ",".join(record.get("matched_keywords", []))
+            row["missing_keywords"] = ",".join(record.get("missing_keywords", []))
+            row["top_roles"] = ",".join(f"{name}:{score}" for name, score in record.get("top_roles", []))
+            for stage in STAGES:
+                row[f"{stage}_s"] = record["timings"].get(stage)
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+# ------------------ Summary ------------------
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def summarize(records, elapsed):
+    summary = {
+        "files": len(records),
+        "errors": sum(1 for r in records if r["error"]),
+        "elapsed_s": round(elapsed, 3),
+        "files_per_s": round(len(records) / elapsed, 2) if elapsed else 0.0,
+        "stages": {},
+    }
+    for stage in STAGES:
+        values = [r["timings"][stage] for r in records if stage in r["timings"]]
+        if values:
+            summary["stages"][stage] = {
+                "total_s": round(sum(values), 3),
+                "mean_ms": round(sum(values) / len(values) * 1000, 3),
+                "p50_ms": round(_percentile(values, 50) * 1000, 3),
+                "p95_ms": round(_percentile(values, 95) * 1000, 3),
+            }
+    return summary
+
+
+# ------------------ Batch Runner ------------------
+def _collect(record, writer, index, records):
+    writer.write(record)
+    if index is not None and not record["error"]:
+        index.add({"ref": record["path"], "cv_name": record["cv_name"], "role": record["role"],
+                   "ats_score": record["ats_score"], "matched_keywords": record["matched_keywords"],
+                   "missing_keywords": record["missing_keywords"]})
+    records.append({"error": record["error"], "timings": record["timings"]})
+
+
+def run_batch(folder, output, role_name=None, fmt="jsonl", workers=None, rewrite=False,
+              keywords_dir="job_keywords", resume=True, chunksize=8, top_roles=None, index_path=None,
+              nlp_model=None, nlp_processes=1, nlp_batch=16, weights_path="keyword_weights.db"):
+    if role_name and get_registry(keywords_dir).get(role_name) is None:
+        raise ValueError(f"Unknown keywords file: {role_name}")
+    done = load_done(output, fmt) if resume else set()
+    if not resume and os.path.exists(output):
+        os.remove(output)
+    paths = [p for p in iter_cv_files(folder) if p not in done]
+    workers = workers or os.cpu_count() or 1
+
+    # Lemma mode: workers also return the CV text for the spaCy pass here.
+    nlp = load_nlp(nlp_model) if nlp_model else None
+    weights = load_weights(weights_path, keywords_dir)
+    options = (keywords_dir, role_name, rewrite, top_roles, nlp is not None, weights)
+    writer = ResultWriter(output, fmt)
+    index = KeywordIndex(index_path) if index_path else None
+    records = []
+    pool = None
+    start = time.perf_counter()
+    try:
+        if workers == 1:
+            _init_worker(*options)
+            results = map(_score_in_worker, paths)
+        else:
+            pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=options)
+            results = pool.imap_unordered(_score_in_worker, paths, chunksize=chunksize)
+        if nlp is not None:
+            results = _with_lemmas(results, keywords_dir, nlp, nlp_processes, nlp_batch, weights)
+        for record in results:
+            _collect(record, writer, index, records)
+    finally:
+        if pool is not None:
+            pool.terminate()
+        writer.close()
+        if index is not None:
+            index.close()
+    summary = summarize(records, time.perf_counter() - start)
+    summary["skipped"] = len(done)
+    summary["workers"] = workers
+    summary["keyword_weights"] = {"docs": weights.docs, "version": weights.version} if weights is not None else None
+    if nlp_model:
+        summary["lemma_model"] = nlp_model
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a folder of CVs against job keywords.")
+    parser.add_argument("folder", help="Folder of .pdf/.docx/.txt CVs (searched recursively)")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl")
+    parser.add_argument("-r", "--role", help="Keywords file, e.g. software_engineer.txt (default: detect from file name)")
+    parser.add_argument("-f", "--format", choices=["jsonl", "csv"], default=None)
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("--rewrite", action="store_true", help="Also produce the rewritten CV")
+    parser.add_argument("--top-roles", type=int, default=None, metavar="K",
+                        help="Also rank every keywords file and keep the K best-fit roles")
+    parser.add_argument("--index", metavar="PATH", help="Also add scored CVs to a keyword index (see keyword_index.py)")
+    parser.add_argument("--lemma", nargs="?", const=DEFAULT_MODEL, metavar="MODEL",
+                        help=f"Also match keywords by lemma with a spaCy model (default {DEFAULT_MODEL}; "
+                             "'blank' for a lookup-only pipeline)")
+    parser.add_argument("--nlp-processes", type=int, default=1, help="n_process for the spaCy pass")
+    parser.add_argument("--nlp-batch", type=int, default=16, help="CVs per nlp.pipe batch")
+    parser.add_argument("--keywords-dir", default="job_keywords")
+    parser.add_argument("--weights", default="keyword_weights.db", metavar="PATH",
+                        help="IDF keyword weights shared with the app (see keyword_weights.py)")
+    parser.add_argument("--no-resume", action="store_true", help="Start over instead of skipping scored files")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("csv" if args.output.endswith(".csv") else "jsonl")
+    summary = run_batch(args.folder, args.output, role_name=args.role, fmt=fmt, workers=args.workers,
+                        rewrite=args.rewrite, keywords_dir=args.keywords_dir, resume=not args.no_resume,
+                        top_roles=args.top_roles, index_path=args.index, nlp_model=args.lemma,
+                        nlp_processes=args.nlp_processes, nlp_batch=args.nlp_batch, weights_path=args.weights)
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What importing freecvapp used to pull in before the first upload, versus
+# what a worker needs to score a CV now.
+IMPORT_SETS = {
+    "eager_app_imports": [
+        "streamlit", "docx2txt", "PyPDF2", "fpdf", "plotly.graph_objects",
+        "matplotlib.pyplot", "spacy", "pandas", "supabase",
+    ],
+    "eager_app_imports+spacy_model": None,
+    "core_analysis": ["cv_analysis", "keyword_registry"],
+    "core_analysis+extraction": ["cv_analysis", "keyword_registry", "text_extraction"],
+    # The app script itself, run bare: nothing below should load before an upload.
+    "freecvapp": ["freecvapp"],
+}
+# Reported when loaded by a set; for freecvapp each one is a regression
+# (streamlit's st.image loads numpy itself).
+HEAVY_MODULES = ["scipy", "PyPDF2", "fpdf", "pandas", "spacy", "supabase", "matplotlib",
+                 "role_scoring", "keyword_index", "near_duplicates", "scoring_service", "batch_score"]
+
+PROBE = """
+import importlib, json, resource, sys, time
+start = time.perf_counter()
+missing = []
+for name in sys.argv[2:]:
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        missing.append(name)
+if sys.argv[1] == "1":
+    try:
+        import spacy
+        spacy.load("en_core_web_sm")
+    except (ImportError, OSError):
+        missing.append("en_core_web_sm")
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "missing": missing,
+    "heavy_loaded": [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def measure(modules, load_model=False, repeat=3):
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE, "1" if load_model else "0", *modules],
+            cwd=APP_DIR, capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(out.stdout))
+    best = min(runs, key=lambda r: r["seconds"])
+    return {
+        "best_seconds": round(best["seconds"], 4),
+        "max_rss_mb": round(max(r["max_rss_mb"] for r in runs), 1),
+        "missing": best["missing"],
+        "heavy_loaded": best["heavy_loaded"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time of the app vs. the core analysis modules.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    for name, modules in IMPORT_SETS.items():
+        if modules is None:
+            results[name] = measure(IMPORT_SETS["eager_app_imports"], load_model=True, repeat=args.repeat)
+        else:
+            results[name] = measure(modules, repeat=args.repeat)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
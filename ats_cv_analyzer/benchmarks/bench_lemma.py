@@ -0,0 +1,72 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_matcher import get_matcher  # noqa: E402
+from keyword_registry import get_registry  # noqa: E402
+from lemma_matching import DEFAULT_MODEL, get_lemma_matcher, load_nlp  # noqa: E402
+from synthetic_cvs import cv_pages, sample_corpus  # noqa: E402
+
+ROLE = "software_engineer.txt"
+
+
+def _throughput(elapsed, texts):
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "docs_per_s": round(len(texts) / elapsed, 2),
+        "mb_per_s": round(sum(len(t) for t in texts) / elapsed / 1024 / 1024, 3),
+    }
+
+
+def bench_exact(texts, keywords):
+    matcher = get_matcher(keywords)
+    start = time.perf_counter()
+    found = [set(matcher.scan(text).found) for text in texts]
+    return dict(mode="exact", **_throughput(time.perf_counter() - start, texts)), found
+
+
+def bench_lemma(texts, keywords, nlp, batch_size, n_process):
+    matcher = get_lemma_matcher(nlp, keywords)
+    start = time.perf_counter()
+    found = list(matcher.match_many(texts, batch_size=batch_size, n_process=n_process))
+    return dict(mode="lemma", batch_size=batch_size, n_process=n_process,
+                **_throughput(time.perf_counter() - start, texts)), found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of exact vs lemma keyword matching.")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="spaCy model, or 'blank' for lookup lemmas only")
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=2, help="Pages per synthetic CV")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 16, 64])
+    parser.add_argument("--processes", nargs="+", type=int, default=[1, 2])
+    args = parser.parse_args()
+
+    corpus = sample_corpus()
+    texts = ["\n".join(cv_pages(args.pages, seed, corpus)) for seed in range(args.docs)]
+    keywords = get_registry().get(ROLE).keywords
+    start = time.perf_counter()
+    nlp = load_nlp(args.model)
+    get_lemma_matcher(nlp, keywords)
+    setup_s = time.perf_counter() - start
+
+    exact, exact_found = bench_exact(texts, keywords)
+    rows = [exact]
+    for n_process in args.processes:
+        for batch_size in args.batch_sizes:
+            row, lemma_found = bench_lemma(texts, keywords, nlp, batch_size, n_process)
+            # Keywords that only the lemma pass found, per CV.
+            row["extra_matches_per_doc"] = round(
+                sum(len(lem - ex) for lem, ex in zip(lemma_found, exact_found)) / len(texts), 3)
+            rows.append(row)
+    print(json.dumps({"model": args.model, "pipeline": nlp.pipe_names, "docs": args.docs, "pages": args.pages,
+                      "model_setup_s": round(setup_s, 3), "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
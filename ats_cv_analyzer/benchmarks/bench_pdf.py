@@ -0,0 +1,89 @@
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fpdf import FPDF  # noqa: E402
+
+from pdf_report import PDF, draw_report, render_report, render_reports  # noqa: E402
+
+ANALYSIS = {
+    "ats_score": 64,
+    "strengths": ["Summary section is present.", "Skills section is present.", "Experience section is present."],
+    "weaknesses": ["Education section missing.", "Contact section missing."],
+    "matched_keywords": ["Python", "SQL", "Docker", "Git", "Linux"],
+    "missing_keywords": ["Kubernetes", "Terraform", "REST API", "CI/CD", "React", "Node.js"],
+}
+REWRITTEN = "\n".join(
+    ["Summary:"] + [f"- Delivered platform improvement number {i} for production services." for i in range(40)]
+)
+
+
+class LegacyPDF(FPDF):
+    # The report layout on plain fpdf: add_font reads the fonts for every report.
+    footer = PDF.footer
+
+
+# The file-based path generate_pdf used before: plain fpdf, written to
+# reports/, then read back for the download button. Same content as render_report.
+def legacy_report(analysis, job_keywords, rewritten_cv, out_dir):
+    pdf = draw_report(LegacyPDF(), analysis, job_keywords, rewritten_cv)
+    filename = os.path.join(out_dir, f"report_{time.perf_counter_ns()}.pdf")
+    pdf.output(filename)
+    with open(filename, "rb") as f:
+        data = f.read()
+    os.remove(filename)
+    return data
+
+
+def measure(label, fn, count):
+    total_bytes = 0
+    start = time.perf_counter()
+    for _ in range(count):
+        total_bytes += len(fn())
+    elapsed = time.perf_counter() - start
+    # Separate pass: tracemalloc slows allocation-heavy code down a lot.
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "path": label,
+        "reports": count,
+        "reports_per_s": round(count / elapsed, 1),
+        "ms_per_report": round(elapsed / count * 1000, 2),
+        "peak_traced_mb": round(peak / 1024 / 1024, 2),
+        "avg_pdf_kb": round(total_bytes / count / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report rendering throughput: legacy file path vs cached renderer.")
+    parser.add_argument("--count", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    keywords = ANALYSIS["matched_keywords"] + ANALYSIS["missing_keywords"]
+    out_dir = os.path.join("reports", "bench")
+    os.makedirs(out_dir, exist_ok=True)
+
+    results = []
+    results.append(measure("legacy_add_font_file", lambda: legacy_report(ANALYSIS, keywords, REWRITTEN, out_dir), args.count))
+    results.append(measure("cached_in_memory", lambda: render_report(ANALYSIS, keywords, REWRITTEN), args.count))
+
+    jobs = [{"analysis": ANALYSIS, "job_keywords": keywords, "rewritten_cv": REWRITTEN}] * (args.count * 4)
+    start = time.perf_counter()
+    rendered = sum(1 for _ in render_reports(jobs, workers=args.workers))
+    elapsed = time.perf_counter() - start
+    results.append({"path": f"batch_{args.workers}_workers", "reports": rendered,
+                    "reports_per_s": round(rendered / elapsed, 1)})
+    os.rmdir(out_dir)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+os.chdir(APP_DIR)
+
+from streamlit.delta_generator import DeltaGenerator  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+TYPES = {".pdf": "application/pdf", ".txt": "text/plain",
+         ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"}
+
+
+# ------------------ Upload Simulation ------------------
+class FakeUpload(io.BytesIO):
+    # AppTest cannot drive st.file_uploader, so the harness hands the script
+    # an object shaped like streamlit's UploadedFile instead.
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            super().__init__(f.read())
+        self.name = os.path.basename(path)
+        self.type = TYPES.get(os.path.splitext(path)[1].lower(), "text/plain")
+        self.size = len(self.getvalue())
+        self.file_id = uuid.uuid4().hex
+
+
+def patch_uploader(upload):
+    def file_uploader(self, label, *args, **kwargs):
+        return upload
+    DeltaGenerator.file_uploader = file_uploader
+
+
+def new_app(script, timeout):
+    at = AppTest.from_file(script, default_timeout=timeout)
+    at.secrets["SUPABASE_URL"] = "stub://"
+    at.secrets["SUPABASE_KEY"] = "stub"
+    at.secrets["Admin"] = "admin"
+    return at
+
+
+def timed(action):
+    start = time.perf_counter()
+    action()
+    return time.perf_counter() - start
+
+
+def ms(values):
+    values = sorted(values)
+    return {
+        "p50_ms": round(statistics.median(values) * 1000, 1),
+        "max_ms": round(values[-1] * 1000, 1),
+    }
+
+
+# ------------------ Scenario ------------------
+def run(script, cv_path, reruns, timeout):
+    patch_uploader(FakeUpload(cv_path))
+    at = new_app(script, timeout)
+    results = {"first_run_ms": round(timed(at.run) * 1000, 1)}
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    typing = []
+    for i in range(reruns):
+        email = at.sidebar.text_input[0]
+        typing.append(timed(lambda: email.input(f"user{i}@example").run()))
+    results["newsletter_typing"] = ms(typing)
+
+    buttons = [b for b in at.button if "Generate" in b.label]
+    if buttons:
+        results["generate_report_ms"] = round(timed(lambda: buttons[0].click().run()) * 1000, 1)
+
+    after = []
+    for i in range(reruns):
+        email = at.sidebar.text_input[0]
+        after.append(timed(lambda: email.input(f"again{i}@example").run()))
+    results["rerun_after_report"] = ms(after)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Streamlit rerun latency for common widget interactions.")
+    parser.add_argument("--script", default="freecvapp.py", help="App script to drive (e.g. an older checkout)")
+    parser.add_argument("--cv", default=os.path.join("sample_cvs", "john_doe.txt"))
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+    print(json.dumps(run(args.script, args.cv, args.reruns, args.timeout), indent=2))
+
+
+if __name__ == "__main__":
+    main()
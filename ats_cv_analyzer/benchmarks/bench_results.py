@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_result import AnalysisResult  # noqa: E402
+from bench_sections import synthetic_cv  # noqa: E402
+from cv_analysis import analyze_cv  # noqa: E402
+from keyword_registry import get_registry  # noqa: E402
+
+
+# The plain dict analyze_cv used to return: fresh lists, strings and tuples per CV.
+def legacy_result(scan, keywords):
+    return analyze_cv(None, keywords, scan=scan).to_dict()
+
+
+def retained(label, build, count):
+    start = time.perf_counter()
+    tracemalloc.start()
+    results = build()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    elapsed = time.perf_counter() - start
+    return results, {
+        "representation": label,
+        "results": count,
+        "retained_mb": round(current / 1024 / 1024, 2),
+        "bytes_per_result": round(current / count),
+        "build_s": round(elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory of retained analysis results: dict vs compact result.")
+    parser.add_argument("--count", type=int, default=2000)
+    args = parser.parse_args()
+    registry = get_registry()
+    roles = registry.roles()
+    # One scan per text with every role's keywords, made before measuring.
+    scans = [registry.union_matcher().scan(synthetic_cv(1 + i % 4, seed=i)) for i in range(50)]
+    jobs = [(scans[i % len(scans)], roles[i % len(roles)].keywords) for i in range(args.count)]
+
+    dicts, dict_stats = retained("dict", lambda: [legacy_result(s, kws) for s, kws in jobs], args.count)
+    compact, compact_stats = retained("AnalysisResult", lambda: [analyze_cv(None, kws, scan=s) for s, kws in jobs],
+                                      args.count)
+    assert all(c.to_dict() == d for c, d in zip(compact, dicts))
+
+    dict_stats["serialized_bytes"] = {
+        "json": round(sum(len(json.dumps(d)) for d in dicts) / args.count),
+        "pickle": round(sum(len(pickle.dumps(d)) for d in dicts) / args.count),
+    }
+    compact_stats["serialized_bytes"] = {
+        "to_bytes": round(sum(len(c.to_bytes()) for c in compact) / args.count),
+        "pickle": round(sum(len(pickle.dumps(c)) for c in compact) / args.count),
+    }
+    start = time.perf_counter()
+    for c in compact:
+        AnalysisResult.from_bytes(c.to_bytes())
+    compact_stats["roundtrip_us"] = round((time.perf_counter() - start) / args.count * 1e6, 1)
+    print(json.dumps([dict_stats, compact_stats], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cv_analysis import detect_sections  # noqa: E402
+from section_segmenter import SECTION_HEADERS  # noqa: E402
+
+FILLER = ("Designed and delivered data platforms used across the business while mentoring engineers "
+          "and improving reliability of production services").split()
+
+
+# The nested-scan implementation that detect_sections replaced, kept for comparison.
+def legacy_detect_sections(cv_text):
+    cv_text_lower = cv_text.lower()
+    sections = {}
+    for sec, headers in SECTION_HEADERS.items():
+        for h in headers:
+            match = re.search(r'{}[:\n]'.format(re.escape(h)), cv_text_lower)
+            if match:
+                start = match.end()
+                next_header_pos = len(cv_text)
+                for other_sec, other_headers in SECTION_HEADERS.items():
+                    if other_sec == sec:
+                        continue
+                    for oh in other_headers:
+                        oh_match = re.search(r'{}[:\n]'.format(re.escape(oh)), cv_text_lower[start:])
+                        if oh_match:
+                            next_header_pos = min(next_header_pos, start + oh_match.start())
+                sections[sec] = cv_text[start:next_header_pos].strip()
+                break
+        if sec not in sections:
+            sections[sec] = ""
+    return sections
+
+
+def synthetic_cv(n_blocks, seed=0):
+    rng = random.Random(seed)
+    lines = ["Jane Doe", "Email: jane@example.com", "Summary:", " ".join(rng.choices(FILLER, k=40))]
+    for i in range(n_blocks):
+        header = rng.choice(["Experience:", "Projects:", "Employment:"])
+        lines.append(header)
+        lines.extend(" ".join(rng.choices(FILLER, k=25)) + "." for _ in range(8))
+    lines += ["Skills:", "Python, SQL, Docker", "Education:", "BSc Computer Science"]
+    return "\n".join(lines)
+
+
+def best_of(fn, arg, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="detect_sections scaling on synthetic CVs.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    for n in args.sizes:
+        text = synthetic_cv(n)
+        segmented = best_of(detect_sections, text, args.repeat)
+        legacy = best_of(legacy_detect_sections, text, args.repeat)
+        rows.append({
+            "blocks": n,
+            "kb": round(len(text) / 1024, 1),
+            "segmenter_ms": round(segmented * 1000, 3),
+            "segmenter_us_per_kb": round(segmented * 1e6 / (len(text) / 1024), 2),
+            "legacy_ms": round(legacy * 1000, 3),
+            "legacy_us_per_kb": round(legacy * 1e6 / (len(text) / 1024), 2),
+        })
+    print(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
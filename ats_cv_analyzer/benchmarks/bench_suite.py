@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_cvs import FORMATS, ensure_cv, sample_corpus  # noqa: E402
+
+STAGES = ("extract", "scan", "analyze", "sections", "rewrite", "pdf", "end_to_end")
+DEFAULT_PAGES = (1, 10, 50, 200)
+QUICK_PAGES = (1, 10)
+ROLE = "software_engineer.txt"
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def _summarize(durations, input_bytes):
+    total = sum(durations)
+    return {
+        "iterations": len(durations),
+        "mean_ms": round(total / len(durations) * 1000, 3),
+        "p50_ms": round(_percentile(durations, 50) * 1000, 3),
+        "p95_ms": round(_percentile(durations, 95) * 1000, 3),
+        "p99_ms": round(_percentile(durations, 99) * 1000, 3),
+        "docs_per_s": round(len(durations) / total, 2) if total else 0.0,
+        "mb_per_s": round(len(durations) * input_bytes / total / 1024 / 1024, 2) if total else 0.0,
+    }
+
+
+def _measure(fn, iterations, budget):
+    # Always one warm-up call; then up to `iterations` runs or `budget` seconds.
+    fn()
+    durations = []
+    deadline = time.perf_counter() + budget
+    while len(durations) < iterations and (not durations or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+# ------------------ One Case (runs in its own process) ------------------
+def run_case(path, fmt, pages, iterations, budget, seed, stages):
+    from analytics_writer import WriteBehindQueue
+    from cv_analysis import analyze_cv, detect_sections, professional_rewrite_cv
+    from keyword_registry import get_registry
+    from pdf_report import render_report
+    from role_scoring import RoleScorer
+    from supabase_stub import StubSupabaseClient
+    from text_extraction import iter_text
+
+    registry = get_registry()
+    keywords = registry.get(ROLE).keywords
+    union = registry.union_matcher()
+    scorer = RoleScorer(registry)
+    text = "".join(iter_text(path))
+    analysis = analyze_cv(text, keywords)
+    rewritten = professional_rewrite_cv(text, keywords)
+    spool = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+    writer = WriteBehindQueue(StubSupabaseClient(), spool_path=spool)
+
+    def end_to_end():
+        # The app's upload flow without Streamlit: stream pages into one scan,
+        # score, rank roles, log to the stubbed Supabase, rewrite, render.
+        stream = union.stream()
+        for page_text in iter_text(path):
+            stream.feed(page_text)
+        scan = stream.finish()
+        result = analyze_cv(scan.text, keywords, scan=scan)
+        scorer.rank(scan=scan, top_k=5)
+        writer.enqueue("analytics", {"cv_name": "bench", "role": ROLE, "ats_score": result["ats_score"],
+                                     "matched_keywords": ",".join(result["matched_keywords"]),
+                                     "missing_keywords": ",".join(result["missing_keywords"])})
+        writer.flush()
+        render_report(result, keywords, professional_rewrite_cv(scan.text, keywords, scan=scan))
+
+    calls = {
+        "extract": lambda: "".join(iter_text(path)),
+        "scan": lambda: union.scan(text),
+        "analyze": lambda: analyze_cv(text, keywords),
+        "sections": lambda: detect_sections(text),
+        "rewrite": lambda: professional_rewrite_cv(text, keywords),
+        "pdf": lambda: render_report(analysis, keywords, rewritten),
+        "end_to_end": end_to_end,
+    }
+    input_bytes = os.path.getsize(path)
+    results = []
+    for stage in stages:
+        durations = _measure(calls[stage], iterations, budget)
+        results.append(dict(format=fmt, pages=pages, stage=stage, input_bytes=input_bytes,
+                            **_summarize(durations, input_bytes)))
+    writer.stop()
+    os.remove(spool)
+    # ru_maxrss is in KiB on Linux; one fresh process per case keeps it per case.
+    peak_rss_mb = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    for row in results:
+        row["peak_rss_mb"] = peak_rss_mb
+    return results
+
+
+# ------------------ Suite ------------------
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(formats, pages_list, iterations, budget, seed, stages, cache_dir):
+    corpus = sample_corpus()
+    cases = [(fmt, pages, ensure_cv(cache_dir, fmt, pages, seed, corpus)) for pages in pages_list for fmt in formats]
+    rows = []
+    for fmt, pages, path in cases:
+        print(f"{fmt} {pages}p ...", file=sys.stderr)
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            rows.extend(pool.submit(run_case, path, fmt, pages, iterations, budget, seed, stages).result())
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seed": seed,
+            "iterations": iterations,
+            "time_budget_s": budget,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": rows,
+    }
+
+
+# ------------------ Baseline Comparison ------------------
+def compare(current, baseline, threshold=0.15, min_ms=0.05):
+    """Rows whose p50/p95 latency or peak RSS grew by more than `threshold`."""
+    base = {(r["format"], r["pages"], r["stage"]): r for r in baseline["results"]}
+    regressions = []
+    for row in current["results"]:
+        old = base.get((row["format"], row["pages"], row["stage"]))
+        if old is None:
+            continue
+        for field, floor in (("p50_ms", min_ms), ("p95_ms", min_ms), ("peak_rss_mb", 1.0)):
+            if row[field] - old[field] > floor and row[field] > old[field] * (1 + threshold):
+                regressions.append({
+                    "format": row["format"], "pages": row["pages"], "stage": row["stage"], "metric": field,
+                    "baseline": old[field], "current": row[field],
+                    "change": f"{(row[field] / old[field] - 1) * 100:+.0f}%" if old[field] else "new",
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every analyzer stage on synthetic CVs.")
+    parser.add_argument("-o", "--output", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--pages", nargs="+", type=int, default=None, help=f"CV sizes (default {DEFAULT_PAGES})")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--quick", action="store_true", help=f"Only {QUICK_PAGES} pages, fewer iterations")
+    parser.add_argument("--iterations", type=int, default=None)
+    parser.add_argument("--budget", type=float, default=3.0, help="Max seconds per stage and case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache-dir", default=os.path.join(tempfile.gettempdir(), "ats_bench_cvs"))
+    parser.add_argument("--compare", metavar="BASELINE", help="Flag regressions against a previous results JSON")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed relative slowdown (default 0.15)")
+    args = parser.parse_args()
+
+    pages = args.pages or (QUICK_PAGES if args.quick else DEFAULT_PAGES)
+    iterations = args.iterations or (10 if args.quick else 30)
+    report = run_suite(args.formats, pages, iterations, args.budget, args.seed, args.stages, args.cache_dir)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["regressions"] = compare(report, baseline, args.threshold)
+        report["baseline"] = baseline.get("meta")
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if report.get("regressions"):
+        for r in report["regressions"]:
+            print(f"REGRESSION {r['format']} {r['pages']}p {r['stage']} {r['metric']}: "
+                  f"{r['baseline']} -> {r['current']} ({r['change']})", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
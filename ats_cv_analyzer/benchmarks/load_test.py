@@ -0,0 +1,288 @@
+import argparse
+import gc
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+from urllib import parse
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import streamlit as st  # noqa: E402
+from streamlit import config  # noqa: E402
+from streamlit.delta_generator import DeltaGenerator  # noqa: E402
+from streamlit.runtime import Runtime  # noqa: E402
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager  # noqa: E402
+from streamlit.runtime.media_file_manager import MediaFileManager  # noqa: E402
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage  # noqa: E402
+from streamlit.runtime.pages_manager import PagesManager  # noqa: E402
+from streamlit.runtime.scriptrunner import get_script_run_ctx  # noqa: E402
+from streamlit.runtime.secrets import Secrets  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner  # noqa: E402
+from streamlit.testing.v1.util import build_mock_config_get_option  # noqa: E402
+
+from bench_rerun import FakeUpload  # noqa: E402
+from synthetic_cvs import FORMATS, ensure_cv, sample_corpus  # noqa: E402
+
+INTERACTIONS = ("upload", "tab_switch", "switch_role", "report", "newsletter", "admin")
+ADMIN_KEY = "load-test"
+
+
+# ------------------ Concurrent Sessions ------------------
+def install_test_runtime(secrets):
+    """What AppTest sets up and tears down around every run, installed once
+    for the process, so sessions in different threads can run at the same
+    time. They share st.cache_data as sessions of one server do."""
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+    st.secrets = Secrets()
+    st.secrets._secrets = secrets
+    patch.object(config, "get_option", new=build_mock_config_get_option({"global.appTest": True})).start()
+
+
+class ConcurrentAppTest(AppTest):
+    # One browser session: its own session id, state and script thread.
+
+    def __init__(self, script_path, default_timeout):
+        super().__init__(script_path, default_timeout=default_timeout)
+        self.session_id = uuid.uuid4().hex
+
+    def _run(self, widget_state=None, timeout=None):
+        runner = LocalScriptRunner(self._script_path, self.session_state, PagesManager(self._script_path,
+                                                                                      setup_watcher=False),
+                                   args=self.args, kwargs=self.kwargs)
+        runner._session_id = self.session_id
+        self._tree = runner.run(widget_state, self.query_params, timeout or self.default_timeout, self._page_hash)
+        self._tree._runner = self
+        self.query_params = parse.parse_qs(runner.event_data[-1]["client_state"].query_string)
+        return self
+
+
+_uploads = {}
+
+
+def route_uploads():
+    # The CV uploader of each session returns that session's file; the
+    # job-description uploader (it has a key) returns nothing.
+    def file_uploader(self, label, *args, **kwargs):
+        if kwargs.get("key"):
+            return None
+        ctx = get_script_run_ctx()
+        return _uploads.get(ctx.session_id) if ctx else None
+    DeltaGenerator.file_uploader = file_uploader
+
+
+# ------------------ Scenario ------------------
+def _widget(elements, label):
+    return next(w for w in elements if w.label == label)
+
+
+def _timed(name, timings, action):
+    start = time.perf_counter()
+    at = action()
+    timings[name].append(time.perf_counter() - start)
+    if at.exception:
+        raise RuntimeError(f"{name}: {at.exception[0].message}")
+
+
+def run_session(script, cv_path, tab_switches, timeout, timings):
+    """One simulated user. Appends the latency of each interaction to `timings`."""
+    at = ConcurrentAppTest(script, timeout)
+    _uploads[at.session_id] = FakeUpload(cv_path)
+    try:
+        _timed("upload", timings, at.run)
+        # st.tabs switch in the browser without a rerun; what a user's next
+        # click costs is one more rerun of the script, which is timed here.
+        for _ in range(tab_switches):
+            _timed("tab_switch", timings, at.run)
+        roles = _widget(at.sidebar.selectbox, "Select job keywords file")
+        other = roles.options[(roles.options.index(roles.value) + 1) % len(roles.options)]
+        _timed("switch_role", timings, lambda: roles.set_value(other).run())
+        report = next(b for b in at.button if "Generate" in b.label)
+        _timed("report", timings, lambda: report.click().run())
+        _widget(at.sidebar.text_input, "Enter your email:").input(f"{at.session_id}@example.com")
+        _timed("newsletter", timings, lambda: _widget(at.sidebar.button, "Sign Up").click().run())
+        _timed("admin", timings, lambda: _widget(at.sidebar.text_input, "Admin Access Key").input(ADMIN_KEY).run())
+    finally:
+        _uploads.pop(at.session_id, None)
+
+
+# ------------------ Measurements ------------------
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        # Peak, not current, where /proc is missing (ru_maxrss is bytes on macOS).
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def disk_usage(folder):
+    # Files the app writes next to itself: reports/, SQLite databases, spools.
+    usage = {}
+    for root, _, files in os.walk(folder):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                usage[os.path.relpath(path, folder)] = os.path.getsize(path)
+            except OSError:
+                pass
+    return usage
+
+
+def disk_growth(before, after):
+    grown = {path: size - before.get(path, 0) for path, size in after.items() if size != before.get(path, 0)}
+    reports = [path for path in after if path.startswith("reports" + os.sep) and path not in before]
+    return {"new_report_files": len(reports), "bytes": dict(sorted(grown.items()))}
+
+
+def summarize(timings, elapsed, sessions, errors):
+    total = sum(len(v) for v in timings.values())
+    out = {
+        "sessions": sessions,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 2),
+        "sessions_per_s": round(sessions / elapsed, 3),
+        "interactions_per_s": round(total / elapsed, 2),
+        "latency_ms": {},
+    }
+    for name in INTERACTIONS:
+        values = timings.get(name)
+        if values:
+            out["latency_ms"][name] = {f"p{p}": round(_percentile(values, p) * 1000, 1) for p in (50, 95, 99)}
+    return out
+
+
+def run_level(script, users, rounds, cv_paths, tab_switches, timeout):
+    # Closed loop: every user starts a new session as soon as the last one ends.
+    timings = defaultdict(list)
+    errors = []
+    lock = threading.Lock()
+
+    def user(paths):
+        local = defaultdict(list)
+        for path in paths:
+            try:
+                run_session(script, path, tab_switches, timeout, local)
+            except Exception as e:
+                with lock:
+                    errors.append(f"{os.path.basename(path)}: {type(e).__name__}: {e}")
+        with lock:
+            for name, values in local.items():
+                timings[name].extend(values)
+
+    per_user = [[next(cv_paths) for _ in range(rounds)] for _ in range(users)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(users) as pool:
+        list(pool.map(user, per_user))
+    return summarize(timings, time.perf_counter() - start, users * rounds, errors)
+
+
+def saturation(levels, gain=1.1):
+    # First concurrency whose throughput is not `gain` times the previous one.
+    for prev, cur in zip(levels, levels[1:]):
+        if cur["interactions_per_s"] < prev["interactions_per_s"] * gain:
+            return prev["users"]
+    return None
+
+
+# ------------------ Entry Point ------------------
+def main():
+    parser = argparse.ArgumentParser(
+        description="Drive N concurrent simulated sessions through freecvapp.py with Supabase stubbed out.")
+    parser.add_argument("--script", default=os.path.join(APP_DIR, "freecvapp.py"))
+    parser.add_argument("--users", nargs="+", type=int, default=[1, 2, 4, 8], help="Concurrency levels to run")
+    parser.add_argument("--rounds", type=int, default=2, help="Sessions per user at each level")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per synthetic CV")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--tab-switches", type=int, default=3)
+    parser.add_argument("--supabase-latency", type=float, default=0.0, help="Seconds added to every stub call")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=0, help="First synthetic CV seed")
+    parser.add_argument("--cv-cache", default=os.path.join(tempfile.gettempdir(), "ats_bench_cvs"))
+    parser.add_argument("--in-place", action="store_true",
+                        help="Run in the app folder instead of a scratch one (its databases and reports/ grow)")
+    parser.add_argument("--keep-workdir", action="store_true", help="Keep the scratch folder for inspection")
+    parser.add_argument("--trace-memory", action="store_true", help="Also list the top allocation growth")
+    args = parser.parse_args()
+
+    # The app writes its databases and reports/ to the working directory.
+    workdir = APP_DIR if args.in_place else tempfile.mkdtemp(prefix="ats_load_")
+    if not args.in_place:
+        os.symlink(os.path.join(APP_DIR, "job_keywords"), os.path.join(workdir, "job_keywords"))
+    os.chdir(workdir)
+
+    corpus = sample_corpus()
+    sessions = sum(args.users) * args.rounds
+    # Every session uploads a different CV, so nothing is served from cache;
+    # the last one is for the warm-up session.
+    paths = [ensure_cv(args.cv_cache, args.formats[i % len(args.formats)], args.pages, args.seed + i, corpus)
+             for i in range(sessions + 1)]
+
+    install_test_runtime({"SUPABASE_URL": f"stub://?latency={args.supabase_latency}", "SUPABASE_KEY": "stub",
+                          "Admin": ADMIN_KEY})
+    route_uploads()
+    # Warm-up session: imports, keyword registry, fonts, first-use resources.
+    run_session(args.script, paths[-1], 0, args.timeout, defaultdict(list))
+    cv_paths = iter(paths)
+
+    if args.trace_memory:
+        tracemalloc.start()
+        first_snapshot = tracemalloc.take_snapshot()
+    gc.collect()
+    start_rss = rss_mb()
+    start_disk = disk_usage(workdir)
+    levels = []
+    for users in args.users:
+        before = rss_mb()
+        result = run_level(args.script, users, args.rounds, cv_paths, args.tab_switches, args.timeout)
+        gc.collect()
+        result = dict(users=users, **result, rss_mb=round(rss_mb(), 1), rss_growth_mb=round(rss_mb() - before, 1))
+        levels.append(result)
+        print(f"{users} users: {result['interactions_per_s']} interactions/s, "
+              f"upload p95 {result['latency_ms'].get('upload', {}).get('p95', '-')} ms, "
+              f"{len(result['errors'])} errors", file=sys.stderr)
+
+    report = {
+        "script": args.script,
+        "workdir": workdir,
+        "pages": args.pages,
+        "formats": args.formats,
+        "supabase_latency_s": args.supabase_latency,
+        "levels": levels,
+        "saturation_users": saturation(levels),
+        "memory": {"start_rss_mb": round(start_rss, 1), "end_rss_mb": round(rss_mb(), 1),
+                   "growth_mb": round(rss_mb() - start_rss, 1)},
+        "disk": disk_growth(start_disk, disk_usage(workdir)),
+    }
+    if args.trace_memory:
+        growth = tracemalloc.take_snapshot().compare_to(first_snapshot, "lineno")[:10]
+        report["memory"]["top_growth"] = [str(stat) for stat in growth]
+    print(json.dumps(report, indent=2))
+    if not args.in_place and not args.keep_workdir:
+        os.chdir(APP_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_registry import get_registry  # noqa: E402
+from section_segmenter import SECTION_HEADERS  # noqa: E402
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_DIR = os.path.join(APP_DIR, "sample_cvs")
+FORMATS = ("txt", "docx", "pdf")
+# Roughly one printed page of CV text.
+PAGE_CHARS = 3000
+
+
+# ------------------ Seed Corpus ------------------
+def sample_corpus(folder=SAMPLE_DIR):
+    """Lines and words of the sample CVs plus every role's keywords."""
+    from text_extraction import extract_text
+    lines = []
+    for name in sorted(os.listdir(folder)):
+        path = os.path.join(folder, name)
+        try:
+            text = extract_text(path)
+        except Exception:
+            # The bundled samples are plain text whatever their extension.
+            with open(path, encoding="utf-8", errors="ignore") as f:
+                text = f.read()
+        lines.extend(line.strip() for line in text.splitlines() if line.strip())
+    words = sorted({w for line in lines for w in line.replace(",", " ").split() if w.isascii()})
+    keywords = sorted({kw for role in get_registry().roles() for kw in role.keywords if kw.isascii()})
+    return lines, words, keywords
+
+
+def cv_pages(pages, seed=0, corpus=None):
+    """`pages` pages of deterministic CV text built from the sample CVs."""
+    lines, words, keywords = corpus or sample_corpus()
+    rng = random.Random(seed)
+    headers = [h for hs in SECTION_HEADERS.values() for h in hs]
+    out = []
+    for page in range(pages):
+        body = list(lines) if page == 0 else []
+        size = sum(len(line) + 1 for line in body)
+        while size < PAGE_CHARS:
+            if rng.random() < 0.08:
+                line = rng.choice(headers).title() + ":"
+            else:
+                picks = rng.choices(words, k=rng.randint(8, 16)) + rng.sample(keywords, 2)
+                rng.shuffle(picks)
+                line = " ".join(picks) + "."
+            body.append(line)
+            size += len(line) + 1
+        out.append("\n".join(body))
+    return out
+
+
+# ------------------ Writers ------------------
+def write_txt(path, pages):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(pages))
+
+
+def write_docx(path, pages):
+    import docx
+    document = docx.Document()
+    for i, page in enumerate(pages):
+        if i:
+            document.add_page_break()
+        for line in page.split("\n"):
+            document.add_paragraph(line)
+    document.save(path)
+
+
+def write_pdf(path, pages):
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.set_auto_page_break(False)
+    pdf.set_font("Helvetica", size=8)
+    for page in pages:
+        pdf.add_page()
+        pdf.multi_cell(0, 3.5, page.encode("latin-1", "replace").decode("latin-1"))
+    pdf.output(path)
+
+
+WRITERS = {"txt": write_txt, "docx": write_docx, "pdf": write_pdf}
+
+
+def ensure_cv(cache_dir, fmt, pages, seed=0, corpus=None):
+    """Path of a generated CV, created once per (format, pages, seed)."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"cv_{pages}p_s{seed}.{fmt}")
+    if not os.path.exists(path):
+        tmp = path + ".tmp"
+        WRITERS[fmt](tmp, cv_pages(pages, seed, corpus))
+        os.replace(tmp, path)
+    return path
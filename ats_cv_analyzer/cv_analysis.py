@@ -0,0 +1,107 @@
+from collections import Counter
+
+from analysis_result import SECTION_NAMES, AnalysisResult, intern_vocabulary
+from keyword_matcher import get_matcher, normalize_keyword
+from metrics import get_metrics
+from rewrite_engine import cv_seed, get_rewrite_engine
+from section_segmenter import SECTION_HEADERS, segment
+
+TOP_WORDS = 20
+
+# ------------------ CV Analysis ------------------
+def detected_sections(scan):
+    found_sections = {sec for sec, _, _ in scan.section_spans}
+    return {sec: sec in found_sections for sec in SECTION_HEADERS}
+
+def section_score(sections):
+    return (sum(sections.values()) / len(sections)) * 50
+
+def build_result(job_keywords, sections, contains, common_words, weights=None):
+    # weights: a KeywordWeights snapshot; without one every keyword counts the same.
+    vocab = intern_vocabulary(job_keywords)
+    matched_bits = 0
+    for i, kw in enumerate(vocab.keywords):
+        if contains(kw):
+            matched_bits |= 1 << i
+    section_bits = sum(1 << i for i, sec in enumerate(SECTION_NAMES) if sections[sec])
+    if weights is None:
+        keyword_score = (matched_bits.bit_count() / len(vocab) * 50) if len(vocab) else 0
+    else:
+        w = [weights(kw) for kw in vocab.keywords]
+        total = sum(w)
+        keyword_score = (sum(x for i, x in enumerate(w) if matched_bits >> i & 1) / total * 50) if total else 0
+    ats_score = int(section_score(sections) + keyword_score)
+    return AnalysisResult(vocab, matched_bits, section_bits, ats_score, common_words)
+
+@get_metrics().timed("analyze")
+def analyze_cv(text, job_keywords=None, scan=None, lemmas=None, weights=None):
+    # lemmas: normalized keywords a LemmaMatcher found in inflected form
+    if scan is None:
+        scan = get_matcher(job_keywords).scan(text)
+    contains = scan.contains
+    if lemmas:
+        def contains(kw):
+            return scan.contains(kw) or normalize_keyword(kw) in lemmas
+    # most_common(n) keeps the top n in a bounded heap (heapq.nlargest).
+    common_words = Counter(scan.words).most_common(TOP_WORDS)
+    result = build_result(job_keywords, detected_sections(scan), contains, common_words, weights)
+    get_metrics().inc("keywords_matched", result.matched_count)
+    get_metrics().inc("keywords_missing", len(result.vocab) - result.matched_count)
+    return result
+
+# ------------------ Keyword Suggestions ------------------
+@get_metrics().timed("suggestions")
+def suggest_keyword_usage(missing_keywords, cv_text, scan=None):
+    if scan is None:
+        scan = get_matcher(missing_keywords).scan(cv_text)
+    suggestions = []
+    for kw in missing_keywords:
+        if scan.contains(kw):
+            continue
+        suggestion = f"Consider including '{kw}' in your Skills or Experience section, e.g., 'Proficient in {kw}' or 'Worked on projects involving {kw}'."
+        suggestions.append(suggestion)
+    return suggestions
+
+# ------------------ Rewriter Helpers ------------------
+REWRITE_SECTIONS = ["summary", "skills", "experience", "education"]
+
+def detect_section_spans(cv_text, scan=None, spans=None):
+    if spans is None:
+        spans = scan.section_spans if scan is not None else segment(cv_text.lower())
+    first = {}
+    for sec, start, end in spans:
+        first.setdefault(sec, (start, end))
+    return {sec: first.get(sec) for sec in SECTION_HEADERS}
+
+@get_metrics().timed("detect_sections")
+def detect_sections(cv_text, scan=None):
+    spans = detect_section_spans(cv_text, scan)
+    return {sec: cv_text[span[0]:span[1]].strip() if span else "" for sec, span in spans.items()}
+
+def inject_keywords(section_text, missing_keywords, section_type, seed=0):
+    return get_rewrite_engine().rewrite_sections([(section_type, section_text, missing_keywords)], seed)[0]
+
+@get_metrics().timed("rewrite")
+def professional_rewrite_cv(cv_text, job_keywords, scan=None, seed=None, section_spans=None):
+    # section_spans: those of the original scan, which may have come from
+    # DOCX heading styles that the plain text no longer carries.
+    if scan is None:
+        scan = get_matcher(job_keywords).scan(cv_text)
+    if seed is None:
+        seed = cv_seed(cv_text)
+    spans = detect_section_spans(cv_text, scan, section_spans)
+    batch = []
+    for sec in REWRITE_SECTIONS:
+        span = spans[sec]
+        text = cv_text[span[0]:span[1]].strip() if span else ""
+        present = scan.keys_between(*span) if span else set()
+        missing_keywords = [kw for kw in job_keywords if normalize_keyword(kw) not in present]
+        batch.append((sec, text, missing_keywords))
+    rewritten_sections = get_rewrite_engine().rewrite_sections(batch, seed)
+    final_cv = []
+    for sec, bullets in zip(REWRITE_SECTIONS, rewritten_sections):
+        if bullets:
+            final_cv.append(sec.capitalize() + ":")
+            final_cv.extend(bullets)
+            final_cv.append("")
+    return "\n".join(final_cv)
@@ -1,23 +1,79 @@
 import streamlit as st
-import docx2txt
-import PyPDF2
-import re
-from collections import Counter
-from fpdf import FPDF
+import atexit
+import io
+import hashlib
 import os
-import glob
-import plotly.graph_objects as go
-import matplotlib.pyplot as plt
 from datetime import datetime
-import random
-import spacy
-import pandas as pd
-from supabase import create_client, Client
-
-# ------------------ Spacy NLP ------------------
-nlp = spacy.load("en_core_web_sm")
-
-# ------------------ PDF Class ------------------
+from keyword_matcher import FoundKeys
+from keyword_registry import get_registry
+from analysis_cache import AnalysisCache, get_analysis_cache
+from text_extraction import ExtractionLimitError, UploadBytes, extract_text, iter_text
+from cv_analysis import analyze_cv, build_result, suggest_keyword_usage, professional_rewrite_cv
+from analytics_writer import WriteBehindQueue
+from analytics_rollups import AnalyticsRollups
+from keyword_weights import IdfStats, extract_job_keywords
+from incremental_analysis import IncrementalAnalyzer
+from lemma_matching import get_lemma_matcher, load_nlp
+from metrics import get_metrics, profiled
+
+# ------------------ Lazy Resources ------------------
+# Heavy libraries and network clients are created on first use and kept
+# across reruns, so importing or starting the app stays cheap. Modules
+# that pull in numpy/scipy are imported inside the function that needs them.
+@st.cache_resource
+def get_nlp():
+    return load_nlp(st.secrets.get("NLP_MODEL", "en_core_web_sm"))
+
+def lemma_mode():
+    # MATCH_MODE="lemma" also matches inflected keywords ("tested" for "Testing").
+    return st.secrets.get("MATCH_MODE", "exact") == "lemma"
+
+@st.cache_resource
+def get_supabase():
+    if st.secrets["SUPABASE_URL"].startswith("stub:"):
+        # Local development / load tests without the live service.
+        from supabase_stub import StubSupabaseClient
+        return StubSupabaseClient.from_url(st.secrets["SUPABASE_URL"])
+    from supabase import create_client
+    return create_client(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_KEY"])
+
+@st.cache_resource
+def get_analytics_writer():
+    # sql/analytics_rollups.sql adds analytics.role; until then PostgREST rejects rows carrying it.
+    writer = WriteBehindQueue(get_supabase(), optional_columns={"analytics": ("role",)}).start()
+    atexit.register(writer.stop)
+    return writer
+
+@st.cache_resource
+def get_role_scorer():
+    from role_scoring import RoleScorer
+    return RoleScorer(get_registry())
+
+@st.cache_resource
+def get_keyword_index():
+    from keyword_index import KeywordIndex
+    index = KeywordIndex("cv_index.db")
+    atexit.register(index.checkpoint)
+    return index
+
+@st.cache_resource
+def get_idf_stats():
+    stats = IdfStats("keyword_weights.db", get_registry())
+    atexit.register(stats.close)
+    return stats
+
+@st.cache_resource
+def get_duplicate_index():
+    from near_duplicates import DuplicateIndex
+    index = DuplicateIndex("cv_duplicates.db")
+    atexit.register(index.close)
+    return index
+
+@st.cache_resource
+def get_analytics_rollups():
+    return AnalyticsRollups(get_supabase(), ttl=30.0, schema=get_analytics_writer())
+
+# ------------------ Footer ------------------
 from trademark_config import TRADEMARK_INFO
 
 def render_footer():
@@ -60,264 +116,33 @@ def render_footer():
         unsafe_allow_html=True
     )
 
-class PDF(FPDF):
-    def footer(self):
-        self.set_y(-20)
-        self.set_font("DejaVu", size=8)
-        self.set_text_color(100, 100, 100)
-        current_year = datetime.now().year
-        brand = TRADEMARK_INFO['brand_name']
-        disclaimer = TRADEMARK_INFO['disclaimer']
-        footer_text = f"© {current_year} {brand} | {disclaimer} | Page {self.page_no()}"
-        self.cell(0, 8, footer_text, align="C")
-
-# ------------------ Supabase Setup ------------------
-SUPABASE_URL = st.secrets["SUPABASE_URL"]
-SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
-Admin = st.secrets["Admin"]
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-# ------------------ Text Extraction ------------------
-def extract_text(file):
-    if file.type == "application/pdf":
-        reader = PyPDF2.PdfReader(file)
-        return "".join([page.extract_text() for page in reader.pages])
-    elif file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-        return docx2txt.process(file)
-    else:
-        return file.getvalue().decode("utf-8")
-
 # ------------------ Job Keywords Loader ------------------
 def detect_job_keywords(cv_name, folder="job_keywords"):
-    base_name = cv_name.lower().replace(" ", "_")
-    files = glob.glob(os.path.join(folder, "*.txt"))
-    matched_file = None
-    for file in files:
-        job = os.path.splitext(os.path.basename(file))[0].lower()
-        if job in base_name:
-            matched_file = file
-            break
-    if not matched_file and files:
-        matched_file = (
-            os.path.join(folder, "software_engineer.txt")
-            if os.path.exists(os.path.join(folder, "software_engineer.txt"))
-            else files[0]
-        )
-    keywords = []
-    if matched_file:
-        with open(matched_file, "r") as f:
-            keywords = [kw.strip() for kw in f.read().split(",") if kw.strip()]
-    return keywords, matched_file, files
-
-# ------------------ CV Analysis ------------------
-def analyze_cv(text, job_keywords=None):
-    text_lower = text.lower()
-    result = {}
-    result['sections'] = {
-        'summary': bool(re.search(r'(summary|profile|about me)', text_lower)),
-        'skills': bool(re.search(r'(skills|technologies|competencies)', text_lower)),
-        'experience': bool(re.search(r'(experience|employment|work history)', text_lower)),
-        'education': bool(re.search(r'(education|qualification|degree)', text_lower)),
-        'contact': bool(re.search(r'(email|phone|contact)', text_lower)),
-    }
-    strengths, weaknesses = [], []
-    for sec, exists in result['sections'].items():
-        if exists:
-            strengths.append(f"{sec.capitalize()} section is present.")
-        else:
-            weaknesses.append(f"{sec.capitalize()} section missing.")
+    registry = get_registry(folder)
+    role = registry.detect(cv_name)
+    keywords = list(role.keywords) if role else []
+    return keywords, role.path if role else None, registry.files()
 
-    words = re.findall(r'\b\w+\b', text_lower)
-    common_words = Counter(words).most_common(20)
-
-    matched_keywords, missing_keywords = [], []
-    if job_keywords:
-        text_words = set(words)
-        for kw in job_keywords:
-            if kw.lower() in text_words:
-                matched_keywords.append(kw)
-            else:
-                missing_keywords.append(kw)
-
-    total_sections = len(result['sections'])
-    present_sections = sum(result['sections'].values())
-    section_score = (present_sections / total_sections) * 50
-    keyword_score = (len(matched_keywords) / len(job_keywords) * 50) if job_keywords else 0
-
-    result.update({
-        'strengths': strengths,
-        'weaknesses': weaknesses,
-        'common_words': common_words,
-        'matched_keywords': matched_keywords,
-        'missing_keywords': missing_keywords,
-        'ats_score': int(section_score + keyword_score),
-    })
-    return result
-
-# ------------------ Keyword Suggestions ------------------
-def suggest_keyword_usage(missing_keywords, cv_text):
-    suggestions = []
-    for kw in missing_keywords:
-        if kw.lower() in cv_text.lower():
-            continue
-        suggestion = f"Consider including '{kw}' in your Skills or Experience section, e.g., 'Proficient in {kw}' or 'Worked on projects involving {kw}'."
-        suggestions.append(suggestion)
-    return suggestions
-
-# ------------------ Rewriter Helpers ------------------
-SECTION_TEMPLATES = {
-    "summary": [
-        "Professional with experience in {}.",
-        "Skilled in {}.",
-        "Accomplished in {}."
-    ],
-    "skills": [
-        "Proficient in {}.",
-        "Experienced with {}.",
-        "Hands-on experience in {}."
-    ],
-    "experience": [
-        "Developed expertise in {}.",
-        "Led projects involving {}.",
-        "Implemented solutions using {}.",
-        "Collaborated with teams to optimize {}."
-    ],
-    "education": [
-        "Completed {} degree.",
-        "Graduated in {}.",
-        "Certified in {}."
-    ]
-}
-
-SECTION_HEADERS = {
-    "summary": ["summary", "profile", "about me", "professional summary"],
-    "skills": ["skills", "technologies", "competencies"],
-    "experience": ["experience", "employment", "work history", "projects"],
-    "education": ["education", "qualification", "degree", "academics"]
-}
-
-def detect_sections(cv_text):
-    cv_text_lower = cv_text.lower()
-    sections = {}
-    for sec, headers in SECTION_HEADERS.items():
-        for h in headers:
-            pattern = r'{}[:\n]'.format(re.escape(h))
-            match = re.search(pattern, cv_text_lower)
-            if match:
-                start = match.end()
-                next_header_pos = len(cv_text)
-                for other_sec, other_headers in SECTION_HEADERS.items():
-                    if other_sec == sec:
-                        continue
-                    for oh in other_headers:
-                        oh_match = re.search(r'{}[:\n]'.format(re.escape(oh)), cv_text_lower[start:])
-                        if oh_match:
-                            pos = start + oh_match.start()
-                            if pos < next_header_pos:
-                                next_header_pos = pos
-                sections[sec] = cv_text[start:next_header_pos].strip()
-                break
-        if sec not in sections:
-            sections[sec] = ""
-    return sections
-
-def inject_keywords(section_text, missing_keywords, section_type):
-    bullets = []
-    sentences = [s.strip() for s in re.split(r'[.\n]', section_text) if s.strip()]
-    for sentence in sentences:
-        sentence = re.sub(r"\bworked\b", "developed", sentence, flags=re.I)
-        sentence = re.sub(r"\bresponsible\b", "led", sentence, flags=re.I)
-        bullets.append(f"- {sentence}")
-    for kw in missing_keywords:
-        template = random.choice(SECTION_TEMPLATES.get(section_type, ["- {}"]))
-        bullets.append(f"- {template.format(kw)}")
-    return bullets
-
-def professional_rewrite_cv(cv_text, job_keywords):
-    sections = detect_sections(cv_text)
-    rewritten_sections = {}
-    for sec, text in sections.items():
-        missing_keywords = [kw for kw in job_keywords if kw.lower() not in text.lower()]
-        rewritten_sections[sec] = inject_keywords(text, missing_keywords, sec)
-    final_cv = []
-    for sec in ["summary", "skills", "experience", "education"]:
-        if rewritten_sections[sec]:
-            final_cv.append(sec.capitalize() + ":")
-            final_cv.extend(rewritten_sections[sec])
-            final_cv.append("")
-    return "\n".join(final_cv)
-
-# ------------------ PDF Helpers ------------------
-def safe_multicell(pdf, text, line_height=8, indent=5):
-    if not text:
-        return
-    x_start = pdf.get_x()
-    usable_width = pdf.w - pdf.l_margin - pdf.r_margin - indent
-    pdf.set_x(pdf.l_margin + indent)
-    pdf.multi_cell(usable_width, line_height, text)
-    pdf.set_x(x_start)
-
-# ------------------ PDF Report ------------------
-def generate_pdf(analysis, cv_name="Uploaded_CV", job_keywords=None, rewritten_cv=None):
-    pdf = PDF()
-    pdf.add_page()
-    pdf.add_font("DejaVu", "", "fonts/DejaVuSans.ttf", uni=True)
-    pdf.add_font("DejaVu", "B", "fonts/DejaVuSans-Bold.ttf", uni=True)
-    pdf.add_font("DejaVu", "I", "fonts/DejaVuSans-Oblique.ttf", uni=True)
-    pdf.add_font("DejaVu", "BI", "fonts/DejaVuSans-BoldOblique.ttf", uni=True)
-    pdf.set_font("DejaVu", "B", 16)
-    pdf.cell(0, 10, "ATS CV Analysis Report", ln=True, align="C")
-    pdf.ln(10)
-
-    pdf.set_font("DejaVu", "B", 12)
-    pdf.cell(0, 10, f"ATS-Friendliness Score: {analysis['ats_score']}%", ln=True)
-    pdf.ln(5)
-
-    pdf.set_font("DejaVu", "B", 12)
-    pdf.cell(0, 10, "Strengths:", ln=True)
-    pdf.set_font("DejaVu", "", 11)
-    for s in analysis["strengths"]:
-        safe_multicell(pdf, f"- {s}", indent=5)
-    pdf.ln(3)
-
-    pdf.set_font("DejaVu", "B", 12)
-    pdf.cell(0, 10, "Weaknesses:", ln=True)
-    pdf.set_font("DejaVu", "", 11)
-    for w in analysis["weaknesses"]:
-        safe_multicell(pdf, f"- {w}", indent=5)
-    pdf.ln(3)
-
-    if job_keywords:
-        pdf.set_font("DejaVu", "B", 12)
-        pdf.cell(0, 10, "Keywords Analysis:", ln=True)
-        pdf.set_font("DejaVu", "", 11)
-        safe_multicell(pdf, f"Matched Keywords: {', '.join(analysis['matched_keywords'])}", indent=5)
-        safe_multicell(pdf, f"Missing Keywords: {', '.join(analysis['missing_keywords'])}", indent=5)
-        pdf.ln(3)
-
-    if rewritten_cv:
-        pdf.set_font("DejaVu", "B", 12)
-        pdf.cell(0, 10, "Professional Rewritten CV:", ln=True)
-        pdf.set_font("DejaVu", "", 11)
-        for line in rewritten_cv.split("\n"):
-            safe_multicell(pdf, line, indent=5)
-        pdf.ln(3)
-
-    os.makedirs("reports", exist_ok=True)
-    filename = f"reports/{cv_name}_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    pdf.output(filename)
-    return filename
+@st.cache_data(max_entries=32)
+def job_description_text(data, name, content_type):
+    return extract_text(UploadBytes(data, name, content_type))
 
 # ------------------ Database Functions ------------------
-def log_cv_analysis(cv_name, ats_score, matched_keywords, missing_keywords):
+def log_cv_analysis(cv_name, ats_score, matched_keywords, missing_keywords, role=None):
     data = {
         "cv_name": cv_name,
+        "role": role,
         "ats_score": ats_score,
         "matched_keywords": ",".join(matched_keywords),
         "missing_keywords": ",".join(missing_keywords),
         "timestamp": datetime.now().isoformat()
     }
-    supabase.table("analytics").insert(data).execute()
+    get_keyword_index().add(data)
+    get_analytics_writer().enqueue("analytics", data)
+
+def count_keyword_usage(found_keys):
+    # Document frequencies behind the IDF keyword weights.
+    get_idf_stats().add(found_keys)
 
 def save_subscriber(email, phone):
     data = {
@@ -325,27 +150,31 @@ def save_subscriber(email, phone):
         "phone": phone if phone else None,
         "timestamp": datetime.now().isoformat()
     }
-    supabase.table("subscribers").insert(data).execute()
+    get_analytics_writer().enqueue("subscribers", data)
 
 # ------------------ Frontend Helpers ------------------
-def display_score(score):
-    if not isinstance(score, (int, float)) or score < 0 or score > 100:
-        score = 0
-    fig = go.Figure(go.Indicator(
+# Charts only depend on a score or two counts, so each distinct figure is
+# built once and reused by every rerun and session.
+@st.cache_resource(max_entries=101)
+@get_metrics().timed("chart", kind="gauge")
+def score_gauge(score):
+    import plotly.graph_objects as go
+    return go.Figure(go.Indicator(
         mode="gauge+number",
         value=score,
         title={'text': "ATS Score"},
         gauge={'axis': {'range': [0, 100]}, 'bar': {'color': "#28a745"}}
     ))
-    st.plotly_chart(fig, use_container_width=True)
 
-def display_keywords_chart(matched, missing):
-    matched_count = len(matched) if matched else 0
-    missing_count = len(missing) if missing else 0
-    if matched_count + missing_count == 0:
-        st.info("No keyword data to display chart.")
-        return
+def display_score(score):
+    if not isinstance(score, (int, float)) or score < 0 or score > 100:
+        score = 0
+    st.plotly_chart(score_gauge(score), use_container_width=True)
 
+@st.cache_data(max_entries=512)
+@get_metrics().timed("chart", kind="keywords")
+def keywords_chart_png(matched_count, missing_count):
+    import matplotlib.pyplot as plt
     labels = ["Matched", "Missing"]
     sizes = [matched_count, missing_count]
     colors = ["#28a745", "#dc3545"]
@@ -362,7 +191,18 @@ def display_keywords_chart(matched, missing):
     ax.legend(wedges, labels, title="Keywords", loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
     ax.set_title("Keywords Match", fontsize=12, pad=10)
     ax.axis("equal")
-    st.pyplot(fig)
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight")
+    plt.close(fig)
+    return buf.getvalue()
+
+def display_keywords_chart(matched, missing):
+    matched_count = len(matched) if matched else 0
+    missing_count = len(missing) if missing else 0
+    if matched_count + missing_count == 0:
+        st.info("No keyword data to display chart.")
+        return
+    st.image(keywords_chart_png(matched_count, missing_count))
 
 def card(title, items, color):
     st.markdown(f"### {title}")
@@ -389,61 +229,225 @@ uploaded_file = st.sidebar.file_uploader("📄 Upload a CV", type=["pdf","docx",
 
 cv_name = None
 job_keywords = []
+keyword_version = None
+role = None
+role_name = None
+# What an upload is logged against: the keywords file, or the job description's keywords.
+role_key = None
+weights = None
 if uploaded_file:
     cv_name = os.path.splitext(uploaded_file.name)[0]
+    # Keywords count by IDF weight; the snapshot only changes as the CV corpus grows.
+    weights = get_idf_stats().weights()
+    lemma_suffix = ".lemma" if lemma_mode() else ""
     auto_keywords, auto_file, all_files = detect_job_keywords(cv_name)
-    if all_files:
+    target = st.sidebar.radio("Score against", ["Job keywords file", "Job description"], horizontal=True)
+    if target == "Job description":
+        job_text = st.sidebar.text_area("Paste the job description", height=200)
+        job_file = st.sidebar.file_uploader("...or upload it", type=["pdf", "docx", "txt"], key="job_description_file")
+        if job_file:
+            try:
+                job_text = job_description_text(job_file.getvalue(), job_file.name, job_file.type)
+            except ExtractionLimitError as e:
+                st.sidebar.error(f"❌ Unable to read this job description: {e}")
+                job_text = ""
+        job_keywords = extract_job_keywords(job_text, weights) if job_text.strip() else []
+        digest = hashlib.sha256("\x1f".join(job_keywords).encode("utf-8")).hexdigest()[:16]
+        keyword_version = f"jd.{digest}.{get_registry().version}.{weights.version}{lemma_suffix}"
+        role_name = "job_description"
+        role_key = f"jd.{digest}"
+        if job_keywords:
+            st.sidebar.info(f"Using {len(job_keywords)} keywords from the job description")
+            st.sidebar.caption(", ".join(job_keywords))
+        elif job_text.strip():
+            st.sidebar.warning("⚠️ No known keywords found in this job description")
+        else:
+            st.sidebar.info("Paste or upload a job description to score your CV against it.")
+    elif all_files:
         file_options = {os.path.basename(f): f for f in all_files}
         default_choice = os.path.basename(auto_file) if auto_file else list(file_options.keys())[0]
         chosen_file = st.sidebar.selectbox("Select job keywords file", list(file_options.keys()), index=list(file_options.keys()).index(default_choice))
-        kw_file = file_options[chosen_file]
-        with open(kw_file, "r") as f:
-            job_keywords = [kw.strip() for kw in f.read().split(",") if kw.strip()]
+        role = get_registry().get(chosen_file)
+        job_keywords = list(role.keywords)
+        # Ranking against every role also depends on the other files.
+        keyword_version = f"{role.version}.{get_registry().version}.{weights.version}{lemma_suffix}"
+        role_name = role.job
+        role_key = role.name
         st.sidebar.info(f"Using {len(job_keywords)} keywords from `{chosen_file}`")
     else:
         st.sidebar.warning("⚠️ No keyword files found")
 
 # ------------------ Newsletter Signup ------------------
-st.sidebar.markdown("### 📧 Join our Tene Africa Newsletter")
-email = st.sidebar.text_input("Enter your email:")
-phone = st.sidebar.text_input("Enter your phone number (optional):")
-
-if st.sidebar.button("Sign Up"):
-    if email and "@" in email:
-        save_subscriber(email, phone)
-        st.sidebar.success("✅ Thank you! You've been added to our list.")
-    else:
-        st.sidebar.error("❌ Please enter a valid email address.")
+# A fragment, so typing here reruns only this form and not the analysis.
+@st.fragment
+def newsletter_signup():
+    st.markdown("### 📧 Join our Tene Africa Newsletter")
+    email = st.text_input("Enter your email:")
+    phone = st.text_input("Enter your phone number (optional):")
+
+    if st.button("Sign Up"):
+        if email and "@" in email:
+            save_subscriber(email, phone)
+            st.success("✅ Thank you! You've been added to our list.")
+        else:
+            st.error("❌ Please enter a valid email address.")
+
+with st.sidebar:
+    newsletter_signup()
 
 # ------------------ Admin Dashboard ------------------
 st.sidebar.markdown("---")
 admin_key = st.sidebar.text_input("Admin Access Key")
+is_admin = bool(admin_key) and admin_key == st.secrets["Admin"]
 
-if admin_key == Admin:
+if is_admin:
+    import pandas as pd
     st.header("📊 Admin Analytics Dashboard")
 
+    cache_stats = get_analysis_cache().stats()
+    st.write(f"Analysis cache: {cache_stats['entries']} entries, hit rate {cache_stats['hit_rate']:.0%} "
+             f"({cache_stats['hits']} hits / {cache_stats['misses']} misses)")
+    idf_stats = get_idf_stats()
+    st.write(f"Keyword weights: IDF over {len(idf_stats)} analyzed CVs and {len(get_registry().roles())} role files")
+    writer_stats = get_analytics_writer().metrics()
+    st.write(f"Analytics write queue: {writer_stats['queue_depth']} pending, {writer_stats['spooled']} spooled, "
+             f"{writer_stats['sent']} sent, {writer_stats['dead_letters']} dead-lettered")
+    if writer_stats["last_error"]:
+        st.caption(f"Last write error: {writer_stats['last_error']}")
+
     # CV Analytics
-    response = supabase.table("analytics").select("*").execute()
-    if response.data:
-        df = pd.DataFrame(response.data)
-        st.write("Total CVs uploaded:", len(df))
-        st.bar_chart(df['ats_score'])
-        matched_total = sum(df['matched_keywords'].apply(lambda x: len(x.split(","))))
-        missing_total = sum(df['missing_keywords'].apply(lambda x: len(x.split(","))))
-        st.write(f"Total matched keywords: {matched_total}")
-        st.write(f"Total missing keywords: {missing_total}")
+    rollups = get_analytics_rollups()
+    windows = {"Last 7 days": 7, "Last 30 days": 30, "Last 90 days": 90, "All time": None}
+    window = st.selectbox("Time window", list(windows), index=1)
+    summary = rollups.summary(days=windows[window])
+    if summary["total"]:
+        st.write("Total CVs uploaded:", summary["total"])
+        st.bar_chart(pd.DataFrame({"CVs": summary["score_histogram"]}))
+        st.write(f"Total matched keywords: {summary['matched_total']}")
+        st.write(f"Total missing keywords: {summary['missing_total']}")
+        if summary["role_counts"]:
+            st.subheader("CVs per role")
+            st.bar_chart(pd.DataFrame({"CVs": summary["role_counts"]}))
+        if summary["top_missing"]:
+            st.subheader("Top missing keywords")
+            st.dataframe(pd.DataFrame(summary["top_missing"], columns=["Keyword", "Count"]))
+        if not rollups.server_side:
+            st.caption("Rollup functions not installed; run sql/analytics_rollups.sql to aggregate server-side.")
+        if st.checkbox("Show raw analytics rows"):
+            page = st.number_input("Page", min_value=0, value=0, step=1)
+            st.dataframe(pd.DataFrame(rollups.page("analytics", int(page))))
     else:
         st.info("No analytics data available.")
 
+    # Pipeline timings, for this server process
+    with st.expander("⏱ Pipeline timings"):
+        metrics = get_metrics()
+        stages = metrics.stages()
+        if stages:
+            st.dataframe(pd.DataFrame([
+                dict(stage=stage + "".join(f" [{v}]" for v in labels.values()), **summary)
+                for stage, labels, summary in stages
+            ]))
+            st.dataframe(pd.DataFrame([
+                {"counter": name + "".join(f" [{v}]" for v in labels.values()), "value": value}
+                for name, labels, value in metrics.counters()
+            ]))
+        else:
+            st.info("No requests timed yet.")
+        st.checkbox("Profile my next analyses (cProfile + tracemalloc)", key="profile_requests")
+        col1, col2 = st.columns(2)
+        col1.download_button("Prometheus metrics", metrics.to_prometheus(), file_name="metrics.prom")
+        col2.download_button("JSON metrics", metrics.to_json(), file_name="metrics.json")
+
+    # Recruiter search over every analyzed CV
+    st.subheader("🔎 Search analyzed CVs")
+    index = get_keyword_index()
+    split = lambda value: [k.strip() for k in value.split(",") if k.strip()]
+    all_of = st.text_input("Mentions all of (comma-separated)", placeholder="Kubernetes, Terraform")
+    none_of = st.text_input("Does not mention", placeholder="Python")
+    min_score = st.slider("Minimum ATS score", 0, 100, 0)
+    if all_of or none_of:
+        total, docs = index.query(top_k=50, min_score=min_score, all_of=split(all_of), none_of=split(none_of))
+        st.write(f"{total} matching CVs (top {len(docs)} by ATS score)")
+        if docs:
+            st.dataframe(pd.DataFrame(docs).drop(columns=["id", "ref"]))
+    st.caption(f"{len(index)} CVs indexed.")
+    if st.button("Rebuild index from analytics table"):
+        with st.spinner("Rebuilding CV index..."):
+            get_analytics_writer().flush()
+            indexed = index.rebuild(rollups.iter_rows(columns="id," + rollups.analytics_columns()))
+        st.success(f"Indexed {indexed} CVs.")
+
+    # Near-duplicate uploads: the same CV under other names or lightly edited
+    st.subheader("🧬 Duplicate CVs")
+    duplicates = get_duplicate_index()
+    clusters = duplicates.clusters(min_size=2, limit=50)
+    if clusters:
+        st.write(f"{len(clusters)} CVs uploaded more than once (largest first)")
+        st.dataframe(pd.DataFrame([
+            {"cluster": cluster, "uploads": size, "first uploaded as": members[0][0],
+             "other names": ", ".join(sorted({name for name, _, _ in members[1:]} - {members[0][0]}))}
+            for cluster, size, members in clusters
+        ]))
+        chosen_cluster = st.selectbox("Show uploads of cluster", [cluster for cluster, _, _ in clusters])
+        members = next(m for cluster, _, m in clusters if cluster == chosen_cluster)
+        st.dataframe(pd.DataFrame(members, columns=["CV", "Similarity", "Uploaded"]))
+    else:
+        st.info("No duplicate uploads found.")
+    st.caption(f"{len(duplicates)} uploads fingerprinted.")
+
     # Subscribers
     st.subheader("📧 Newsletter Subscribers")
-    sub_resp = supabase.table("subscribers").select("*").execute()
-    if sub_resp.data:
-        subs_df = pd.DataFrame(sub_resp.data)
+    sub_page = st.number_input("Subscribers page", min_value=0, value=0, step=1)
+    subscribers = rollups.page("subscribers", int(sub_page))
+    if subscribers:
+        subs_df = pd.DataFrame(subscribers)
         st.dataframe(subs_df[["email", "phone", "timestamp"]])
     else:
         st.info("No subscribers yet.")
 
+# ------------------ Rewrite & Report ------------------
+@st.fragment
+def rewrite_panel(result, job_keywords, cv_name, weights=None):
+    st.subheader("✍️ Professional Rewritten CV")
+    derived = st.session_state.derived
+    if "rewritten_cv" not in derived:
+        if not st.button("✍️ Generate rewritten CV & PDF report"):
+            st.caption("The rewrite and the full PDF report are generated on request.")
+            return
+        with st.spinner("Rewriting your CV..."):
+            derived["rewritten_cv"] = professional_rewrite_cv(result["text"], job_keywords,
+                                                              section_spans=result.get("section_spans"))
+    rewritten_cv = derived["rewritten_cv"]
+    edited_cv = st.text_area("Rewritten CV:", rewritten_cv, height=400)
+
+    # Edits are re-scored incrementally: only the sections that changed are rescanned.
+    state = st.session_state.get("rewrite_analyzer")
+    if state is None or state[0] != st.session_state.upload_key:
+        state = st.session_state.rewrite_analyzer = (st.session_state.upload_key, IncrementalAnalyzer(job_keywords, weights))
+    analyzer = state[1]
+    edited = analyzer.update(edited_cv)
+    col1, col2 = st.columns(2)
+    col1.metric("ATS score of this version", f"{edited['ats_score']}%",
+                delta=edited["ats_score"] - result["analysis"]["ats_score"])
+    col2.metric("Matched keywords", f"{edited.matched_count}/{len(job_keywords)}")
+    if edited["missing_keywords"]:
+        with st.expander("Still missing in this version"):
+            for suggestion in analyzer.suggestions():
+                st.write(f"- {suggestion}")
+
+    from pdf_report import render_report, report_filename
+    st.download_button("📥 Download Rewritten CV", edited_cv, file_name=f"{cv_name}_rewritten.txt")
+    if edited_cv != rewritten_cv:
+        pdf_bytes = render_report(edited, job_keywords, edited_cv)
+    else:
+        if "pdf_report" not in derived:
+            with st.spinner("Preparing PDF report..."):
+                derived["pdf_report"] = render_report(result["analysis"], job_keywords, rewritten_cv)
+        pdf_bytes = derived["pdf_report"]
+    st.download_button("📥 Download Full PDF Report", pdf_bytes, file_name=report_filename(cv_name),
+                       mime="application/pdf")
+
 # ------------------ Main Dashboard ------------------
 st.title("📊 ATS CV Analyzer & Professional Rewriter Dashboard")
 with st.expander("ℹ️ About this App"):
@@ -455,7 +459,8 @@ with st.expander("ℹ️ About this App"):
 
     **What it does:**
     - ✅ Extracts text from CVs (PDF/DOCX)  
-    - 📊 Calculates an ATS score based on keyword matches  
+    - 📝 Takes a pasted or uploaded job description and extracts the keywords it asks for  
+    - 📊 Calculates an ATS score based on keyword matches, rarer keywords counting more  
     - 🔍 Highlights missing and matched keywords  
     - ✍️ Suggests improvements and rewrites sections professionally  
     - 📈 Provides detailed analytics and visualizations  
@@ -473,22 +478,111 @@ with st.expander("ℹ️ About this App"):
 
 render_footer()
 if uploaded_file:
-    text = extract_text(uploaded_file)
-    analysis = analyze_cv(text, job_keywords=job_keywords)
-
-    # Only log once per uploaded file
+    def run_remote_analysis(api_url):
+        from near_duplicates import text_digest, text_signature
+        from scoring_service import score_remote
+        record = score_remote(api_url, uploaded_file.getvalue(), uploaded_file.name,
+                              role=role.name if role else None, top_roles=5)
+        # Keywords are matched again here: the service does not know a job
+        # description's keywords, and the IDF counts need every role's.
+        scan = get_registry().union_matcher().scan(record["text"])
+        analysis = build_result(job_keywords, record["sections"], scan.contains,
+                                [tuple(pair) for pair in record["common_words"]], weights)
+        return {"text": record["text"], "analysis": analysis,
+                "role_ranking": [tuple(pair) for pair in record["top_roles"]], "found_keys": list(scan.found),
+                "signature": text_signature(record["text"]), "text_digest": text_digest(record["text"])}
+
+    def run_analysis():
+        # Scoring can be handed to a scoring_service.py instance instead.
+        api_url = st.secrets.get("SCORING_API_URL")
+        if api_url:
+            return run_remote_analysis(api_url)
+        from near_duplicates import minhash, text_digest
+        # One scan with every role's keywords serves both the chosen role
+        # and the ranking across all roles.
+        stream = get_registry().union_matcher().stream()
+        for page_text in iter_text(uploaded_file):
+            stream.feed(page_text)
+        scan = stream.finish()
+        text = scan.text
+        # A file whose extracted text was analyzed before (renamed, re-exported)
+        # reuses that result. Near-duplicates only skip logging: a small edit
+        # can change the score.
+        with get_metrics().timer("minhash"):
+            signature = minhash(scan.words)
+        digest = text_digest(text)
+        prior = get_analysis_cache().get(AnalysisCache.make_key(None, keyword_version, digest=digest))
+        if prior is not None:
+            get_metrics().inc("duplicate_results_reused")
+            return prior
+        lemmas = None
+        if lemma_mode():
+            with get_metrics().timer("lemma_match"):
+                lemmas = get_lemma_matcher(get_nlp(), job_keywords).match(text)
+        analysis = analyze_cv(text, job_keywords=job_keywords, scan=scan, lemmas=lemmas, weights=weights)
+        with get_metrics().timer("role_ranking"):
+            role_ranking = get_role_scorer().rank(scan=scan, top_k=5, weights=weights)
+        result = {"text": text, "analysis": analysis, "role_ranking": role_ranking,
+                  "section_spans": scan.section_spans, "found_keys": list(scan.found),
+                  "signature": signature, "text_digest": digest}
+        get_analysis_cache().put(AnalysisCache.make_key(None, keyword_version, digest=digest), result)
+        return result
+
+    # The cached analysis is shared by every session and never modified;
+    # suggestions, the rewrite and the PDF are kept per session in `derived`.
+    upload_key = (uploaded_file.file_id, keyword_version)
+    if st.session_state.get("upload_key") != upload_key:
+        cache_key = AnalysisCache.make_key(uploaded_file.getvalue(), keyword_version)
+        # Profiling slows every session (tracemalloc is process-wide) and shows
+        # internals, so only a signed-in admin can turn it on for their own uploads.
+        profile_on = is_admin and st.session_state.get("profile_requests", False)
+        try:
+            with profiled(profile_on, memory=True) as profile, get_metrics().timer("upload"):
+                st.session_state.outputs = get_analysis_cache().get_or_compute(cache_key, run_analysis)
+        except ExtractionLimitError as e:
+            st.error(f"❌ Unable to process this CV: {e}")
+            st.stop()
+        except OSError as e:
+            # Also scoring_service.ScoringServiceError, an OSError.
+            st.error(f"❌ The scoring service is unavailable: {e}")
+            st.stop()
+        st.session_state.upload_key = upload_key
+        st.session_state.derived = {}
+        st.session_state.last_profile = profile if profile_on else None
+    result = st.session_state.outputs
+    text = result["text"]
+    analysis = result["analysis"]
+
+    # Only log once per uploaded file and role, and not at all for a near-duplicate
+    # of a CV analyzed before for this role (same CV under another name, or lightly edited).
     if "logged_files" not in st.session_state:
         st.session_state.logged_files = set()
 
-    if cv_name not in st.session_state.logged_files:
-        log_cv_analysis(cv_name, analysis['ats_score'], analysis['matched_keywords'], analysis['missing_keywords'])
-        st.session_state.logged_files.add(cv_name)
+    if (cv_name, role_key) not in st.session_state.logged_files:
+        _, duplicate = get_duplicate_index().add(cv_name, result["signature"], result["text_digest"], role=role_key)
+        if duplicate is None:
+            log_cv_analysis(cv_name, analysis['ats_score'], analysis['matched_keywords'],
+                            analysis['missing_keywords'], role=role_name)
+            count_keyword_usage(result["found_keys"])
+        st.session_state.logged_files.add((cv_name, role_key))
 
     try:
         display_score(analysis['ats_score'])
     except Exception as e:
         st.error(f"Unable to render ATS score chart: {e}")
 
+    if is_admin and st.session_state.get("last_profile"):
+        profile = st.session_state.last_profile
+        with st.expander(f"🧪 Profile of this analysis ({profile.elapsed * 1000:.0f} ms)"):
+            st.code(profile.stats)
+            if profile.allocations:
+                st.caption(f"Peak traced memory: {profile.peak_bytes / 1024 / 1024:.1f} MB")
+                st.code("\n".join(profile.allocations))
+
+    with st.expander("🎯 Best-fit roles for this CV"):
+        for role_file, role_score in result["role_ranking"]:
+            st.markdown(f"**{os.path.splitext(role_file)[0].replace('_', ' ').title()}** — ATS score {role_score}%")
+
     tab1, tab2, tab3, tab4, tab5 = st.tabs([
         "✅ Strengths", "⚠️ Weaknesses", "🔑 Keywords", "📋 Common Words", "✍️ Professional Rewritten CV"
     ])
@@ -513,7 +607,12 @@ if uploaded_file:
             else:
                 st.success("No missing keywords")
         with inner_tab3:
-            suggestions = suggest_keyword_usage(analysis["missing_keywords"], text)
+            derived = st.session_state.derived
+            if "suggestions" not in derived:
+                # The upload's scan already knows what is missing: no rescan.
+                derived["suggestions"] = suggest_keyword_usage(analysis["missing_keywords"], text,
+                                                               scan=FoundKeys(result["found_keys"]))
+            suggestions = derived["suggestions"]
             if suggestions:
                 for sug in suggestions:
                     st.markdown(f"<div style='background-color:#fff3cd; padding:8px 12px; border-radius:10px; margin-bottom:6px;'>{sug}</div>", unsafe_allow_html=True)
@@ -526,18 +625,13 @@ if uploaded_file:
     with tab4:
         st.subheader("📋 Top 20 Frequent Words")
         if analysis["common_words"]:
+            import pandas as pd
             common_df = pd.DataFrame(analysis["common_words"], columns=["Word", "Count"])
             st.dataframe(common_df)
         else:
             st.info("No words extracted")
     with tab5:
-        st.subheader("✍️ Professional Rewritten CV")
-        rewritten_cv = professional_rewrite_cv(text, job_keywords)
-        st.text_area("Rewritten CV:", rewritten_cv, height=400)
-        st.download_button("📥 Download Rewritten CV", rewritten_cv, file_name=f"{cv_name}_rewritten.txt")
-        pdf_report = generate_pdf(analysis, cv_name, job_keywords, rewritten_cv)
-        with open(pdf_report, "rb") as f:
-            st.download_button("📥 Download Full PDF Report", f, file_name=os.path.basename(pdf_report))
+        rewrite_panel(result, job_keywords, cv_name, weights)
 else:
     st.info("Please upload a CV to begin analysis.")
     
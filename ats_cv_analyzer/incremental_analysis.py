@@ -0,0 +1,159 @@
+from collections import Counter
+
+from cv_analysis import TOP_WORDS, build_result, suggest_keyword_usage
+from keyword_matcher import SYMBOL_TOKENS, TOKEN_RE, case_view, get_matcher, normalize_keyword
+from metrics import get_metrics
+from section_segmenter import HEADER_RE, HEADER_SECTION, SECTION_HEADERS
+
+
+def _common_prefix(a, b):
+    # Binary search on slice equality, which compares in C.
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix(a, b, prefix):
+    lo, hi = 0, min(len(a), len(b)) - prefix
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid:] == b[len(b) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+class _Block:
+    __slots__ = ("tokens", "cased", "word_counts", "keys")
+
+    def __init__(self, lower, cased, matcher):
+        spans = [m.span() for m in TOKEN_RE.finditer(lower)]
+        self.tokens = [lower[s:e] for s, e in spans]
+        # As written, for exact-case aliases
+        self.cased = [cased[s:e] for s, e in spans]
+        self.word_counts = Counter(t for t in self.tokens if t not in SYMBOL_TOKENS)
+        self.keys = {key for key, _, _ in matcher.match_tokens(self.tokens, self.cased)}
+
+
+# ------------------ Incremental Analysis ------------------
+class IncrementalAnalyzer:
+    """Re-scores a CV that is being edited, e.g. the rewritten CV text area.
+
+    The text is cut into blocks at the lines holding section headers. Each
+    block keeps its tokens, word counts and keyword hits, keyed by its
+    text, so an update only re-tokenizes the blocks that changed. Keywords
+    spanning a block boundary are found from the few tokens around it.
+    Results are the same as analyze_cv on the full text.
+    """
+
+    def __init__(self, job_keywords, weights=None):
+        self.job_keywords = list(job_keywords or [])
+        self.weights = weights
+        self.matcher = get_matcher(self.job_keywords)
+        self._blocks = {}
+        self._keys = set()
+        self._lower = ""
+        # (section, header start, start of its line) for every header hit
+        self._hits = []
+        self.text = None
+        self.result = None
+        self.rescanned = 0
+
+    def update(self, text):
+        if text == self.text:
+            return self.result
+        with get_metrics().timer("incremental_update"):
+            return self._update(text)
+
+    def _update(self, text):
+        lower = text.lower()
+        cased = case_view(text, lower)
+        hits = self._update_hits(lower)
+        sections = {sec for sec, _, _ in hits}
+        starts = [0]
+        for _, _, line_start in hits:
+            if line_start > starts[-1]:
+                starts.append(line_start)
+        starts.append(len(lower))
+
+        blocks, cache = [], {}
+        for start, end in zip(starts, starts[1:]):
+            chunk = (lower[start:end], cased[start:end])
+            block = cache.get(chunk) or self._blocks.get(chunk)
+            if block is None:
+                block = _Block(*chunk, self.matcher)
+                self.rescanned += 1
+            cache[chunk] = block
+            blocks.append(block)
+        self._blocks = cache
+
+        keys = set()
+        word_counts = Counter()
+        for block in blocks:
+            keys |= block.keys
+            word_counts.update(block.word_counts)
+        keys |= self._boundary_keys(blocks)
+        self._keys = keys
+
+        self.text = text
+        self._lower = lower
+        self._hits = hits
+        self.result = build_result(self.job_keywords, {sec: sec in sections for sec in SECTION_HEADERS},
+                                   self.contains, word_counts.most_common(TOP_WORDS), self.weights)
+        return self.result
+
+    def _update_hits(self, lower):
+        # Header matches never cross a line, so only the lines touched by the
+        # edit are searched again; hits after them are shifted.
+        old = self._lower
+        prefix = _common_prefix(old, lower)
+        suffix = _common_suffix(old, lower, prefix)
+        delta = len(lower) - len(old)
+        edit_end = max(len(lower) - suffix - 1, prefix)
+        region_start = lower.rfind("\n", 0, prefix) + 1
+        region_end = lower.find("\n", edit_end) + 1 or len(lower)
+        hits = [hit for hit in self._hits if hit[1] < region_start]
+        for m in HEADER_RE.finditer(lower, region_start, region_end):
+            hits.append((HEADER_SECTION[m.group(1)], m.start(), lower.rfind("\n", 0, m.start()) + 1))
+        # A newline typed earlier on the line of a later hit moves its line start.
+        hits.extend((sec, start + delta, max(line_start + delta, region_end)) for sec, start, line_start in self._hits
+                    if start >= region_end - delta)
+        return hits
+
+    def _boundary_keys(self, blocks):
+        # A keyword of n tokens can only cross a boundary within n - 1 tokens of it.
+        reach = self.matcher.max_tokens - 1
+        keys = set()
+        if reach <= 0:
+            return keys
+        for i in range(1, len(blocks)):
+            before, cased_before = [], []
+            for block in reversed(blocks[:i]):
+                take = reach - len(before)
+                before = block.tokens[-take:] + before
+                cased_before = block.cased[-take:] + cased_before
+                if len(before) >= reach:
+                    break
+            after, cased_after = [], []
+            for block in blocks[i:]:
+                take = reach - len(after)
+                after += block.tokens[:take]
+                cased_after += block.cased[:take]
+                if len(after) >= reach:
+                    break
+            cut = len(before)
+            keys.update(key for key, first, end in self.matcher.match_tokens(before + after, cased_before + cased_after)
+                        if first < cut < end)
+        return keys
+
+    def contains(self, keyword):
+        return normalize_keyword(keyword) in self._keys
+
+    def suggestions(self):
+        return suggest_keyword_usage(self.result["missing_keywords"], self.text, scan=self)
@@ -0,0 +1,84 @@
+# Other ways CVs write the keywords of create_job_skills.py: abbreviations,
+# short names and tools that imply the skill. Keys are keywords as written
+# in the job_keywords files; a match on any form below counts as (and is
+# reported as) that keyword. A form may belong to one keyword only.
+#
+# Short acronyms ("PM", "ML", "UI") and the everyday words in EXACT_CASE
+# would otherwise match "5 pm", "10 ml" or "a torch" in a CV for any role,
+# so they only count when written exactly as below.
+#
+# Run this file to check the table against job_keywords/.
+
+ALIASES = {
+    # Software and data
+    "Kubernetes": ["k8s", "GKE", "EKS", "AKS"],
+    "JavaScript": ["JS", "ECMAScript", "ES6"],
+    "Node.js": ["NodeJS", "Node JS"],
+    "SQL": ["PostgreSQL", "Postgres", "MySQL", "SQLite", "MSSQL"],
+    "MongoDB": ["Mongo"],
+    "Google Cloud": ["GCP"],
+    "AWS": ["Amazon Web Services"],
+    "REST API": ["RESTful API", "RESTful APIs", "REST APIs"],
+    "CI/CD": ["CICD", "Continuous Integration", "Continuous Delivery", "Continuous Deployment"],
+    "Microservices": ["Microservice", "Micro services"],
+    "DevOps": ["Dev Ops"],
+    "Infrastructure as Code": ["IaC"],
+    "Machine Learning": ["ML"],
+    "Natural Language Processing": ["NLP"],
+    "Scikit-learn": ["sklearn"],
+    "PyTorch": ["Torch"],
+    "Power BI": ["PowerBI"],
+    "ETL": ["Extract Transform Load"],
+    "Big Data": ["Bigdata"],
+    # Security
+    "Cybersecurity": ["Cyber Security", "InfoSec", "Information Security"],
+    "Penetration Testing": ["Pentesting", "Pen Testing", "Pentest"],
+    "IDS": ["Intrusion Detection"],
+    "IPS": ["Intrusion Prevention"],
+    # Management and business
+    "Project Management": ["PM", "PMO"],
+    "Go-to-Market": ["GTM"],
+    "ERP Systems": ["ERP"],
+    "Supply Chain": ["SCM"],
+    "Six Sigma": ["6 Sigma"],
+    "Business Development": ["BizDev"],
+    "PowerPoint": ["Power Point"],
+    "HRIS": ["Human Resources Information System"],
+    # Marketing
+    "SEO": ["Search Engine Optimization", "Search Engine Optimisation"],
+    "SEM": ["Search Engine Marketing"],
+    "PPC": ["Pay Per Click"],
+    "CRM": ["Customer Relationship Management"],
+    "Google Analytics": ["GA4"],
+    "A/B Testing": ["Split Testing"],
+    # Design
+    "UX Design": ["UX", "User Experience Design"],
+    "UI Design": ["UI", "User Interface Design"],
+    "Adobe Photoshop": ["Photoshop"],
+    "Adobe Illustrator": ["Illustrator"],
+    "Adobe InDesign": ["InDesign"],
+    # Engineering and healthcare
+    "IoT": ["Internet of Things"],
+    "Medical Records": ["EHR", "EMR", "Electronic Health Records"],
+    "IV Therapy": ["Intravenous Therapy"],
+}
+
+EXACT_CASE_MAX_LETTERS = 3
+EXACT_CASE = {"Torch"}
+
+
+def is_exact_case(form):
+    return form in EXACT_CASE or (form.isalpha() and len(form) <= EXACT_CASE_MAX_LETTERS)
+
+
+if __name__ == "__main__":
+    from keyword_matcher import compile_aliases, normalize_keyword
+    from keyword_registry import get_registry
+
+    compile_aliases(ALIASES)
+    known = {normalize_keyword(kw) for role in get_registry().roles() for kw in role.keywords}
+    unknown = [kw for kw in ALIASES if normalize_keyword(kw) not in known]
+    print(f"{sum(len(forms) for forms in ALIASES.values())} aliases for {len(ALIASES)} keywords")
+    print("Exact case only:", ", ".join(f for forms in ALIASES.values() for f in forms if is_exact_case(f)))
+    if unknown:
+        print("Not in any job_keywords file:", ", ".join(unknown))
@@ -0,0 +1,267 @@
+import sqlite3
+import threading
+import zlib
+from array import array
+
+import numpy as np
+
+from keyword_matcher import normalize_keyword
+from metrics import get_metrics
+
+# Below this many new ids a posting is updated bit by bit, above it in one numpy pass.
+SMALL_MERGE = 64
+
+
+def _split_keywords(value):
+    if isinstance(value, str):
+        value = value.split(",")
+    return [k.strip() for k in value or [] if k and k.strip()]
+
+
+def _ids_bitmap(ids):
+    if len(ids) < SMALL_MERGE:
+        bits = 0
+        for i in ids:
+            bits |= 1 << i
+        return bits
+    ids = np.frombuffer(ids, dtype=np.uint32)
+    flags = np.zeros(int(ids.max()) + 1, dtype=np.uint8)
+    flags[ids] = 1
+    return int.from_bytes(np.packbits(flags, bitorder="little").tobytes(), "little")
+
+
+def _bitmap_ids(bits):
+    if not bits:
+        return np.empty(0, dtype=np.int64)
+    raw = np.frombuffer(bits.to_bytes((bits.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+    # Only unpack the non-zero bytes; result sets are usually sparse.
+    nonzero = np.flatnonzero(raw)
+    flags = np.unpackbits(raw[nonzero], bitorder="little").reshape(-1, 8)
+    return (nonzero[:, None] * 8 + np.arange(8))[flags.astype(bool)]
+
+
+def _pack(bits):
+    return zlib.compress(bits.to_bytes((bits.bit_length() + 7) // 8, "little"))
+
+
+def _unpack(blob):
+    return int.from_bytes(zlib.decompress(blob), "little")
+
+
+# ------------------ Inverted Index ------------------
+class KeywordIndex:
+    """Keyword -> CV posting lists over every analyzed CV.
+
+    Each (field, keyword) posting list is a bitmap over document ids held
+    as a Python int, so AND / OR / NOT across a million CVs are a handful
+    of word-wise operations. Documents are appended to SQLite as they are
+    indexed; posting lists are checkpointed zlib-compressed, and opening
+    the index only replays documents added after the last checkpoint.
+    """
+
+    def __init__(self, path="cv_index.db", checkpoint_every=1000):
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            " id INTEGER PRIMARY KEY, ref TEXT UNIQUE, cv_name TEXT, role TEXT, ats_score INTEGER,"
+            " timestamp TEXT, matched TEXT, missing TEXT);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " field TEXT NOT NULL, keyword TEXT NOT NULL, name TEXT, bitmap BLOB NOT NULL,"
+            " PRIMARY KEY (field, keyword));"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+        )
+        self._conn.commit()
+        self._load()
+
+    def _reset_memory(self):
+        self._postings = {}
+        self._names = {}
+        self._pending = {}
+        self._dirty = set()
+        self._scores = array("h", [0])
+        self._max_id = 0
+        self._checkpoint_id = 0
+
+    def _load(self):
+        self._reset_memory()
+        meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+        if "checkpoint_id" in meta:
+            self._checkpoint_id = self._max_id = int(meta["checkpoint_id"])
+            self._scores = array("h")
+            self._scores.frombytes(zlib.decompress(meta["scores"]))
+        for field, keyword, name, blob in self._conn.execute("SELECT field, keyword, name, bitmap FROM postings"):
+            self._postings[(field, keyword)] = _unpack(blob)
+            self._names.setdefault(keyword, name)
+        replay = self._conn.execute(
+            "SELECT id, role, ats_score, matched, missing FROM docs WHERE id > ? ORDER BY id", (self._checkpoint_id,)
+        )
+        for doc_id, role, score, matched, missing in replay:
+            self._set_score(doc_id, score)
+            self._post(doc_id, role, _split_keywords(matched), _split_keywords(missing))
+
+    def _set_score(self, doc_id, score):
+        if doc_id >= len(self._scores):
+            self._scores.extend([0] * (doc_id + 1 - len(self._scores)))
+        self._scores[doc_id] = int(score or 0)
+        self._max_id = max(self._max_id, doc_id)
+
+    def _post(self, doc_id, role, matched, missing):
+        terms = [("matched", kw) for kw in matched] + [("missing", kw) for kw in missing]
+        for field, kw in terms:
+            key = normalize_keyword(kw)
+            self._names.setdefault(key, kw)
+            self._pending.setdefault((field, key), array("I")).append(doc_id)
+        if role:
+            self._pending.setdefault(("role", role), array("I")).append(doc_id)
+
+    def _merge(self):
+        for key, ids in self._pending.items():
+            self._postings[key] = self._postings.get(key, 0) | _ids_bitmap(ids)
+            self._dirty.add(key)
+        self._pending.clear()
+
+    # ------------------ Indexing ------------------
+    def add(self, row):
+        return self.add_many([row])[0]
+
+    def add_many(self, rows, checkpoint=True):
+        """Index analytics-shaped rows (cv_name, role, ats_score, matched_keywords,
+        missing_keywords, timestamp). A row whose `ref` is already indexed is
+        skipped. Returns the new document ids (None for skipped rows)."""
+        ids = []
+        with self._lock:
+            for row in rows:
+                matched = _split_keywords(row.get("matched_keywords"))
+                missing = _split_keywords(row.get("missing_keywords"))
+                cur = self._conn.execute(
+                    "INSERT OR IGNORE INTO docs (ref, cv_name, role, ats_score, timestamp, matched, missing)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (row.get("ref"), row.get("cv_name"), row.get("role"), row.get("ats_score"),
+                     row.get("timestamp"), ",".join(matched), ",".join(missing)),
+                )
+                if not cur.rowcount:
+                    ids.append(None)
+                    continue
+                doc_id = cur.lastrowid
+                self._set_score(doc_id, row.get("ats_score"))
+                self._post(doc_id, row.get("role"), matched, missing)
+                ids.append(doc_id)
+            self._conn.commit()
+            if checkpoint and self._max_id - self._checkpoint_id >= self.checkpoint_every:
+                self.checkpoint()
+        return ids
+
+    def checkpoint(self):
+        with self._lock:
+            self._merge()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO postings (field, keyword, name, bitmap) VALUES (?, ?, ?, ?)",
+                [(field, kw, self._names.get(kw, kw), _pack(self._postings[(field, kw)]))
+                 for field, kw in self._dirty],
+            )
+            self._conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                   [("checkpoint_id", str(self._max_id)),
+                                    ("scores", zlib.compress(self._scores.tobytes()))])
+            self._conn.commit()
+            self._dirty.clear()
+            self._checkpoint_id = self._max_id
+
+    def rebuild(self, rows, batch_size=10000):
+        """Drop the index and re-index `rows`, e.g. AnalyticsRollups.iter_rows()."""
+        with self._lock:
+            self._conn.executescript("DELETE FROM docs; DELETE FROM postings; DELETE FROM meta;")
+            self._reset_memory()
+            batch = []
+            for row in rows:
+                if row.get("id") is not None:
+                    row = dict(row, ref=f"analytics:{row['id']}")
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    self.add_many(batch, checkpoint=False)
+                    batch = []
+            self.add_many(batch, checkpoint=False)
+            self.checkpoint()
+            return len(self)
+
+    # ------------------ Queries ------------------
+    def _posting(self, field, keyword):
+        key = keyword if field == "role" else normalize_keyword(keyword)
+        return self._postings.get((field, key), 0)
+
+    @get_metrics().timed("index_search")
+    def search(self, all_of=(), any_of=(), none_of=(), missing=(), role=None):
+        """Bitmap of CVs matching every `all_of` keyword, at least one `any_of`
+        keyword, none of `none_of`, and listing every `missing` keyword as
+        missing for their role."""
+        with self._lock:
+            if self._pending:
+                self._merge()
+            bits = (1 << (self._max_id + 1)) - 2
+            for kw in all_of:
+                bits &= self._posting("matched", kw)
+            for kw in missing:
+                bits &= self._posting("missing", kw)
+            if any_of:
+                either = 0
+                for kw in any_of:
+                    either |= self._posting("matched", kw)
+                bits &= either
+            for kw in none_of:
+                bits &= ~self._posting("matched", kw)
+            if role:
+                bits &= self._posting("role", role)
+            return bits
+
+    def count(self, **terms):
+        return self.search(**terms).bit_count()
+
+    def query(self, top_k=20, min_score=None, **terms):
+        """Top-k matching CVs by ATS score. Returns (total matches, docs)."""
+        bits = self.search(**terms)
+        ids = _bitmap_ids(bits)
+        with self._lock:
+            scores = np.frombuffer(self._scores, dtype=np.int16)[ids]
+        if min_score is not None:
+            keep = scores >= min_score
+            ids, scores = ids[keep], scores[keep]
+        total = len(ids)
+        if top_k is not None and total > top_k:
+            part = np.argpartition(-scores, top_k - 1)[:top_k]
+            ids, scores = ids[part], scores[part]
+        order = np.lexsort((ids, -scores))
+        return total, self.documents(ids[order].tolist())
+
+    def documents(self, ids):
+        if not ids:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, ref, cv_name, role, ats_score, timestamp, matched, missing FROM docs"
+                f" WHERE id IN ({','.join('?' * len(ids))})", ids
+            ).fetchall()
+        by_id = {r[0]: r for r in rows}
+        fields = ("id", "ref", "cv_name", "role", "ats_score", "timestamp", "matched_keywords", "missing_keywords")
+        return [dict(zip(fields, by_id[i])) for i in ids if i in by_id]
+
+    def keyword_counts(self, field="matched", top_n=None):
+        with self._lock:
+            if self._pending:
+                self._merge()
+            counts = [(self._names.get(kw, kw), bits.bit_count())
+                      for (f, kw), bits in self._postings.items() if f == field]
+        counts.sort(key=lambda kv: (-kv[1], kv[0]))
+        return counts[:top_n] if top_n else counts
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.checkpoint()
+            self._conn.close()
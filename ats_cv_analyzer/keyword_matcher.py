@@ -0,0 +1,269 @@
+import hashlib
+import re
+from bisect import bisect_left
+from collections import deque
+from functools import lru_cache
+
+from keyword_aliases import ALIASES, is_exact_case
+from section_segmenter import SectionSegmenter
+
+# Words as analyze_cv has always counted them, plus "+" / "#" so that
+# keywords such as "C++" and "C#" keep their meaning.
+TOKEN_RE = re.compile(r"\w+|[+#]")
+SYMBOL_TOKENS = {"+", "#"}
+
+
+@lru_cache(maxsize=4096)
+def normalize_keyword(keyword):
+    return " ".join(TOKEN_RE.findall(keyword.lower()))
+
+
+# ------------------ Aliases ------------------
+def compile_aliases(table):
+    """Normalized surface form -> normalized canonical keyword."""
+    index = {}
+    for canonical, forms in table.items():
+        key = normalize_keyword(canonical)
+        for form in forms:
+            surface = normalize_keyword(form)
+            if not surface or surface == key:
+                continue
+            if index.setdefault(surface, key) != key:
+                raise ValueError(f"Alias {form!r} is given for both {index[surface]!r} and {key!r}")
+    return index
+
+
+def exact_case_forms(table):
+    """Normalized surface form -> the only spelling that counts, for exact-case aliases."""
+    exact = {}
+    for forms in table.values():
+        for form in forms:
+            if is_exact_case(form):
+                if len(TOKEN_RE.findall(form)) != 1:
+                    raise ValueError(f"Exact-case alias {form!r} must be a single word")
+                exact[normalize_keyword(form)] = form
+    return exact
+
+
+def case_view(text, lower):
+    """`text` aligned with `lower`, so a span of one is the same span of the
+    other; the rare characters whose lowercase is longer (e.g. "İ") are
+    replaced by it."""
+    if len(text) == len(lower):
+        return text
+    return "".join(c if len(c.lower()) == 1 else c.lower() for c in text)
+
+
+ALIAS_INDEX = compile_aliases(ALIASES)
+ALIAS_EXACT = exact_case_forms(ALIASES)
+# The same table the other way round, for building automata.
+ALIAS_FORMS = {}
+for _surface, _key in ALIAS_INDEX.items():
+    ALIAS_FORMS.setdefault(_key, []).append(_surface)
+ALIAS_VERSION = hashlib.sha256(repr((sorted(ALIAS_INDEX.items()), sorted(ALIAS_EXACT.items()))).encode()).hexdigest()[:16]
+
+
+# ------------------ Scan Result ------------------
+class KeywordScan:
+    def __init__(self, chunks, lower_chunks, words, matches, section_spans):
+        self._chunks = chunks
+        self._lower_chunks = lower_chunks
+        self._text = None
+        self._lower = None
+        self.words = words
+        # (section, start, end) in document order
+        self.section_spans = section_spans
+        # (normalized keyword, start, end) ordered by start position
+        self.matches = matches
+        self._starts = [m[1] for m in matches]
+        self.found = {}
+        for key, start, end in matches:
+            self.found.setdefault(key, []).append((start, end))
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = "".join(self._chunks)
+        return self._text
+
+    @property
+    def lower(self):
+        if self._lower is None:
+            self._lower = "".join(self._lower_chunks)
+        return self._lower
+
+    def contains(self, keyword):
+        return normalize_keyword(keyword) in self.found
+
+    def positions(self, keyword):
+        return self.found.get(normalize_keyword(keyword), [])
+
+    def keys_between(self, start, end):
+        keys = set()
+        for i in range(bisect_left(self._starts, start), len(self.matches)):
+            key, s, e = self.matches[i]
+            if s >= end:
+                break
+            if e <= end:
+                keys.add(key)
+        return keys
+
+
+class FoundKeys(frozenset):
+    """The keys a scan found, kept without the scan (e.g. in a cached
+    result); answers contains() like the scan did."""
+
+    def contains(self, keyword):
+        return normalize_keyword(keyword) in self
+
+
+# ------------------ Phrase Automaton ------------------
+class KeywordMatcher:
+    """Aho-Corasick automaton over word tokens.
+
+    Every single- and multi-word keyword is found, with its character
+    span, in one pass over the token stream of the text. Aliases of a
+    keyword (see keyword_aliases.py) are paths of the same automaton that
+    report the keyword itself, so they cost nothing extra per token. An
+    exact-case alias is reported only when the token was written that way.
+    """
+
+    def __init__(self, keywords, aliases=None, exact=None):
+        # aliases: normalized keyword -> normalized other spellings
+        # exact: normalized alias -> the spelling it must have in the text
+        self.keywords = list(keywords)
+        aliases = ALIAS_FORMS if aliases is None else aliases
+        exact = ALIAS_EXACT if exact is None else exact
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self.max_tokens = 0
+        for kw in self.keywords:
+            tokens = TOKEN_RE.findall(kw.lower())
+            if not tokens:
+                continue
+            key = " ".join(tokens)
+            self._add(tokens, key)
+            for alias in aliases.get(key, ()):
+                self._add(alias.split(" "), key, exact.get(alias))
+        self._build_failure_links()
+
+    def _add(self, tokens, key, exact=None):
+        self.max_tokens = max(self.max_tokens, len(tokens))
+        node = 0
+        for tok in tokens:
+            child = self._goto[node].get(tok)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+                self._goto[node][tok] = child
+            node = child
+        output = (key, len(tokens), exact)
+        if output not in self._out[node]:
+            self._out[node] = self._out[node] + (output,)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for tok, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and tok not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(tok, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def stream(self):
+        return KeywordStream(self)
+
+    def match_tokens(self, tokens, cased=None):
+        # (key, first token index, end token index) of every keyword in a token list.
+        # `cased` holds the same tokens as written; without it exact-case aliases never match.
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, tok in enumerate(tokens):
+            while node and tok not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(tok, 0)
+            for key, length, exact in out[node]:
+                if exact is None or (cased is not None and cased[i] == exact):
+                    yield key, i + 1 - length, i + 1
+
+    def scan(self, text):
+        return self.stream().feed(text).finish()
+
+
+# ------------------ Incremental Scanning ------------------
+class KeywordStream:
+    """Feeds text to a KeywordMatcher chunk by chunk (e.g. page by page).
+
+    Automaton state carries over between chunks, and a word cut at a
+    chunk boundary is held back until the next chunk completes it. Each
+    chunk also goes through the section segmenter, so keywords, words and
+    sections all come out of the same pass.
+    """
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self._node = 0
+        self._offset = 0
+        self._carry = ""
+        self._carry_cased = ""
+        self._starts = deque(maxlen=max(matcher.max_tokens, 1))
+        self._chunks = []
+        self._lower_chunks = []
+        self._segmenter = SectionSegmenter()
+        self.words = []
+        self.matches = []
+
+    def feed(self, chunk, final=False):
+        if chunk:
+            self._chunks.append(chunk)
+            lower = chunk.lower()
+            self._lower_chunks.append(lower)
+        else:
+            chunk = lower = ""
+        self._segmenter.feed(lower, final=final, headings=getattr(chunk, "headings", ()))
+        buf = self._carry + lower
+        cased = self._carry_cased + case_view(chunk, lower)
+        base = self._offset - len(self._carry)
+        tokens = list(TOKEN_RE.finditer(buf))
+        self._carry = self._carry_cased = ""
+        if not final and tokens and tokens[-1].end() == len(buf) and tokens[-1].group() not in SYMBOL_TOKENS:
+            self._carry = buf[tokens[-1].start():]
+            self._carry_cased = cased[tokens[-1].start():]
+            tokens.pop()
+        goto, fail, out = self.matcher._goto, self.matcher._fail, self.matcher._out
+        node, starts, words, matches = self._node, self._starts, self.words, self.matches
+        for m in tokens:
+            tok = m.group()
+            if tok not in SYMBOL_TOKENS:
+                words.append(tok)
+            starts.append(base + m.start())
+            while node and tok not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(tok, 0)
+            for key, length, exact in out[node]:
+                if exact is None or cased[m.start():m.end()] == exact:
+                    matches.append((key, starts[-length], base + m.end()))
+        self._node = node
+        self._offset += len(lower)
+        return self
+
+    def finish(self):
+        self.feed("", final=True)
+        self.matches.sort(key=lambda m: m[1])
+        section_spans = self._segmenter.finish()
+        return KeywordScan(self._chunks, self._lower_chunks, self.words, self.matches, section_spans)
+
+
+@lru_cache(maxsize=128)
+def _compile(keywords):
+    return KeywordMatcher(keywords)
+
+
+def get_matcher(keywords):
+    return _compile(tuple(keywords or ()))
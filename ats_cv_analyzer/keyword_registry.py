@@ -0,0 +1,141 @@
+import hashlib
+import os
+import threading
+import time
+
+from keyword_matcher import ALIAS_VERSION, TOKEN_RE, get_matcher, normalize_keyword
+
+DEFAULT_ROLE = "software_engineer.txt"
+
+
+# ------------------ Role Keywords ------------------
+class RoleKeywords:
+    __slots__ = ("name", "job", "path", "mtime", "digest", "keywords", "lowered", "tokens", "matcher")
+
+    def __init__(self, path, raw, mtime):
+        self.name = os.path.basename(path)
+        self.job = os.path.splitext(self.name)[0].lower()
+        self.path = path
+        self.mtime = mtime
+        self.digest = hashlib.sha256(raw).hexdigest()
+        text = raw.decode("utf-8")
+        self.keywords = [kw.strip() for kw in text.split(",") if kw.strip()]
+        self.lowered = [kw.lower() for kw in self.keywords]
+        self.tokens = [tuple(TOKEN_RE.findall(kw)) for kw in self.lowered]
+        self.matcher = get_matcher(self.keywords)
+
+    @property
+    def version(self):
+        return self.digest[:16]
+
+
+# ------------------ Registry ------------------
+class KeywordRegistry:
+    """Process-wide, preloaded view of every job_keywords/*.txt file.
+
+    Files are read once; afterwards the folder is only stat'ed when
+    refresh_interval has elapsed, and a role is re-read only when its
+    mtime changed and re-parsed only when its content hash changed.
+    """
+
+    def __init__(self, folder="job_keywords", refresh_interval=30.0):
+        self.folder = folder
+        self.refresh_interval = refresh_interval
+        self._roles = {}
+        self._lock = threading.Lock()
+        self._checked_at = None
+        self._union = None
+        self.reloads = 0
+        self.refresh(force=True)
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and self._checked_at is not None and now - self._checked_at < self.refresh_interval:
+            return False
+        with self._lock:
+            changed = False
+            seen = set()
+            try:
+                entries = [e for e in os.scandir(self.folder) if e.name.endswith(".txt") and e.is_file()]
+            except FileNotFoundError:
+                entries = []
+            for entry in entries:
+                seen.add(entry.name)
+                mtime = entry.stat().st_mtime_ns
+                role = self._roles.get(entry.name)
+                if role is not None and role.mtime == mtime:
+                    continue
+                with open(entry.path, "rb") as f:
+                    raw = f.read()
+                if role is not None and role.digest == hashlib.sha256(raw).hexdigest():
+                    role.mtime = mtime
+                    continue
+                self._roles[entry.name] = RoleKeywords(os.path.join(self.folder, entry.name), raw, mtime)
+                self.reloads += 1
+                changed = True
+            for name in set(self._roles) - seen:
+                del self._roles[name]
+                changed = True
+            if changed:
+                self._roles = dict(sorted(self._roles.items()))
+                self._union = None
+            self._checked_at = now
+            return changed
+
+    def roles(self):
+        self.refresh()
+        return list(self._roles.values())
+
+    def names(self):
+        self.refresh()
+        return list(self._roles)
+
+    def files(self):
+        return [role.path for role in self.roles()]
+
+    def get(self, name):
+        self.refresh()
+        return self._roles.get(name)
+
+    def detect(self, cv_name):
+        base_name = cv_name.lower().replace(" ", "_")
+        roles = self.roles()
+        for role in roles:
+            if role.job in base_name:
+                return role
+        if roles:
+            return self._roles.get(DEFAULT_ROLE, roles[0])
+        return None
+
+    @property
+    def version(self):
+        self.refresh()
+        # Aliases change what every role matches.
+        digest = hashlib.sha256(ALIAS_VERSION.encode())
+        for role in self._roles.values():
+            digest.update(role.digest.encode())
+        return digest.hexdigest()[:16]
+
+    def union_matcher(self):
+        # One automaton over every role, so a single scan of a CV can be
+        # scored against all roles.
+        self.refresh()
+        if self._union is None:
+            keywords = {}
+            for role in self._roles.values():
+                for kw in role.keywords:
+                    keywords.setdefault(normalize_keyword(kw), kw)
+            self._union = get_matcher(sorted(keywords.values()))
+        return self._union
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(folder="job_keywords"):
+    with _registries_lock:
+        registry = _registries.get(folder)
+        if registry is None:
+            registry = _registries[folder] = KeywordRegistry(folder)
+        return registry
@@ -0,0 +1,173 @@
+import hashlib
+import math
+import sqlite3
+import threading
+from collections import Counter
+
+from keyword_matcher import normalize_keyword
+from keyword_registry import get_registry
+
+# A new weights snapshot is only taken once the CV corpus grew this much,
+# so scores (and cached analyses) stay stable between snapshots.
+REFRESH_RATIO = 0.05
+REFRESH_DOCS = 20
+# Keywords taken from one job description
+MAX_JOB_KEYWORDS = 40
+
+
+def idf(docs, df):
+    # Smoothed, so a keyword found in every document still weighs 1.
+    return math.log((1 + docs) / (1 + df)) + 1
+
+
+# ------------------ Weights Snapshot ------------------
+class KeywordWeights:
+    """IDF weight of every keyword at one point in time.
+
+    Keywords nobody has used yet get the weight of a document frequency
+    of zero. Calling the snapshot with a keyword, in any spelling, gives
+    its weight.
+    """
+
+    __slots__ = ("docs", "weights", "default", "version")
+
+    def __init__(self, docs, doc_freq):
+        self.docs = docs
+        self.weights = {key: idf(docs, df) for key, df in doc_freq.items()}
+        self.default = idf(docs, 0)
+        self.version = hashlib.sha256(repr((docs, sorted(doc_freq.items()))).encode()).hexdigest()[:16]
+
+    def __call__(self, keyword):
+        return self.weights.get(normalize_keyword(keyword), self.default)
+
+
+# ------------------ Document Frequencies ------------------
+class IdfStats:
+    """Document frequency of each keyword over analyzed CVs and role files.
+
+    CVs are counted as they are analyzed: add() bumps the in-memory counts
+    and the deltas are upserted into SQLite every `flush_every` CVs, so
+    several app processes can share one file. Role files count as one
+    document each and are recounted only when the registry changes.
+    Scoring reads a precomputed KeywordWeights snapshot and never scans
+    the corpus.
+
+    With `readonly`, the file must already exist and is only read (the
+    batch scorer and the API use the app's counts but never add to them).
+    """
+
+    def __init__(self, path="keyword_weights.db", registry=None, flush_every=50, readonly=False):
+        self.path = path
+        self.registry = registry or get_registry()
+        self.flush_every = flush_every
+        self.readonly = readonly
+        self._lock = threading.RLock()
+        if readonly:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS doc_freq (keyword TEXT PRIMARY KEY, docs INTEGER NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);"
+            )
+            self._conn.commit()
+        self._pending = Counter()
+        self._pending_docs = 0
+        self._load()
+        self._roles_version = None
+        self._role_freq = Counter()
+        self._role_docs = 0
+        self._snapshot = None
+        self._snapshot_docs = 0
+
+    def _load(self):
+        self._cv_freq = Counter(dict(self._conn.execute("SELECT keyword, docs FROM doc_freq")))
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'docs'").fetchone()
+        self._cv_docs = row[0] if row else 0
+
+    def __len__(self):
+        return self._cv_docs
+
+    def reload(self):
+        """Pick up the counts other processes flushed since this one loaded."""
+        with self._lock:
+            self.flush()
+            self._load()
+
+    def add(self, keys):
+        """Count one analyzed CV; `keys` are the keywords found in it."""
+        if self.readonly:
+            raise ValueError("IdfStats was opened read-only")
+        keys = {normalize_keyword(k) for k in keys}
+        with self._lock:
+            self._cv_freq.update(keys)
+            self._pending.update(keys)
+            self._cv_docs += 1
+            self._pending_docs += 1
+            if self._pending_docs >= self.flush_every:
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._pending_docs:
+                return
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO doc_freq (keyword, docs) VALUES (?, ?)"
+                    " ON CONFLICT(keyword) DO UPDATE SET docs = docs + excluded.docs",
+                    self._pending.items(),
+                )
+                self._conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('docs', ?)"
+                    " ON CONFLICT(key) DO UPDATE SET value = value + excluded.value",
+                    (self._pending_docs,),
+                )
+            self._pending.clear()
+            self._pending_docs = 0
+
+    def _count_roles(self):
+        freq = Counter()
+        roles = self.registry.roles()
+        for role in roles:
+            freq.update({normalize_keyword(kw) for kw in role.keywords})
+        self._role_freq = freq
+        self._role_docs = len(roles)
+
+    def weights(self):
+        with self._lock:
+            roles_version = self.registry.version
+            grown = self._cv_docs - self._snapshot_docs
+            if (self._snapshot is None or roles_version != self._roles_version
+                    or grown >= max(REFRESH_DOCS, self._snapshot_docs * REFRESH_RATIO)):
+                if roles_version != self._roles_version:
+                    self._count_roles()
+                    self._roles_version = roles_version
+                self._snapshot = KeywordWeights(self._cv_docs + self._role_docs, self._cv_freq + self._role_freq)
+                self._snapshot_docs = self._cv_docs
+            return self._snapshot
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+
+# ------------------ Job Descriptions ------------------
+def extract_job_keywords(text, weights=None, registry=None, limit=MAX_JOB_KEYWORDS):
+    """Keywords a job description asks for, most important first.
+
+    The description is scanned once with the registry's union automaton,
+    so every keyword (or alias) of any role file is recognized. Keywords
+    are ranked by how often the description mentions them times their
+    IDF weight; ties keep the order they first appear in.
+    """
+    registry = registry or get_registry()
+    matcher = registry.union_matcher()
+    scan = matcher.scan(text)
+    names = {normalize_keyword(kw): kw for kw in matcher.keywords}
+
+    def importance(item):
+        key, spans = item
+        return -len(spans) * (weights(key) if weights is not None else 1), spans[0][0]
+
+    return [names[key] for key, _ in sorted(scan.found.items(), key=importance)[:limit]]
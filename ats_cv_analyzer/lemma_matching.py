@@ -0,0 +1,91 @@
+from functools import lru_cache
+from itertools import islice, product
+
+from keyword_matcher import TOKEN_RE, KeywordMatcher, normalize_keyword
+
+DEFAULT_MODEL = "en_core_web_sm"
+# What lemmas need; everything else in the pipeline (parser, ner, ...) is disabled.
+LEMMA_COMPONENTS = ("tok2vec", "tagger", "morphologizer", "attribute_ruler", "lemmatizer")
+# Lemma spellings tried per keyword, e.g. "Testing" as a noun and as a verb
+MAX_VARIANTS = 16
+
+
+def load_nlp(model=DEFAULT_MODEL):
+    """A spaCy pipeline for lemma matching.
+
+    "blank" builds an English pipeline with only a lookup lemmatizer
+    (needs spacy-lookups-data), for deployments without the model.
+    """
+    import spacy
+    if model == "blank":
+        nlp = spacy.blank("en")
+        nlp.add_pipe("lemmatizer", config={"mode": "lookup"})
+        nlp.initialize()
+        return nlp
+    return spacy.load(model, exclude=["parser", "ner"])
+
+
+def unused_components(nlp):
+    return [name for name in nlp.pipe_names if name not in LEMMA_COMPONENTS]
+
+
+def lemma_tokens(doc):
+    # Lemmas cut into the same tokens KeywordMatcher works on.
+    return [t for token in doc if not token.is_space for t in TOKEN_RE.findall(token.lemma_.lower())]
+
+
+# ------------------ Lemma Matcher ------------------
+class LemmaMatcher:
+    """Finds keywords by lemma, so "tested" in a CV matches "Testing".
+
+    Every keyword is lemmatized once, as a noun and as a verb, and all
+    spellings go into one KeywordMatcher over lemma tokens; its hits map
+    back to the normalized keywords analyze_cv uses. CVs go through
+    nlp.pipe with the components lemmas do not need disabled.
+    """
+
+    def __init__(self, nlp, keywords):
+        self.nlp = nlp
+        self.keywords = list(keywords)
+        # lemma phrase -> normalized keywords it stands for
+        self._keys = {}
+        lemmatizer = nlp.get_pipe("lemmatizer")
+        from spacy.tokens import Doc
+        for kw in self.keywords:
+            forms = []
+            for token in nlp.make_doc(kw):
+                if token.is_space:
+                    continue
+                variants = {token.lower_}
+                for word in {token.text, token.lower_}:
+                    for pos in ("NOUN", "VERB"):
+                        variants.add(lemmatizer(Doc(nlp.vocab, words=[word], pos=[pos]))[0].lemma_.lower())
+                forms.append(sorted(variants))
+            for combo in islice(product(*forms), MAX_VARIANTS):
+                phrase = " ".join(t for form in combo for t in TOKEN_RE.findall(form))
+                if phrase:
+                    self._keys.setdefault(phrase, set()).add(normalize_keyword(kw))
+        self.matcher = KeywordMatcher(self._keys)
+
+    def match_doc(self, doc):
+        return {key for phrase, _, _ in self.matcher.match_tokens(lemma_tokens(doc)) for key in self._keys[phrase]}
+
+    def match(self, text):
+        with self.nlp.select_pipes(disable=unused_components(self.nlp)):
+            return self.match_doc(self.nlp(text))
+
+    def match_many(self, texts, batch_size=16, n_process=1):
+        docs = self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process,
+                             disable=unused_components(self.nlp))
+        for doc in docs:
+            yield self.match_doc(doc)
+
+
+@lru_cache(maxsize=128)
+def _compile(nlp, keywords):
+    return LemmaMatcher(nlp, keywords)
+
+
+def get_lemma_matcher(nlp, keywords):
+    # Built once per pipeline and keyword list, like get_matcher.
+    return _compile(nlp, tuple(keywords or ()))
@@ -0,0 +1,194 @@
+import cProfile
+import functools
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+PREFIX = "ats"
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def _quantile(values, q):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+# ------------------ Stage Timers ------------------
+class StageTimer:
+    __slots__ = ("count", "total", "samples")
+
+    def __init__(self, window):
+        self.count = 0
+        self.total = 0.0
+        # The most recent durations; quantiles are computed over these.
+        self.samples = deque(maxlen=window)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.samples.append(seconds)
+
+    def summary(self):
+        values = sorted(self.samples)
+        return {
+            "count": self.count,
+            "total_s": round(self.total, 6),
+            "p50_ms": round(_quantile(values, 0.5) * 1000, 3),
+            "p95_ms": round(_quantile(values, 0.95) * 1000, 3),
+            "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+        }
+
+
+# ------------------ Registry ------------------
+class MetricsRegistry:
+    """Process-wide stage timings and counters.
+
+    `timer(stage)` records a duration per stage (with p50/p95 over the
+    last `window` samples); `inc(name)` bumps a counter such as bytes,
+    pages or cache hits. Both take optional labels. Export with
+    to_prometheus() (text exposition format) or to_json().
+    """
+
+    def __init__(self, window=1024):
+        self.window = window
+        self._timers = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, **labels):
+        key = (stage, _label_key(labels))
+        with self._lock:
+            timer = self._timers.get(key)
+            if timer is None:
+                timer = self._timers[key] = StageTimer(self.window)
+            timer.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def timed(self, stage, **labels):
+        """Decorator form of timer()."""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def stages(self):
+        with self._lock:
+            items = [(stage, dict(labels), timer.summary()) for (stage, labels), timer in self._timers.items()]
+        return sorted(items, key=lambda item: (item[0], sorted(item[1].items())))
+
+    def counters(self):
+        with self._lock:
+            items = [(name, dict(labels), value) for (name, labels), value in self._counters.items()]
+        return sorted(items, key=lambda item: (item[0], sorted(item[1].items())))
+
+    def to_json(self):
+        return json.dumps({
+            "stages": [dict(summary, stage=stage, labels=labels) for stage, labels, summary in self.stages()],
+            "counters": [{"name": name, "labels": labels, "value": value} for name, labels, value in self.counters()],
+        }, indent=2)
+
+    def to_prometheus(self):
+        lines = []
+        stages = self.stages()
+        if stages:
+            name = f"{PREFIX}_stage_duration_seconds"
+            lines += [f"# HELP {name} Duration of pipeline stages.", f"# TYPE {name} summary"]
+            for stage, labels, summary in stages:
+                key = _label_key(dict(labels, stage=stage))
+                for q, field in ((0.5, "p50_ms"), (0.95, "p95_ms")):
+                    lines.append(f"{name}{_format_labels(key, [('quantile', q)])} {summary[field] / 1000}")
+                lines.append(f"{name}_sum{_format_labels(key)} {summary['total_s']}")
+                lines.append(f"{name}_count{_format_labels(key)} {summary['count']}")
+        seen = set()
+        for counter, labels, value in self.counters():
+            name = f"{PREFIX}_{counter}_total"
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_format_labels(_label_key(labels))} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics():
+    return _registry
+
+
+# ------------------ Profiling Hook ------------------
+class ProfileReport:
+    def __init__(self):
+        self.elapsed = 0.0
+        self.stats = ""
+        self.allocations = []
+        self.peak_bytes = None
+
+
+@contextmanager
+def profiled(enabled=True, memory=False, top_n=25):
+    """Opt-in cProfile (and tracemalloc) around one request.
+
+    Yields a ProfileReport that is filled in when the block exits; when
+    not enabled the block runs untouched.
+    """
+    report = ProfileReport()
+    if not enabled:
+        yield report
+        return
+    profiler = cProfile.Profile()
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield report
+    finally:
+        profiler.disable()
+        report.elapsed = time.perf_counter() - start
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top_n)
+        report.stats = out.getvalue()
+        if memory:
+            snapshot = tracemalloc.take_snapshot()
+            report.peak_bytes = tracemalloc.get_traced_memory()[1]
+            report.allocations = [str(stat) for stat in snapshot.statistics("lineno")[:top_n]]
+            if started_tracing:
+                tracemalloc.stop()
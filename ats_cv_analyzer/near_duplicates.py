@@ -0,0 +1,188 @@
+import hashlib
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+
+from keyword_matcher import SYMBOL_TOKENS, TOKEN_RE
+from metrics import get_metrics
+
+NUM_PERM = 128
+# 16 bands of 8 rows: two CVs with a shingle Jaccard similarity of 0.8
+# share a bucket 95% of the time, at 0.5 only 6% of the time.
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 5
+# Estimated Jaccard similarity from which two CVs count as the same CV.
+DUPLICATE_SIMILARITY = 0.8
+# Shingles hashed per numpy pass, to bound the (shingles x permutations) matrix.
+HASH_BLOCK = 4096
+# Signatures compared per lookup at most, however large a cluster grows.
+MAX_CANDIDATES = 256
+
+_rng = np.random.default_rng(20240)
+# Multiply-shift hashing: (a * h + b) mod 2**64, top 32 bits, with odd a.
+_A = _rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_B = _rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64)
+_SHIFT = np.uint64(32)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+@lru_cache(maxsize=65536)
+def _word_hash(word):
+    return zlib.crc32(word.encode("utf-8", "surrogatepass"))
+
+
+def shingle_hashes(words):
+    """32-bit hashes of the distinct runs of SHINGLE_WORDS words."""
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    h = np.fromiter(map(_word_hash, words), dtype=np.uint64, count=len(words))
+    n = max(len(h) - SHINGLE_WORDS + 1, 1)
+    # Polynomial over the word hashes; uint64 arithmetic wraps, which is what we want.
+    shingles = h[:n].copy()
+    for k in range(1, min(SHINGLE_WORDS, len(h))):
+        shingles = shingles * _MIX + h[k:k + n]
+    return np.unique(shingles >> _SHIFT)
+
+
+def minhash(words):
+    """MinHash signature (NUM_PERM uint32) of a tokenized text."""
+    hashes = shingle_hashes(words)
+    signature = np.full(NUM_PERM, 0xFFFFFFFF, dtype=np.uint64)
+    for i in range(0, len(hashes), HASH_BLOCK):
+        block = hashes[i:i + HASH_BLOCK, None]
+        np.minimum(signature, ((block * _A + _B) >> _SHIFT).min(axis=0), out=signature)
+    return signature.astype(np.uint32)
+
+
+def text_signature(text):
+    return minhash([t for t in TOKEN_RE.findall(text.lower()) if t not in SYMBOL_TOKENS])
+
+
+def text_digest(text):
+    return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def similarity(a, b):
+    # Share of equal MinHash values estimates the Jaccard similarity of the shingle sets.
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+def band_buckets(signature):
+    rows = signature.reshape(BANDS, ROWS)
+    return [int.from_bytes(hashlib.blake2b(bytes([band]) + rows[band].tobytes(), digest_size=8).digest(),
+                           "little", signed=True) for band in range(BANDS)]
+
+
+# ------------------ LSH Index ------------------
+class DuplicateIndex:
+    """LSH index of MinHash signatures over every analyzed CV.
+
+    A signature is cut into BANDS bands and each band is a bucket key in
+    an indexed SQLite table, so finding candidates is BANDS index lookups
+    whatever the number of CVs; only the candidates' signatures are
+    compared. Every CV joins the cluster of its closest earlier
+    near-duplicate, or starts a new one. Each upload records the role it
+    was scored against, so a CV seen before can still be new for a role.
+    """
+
+    def __init__(self, path="cv_duplicates.db", threshold=DUPLICATE_SIMILARITY):
+        self.path = path
+        self.threshold = threshold
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            " id INTEGER PRIMARY KEY, cluster INTEGER, cv_name TEXT, digest TEXT, similarity REAL,"
+            " timestamp TEXT, signature BLOB NOT NULL, role TEXT);"
+            "CREATE INDEX IF NOT EXISTS docs_cluster ON docs (cluster);"
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            " bucket INTEGER NOT NULL, doc_id INTEGER NOT NULL, PRIMARY KEY (bucket, doc_id)) WITHOUT ROWID;"
+        )
+        # Indexes written before uploads recorded their role.
+        if "role" not in {row[1] for row in self._conn.execute("PRAGMA table_info(docs)")}:
+            self._conn.execute("ALTER TABLE docs ADD COLUMN role TEXT")
+        self._conn.commit()
+
+    @get_metrics().timed("duplicate_lookup")
+    def find(self, signature, digest=None, role=None):
+        """Closest indexed near-duplicate as a dict (id, cluster, cv_name,
+        digest, similarity, same_text), or None. A CV with the same text digest wins
+        outright. With a role, only uploads scored against that role count."""
+        with self._lock:
+            return self._closest(self._candidates(signature), signature, digest, role)
+
+    def _candidates(self, signature):
+        buckets = band_buckets(signature)
+        return self._conn.execute(
+            "SELECT id, cluster, cv_name, digest, signature, role FROM docs WHERE id IN"
+            f" (SELECT doc_id FROM buckets WHERE bucket IN ({','.join('?' * len(buckets))}) LIMIT ?)",
+            buckets + [MAX_CANDIDATES],
+        ).fetchall()
+
+    def _closest(self, rows, signature, digest, role=None):
+        best = None
+        for doc_id, cluster, cv_name, doc_digest, blob, doc_role in rows:
+            if role is not None and doc_role != role:
+                continue
+            same_text = bool(digest) and digest == doc_digest
+            score = 1.0 if same_text else similarity(signature, np.frombuffer(blob, np.uint32))
+            if score >= self.threshold and (best is None or (score, same_text) > (best["similarity"], best["same_text"])):
+                best = {"id": doc_id, "cluster": cluster, "cv_name": cv_name, "digest": doc_digest,
+                        "similarity": score, "same_text": same_text}
+        return best
+
+    def add(self, cv_name, signature, digest=None, role=None):
+        """Index a CV scored against role. Returns (doc id, its closest earlier
+        near-duplicate scored against the same role, or None)."""
+        with self._lock:
+            candidates = self._candidates(signature)
+            duplicate = self._closest(candidates, signature, digest)
+            same_role = duplicate if role is None else self._closest(candidates, signature, digest, role)
+            cur = self._conn.execute(
+                "INSERT INTO docs (cluster, cv_name, digest, similarity, timestamp, signature, role)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (duplicate["cluster"] if duplicate else None, cv_name, digest,
+                 duplicate["similarity"] if duplicate else None, datetime.now().isoformat(),
+                 np.asarray(signature, dtype=np.uint32).tobytes(), role),
+            )
+            doc_id = cur.lastrowid
+            if duplicate is None:
+                self._conn.execute("UPDATE docs SET cluster = id WHERE id = ?", (doc_id,))
+            # A copy of a text indexed for this role adds nothing to find; its original stays the candidate.
+            if same_role is None or not same_role["same_text"]:
+                self._conn.executemany("INSERT OR IGNORE INTO buckets (bucket, doc_id) VALUES (?, ?)",
+                                       [(bucket, doc_id) for bucket in band_buckets(signature)])
+            self._conn.commit()
+        if duplicate is not None:
+            get_metrics().inc("duplicate_uploads")
+        return doc_id, same_role
+
+    def clusters(self, min_size=2, limit=50):
+        """Largest clusters first: (cluster id, size, [(cv_name, similarity, timestamp), ...])."""
+        with self._lock:
+            heads = self._conn.execute(
+                "SELECT cluster, COUNT(*) AS size FROM docs GROUP BY cluster HAVING size >= ?"
+                " ORDER BY size DESC, cluster LIMIT ?", (min_size, limit)
+            ).fetchall()
+            out = []
+            for cluster, size in heads:
+                members = self._conn.execute(
+                    "SELECT cv_name, similarity, timestamp FROM docs WHERE cluster = ? ORDER BY id", (cluster,)
+                ).fetchall()
+                out.append((cluster, size, members))
+        return out
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
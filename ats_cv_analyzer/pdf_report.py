@@ -0,0 +1,304 @@
+import fpdf
+from fpdf import FPDF
+from fpdf.ttfonts import TTFontFile
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from trademark_config import TRADEMARK_INFO
+from metrics import get_metrics
+
+FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+REPORT_FONTS = {
+    "": "DejaVuSans.ttf",
+    "B": "DejaVuSans-Bold.ttf",
+    "I": "DejaVuSans-Oblique.ttf",
+    "BI": "DejaVuSans-BoldOblique.ttf",
+}
+
+TO_UNICODE_CMAP = (
+    "/CIDInit /ProcSet findresource begin\n"
+    "12 dict begin\n"
+    "begincmap\n"
+    "/CIDSystemInfo\n"
+    "<</Registry (Adobe)\n"
+    "/Ordering (UCS)\n"
+    "/Supplement 0\n"
+    ">> def\n"
+    "/CMapName /Adobe-Identity-UCS def\n"
+    "/CMapType 2 def\n"
+    "1 begincodespacerange\n"
+    "<0000> <FFFF>\n"
+    "endcodespacerange\n"
+    "1 beginbfrange\n"
+    "<0000> <FFFF> <0000>\n"
+    "endbfrange\n"
+    "endcmap\n"
+    "CMapName currentdict /CMap defineresource pop\n"
+    "end\n"
+    "end"
+)
+
+class _WidthsWriter:
+    # Collects what FPDF._putTTfontwidths writes, so the /W array can be
+    # built once without redirecting a document's output.
+    def __init__(self):
+        self.lines = []
+
+    def _out(self, line):
+        self.lines.append(line)
+
+class EmbeddedFont:
+    __slots__ = ("stream", "size", "cid_to_gid", "widths")
+
+    def __init__(self, ttffile, subset, font):
+        ttf = TTFontFile()
+        stream = ttf.makeSubset(ttffile, subset)
+        self.size = len(stream)
+        self.stream = zlib.compress(stream)
+        cid_to_gid = bytearray(256 * 256 * 2)
+        for cc, glyph in ttf.codeToGlyph.items():
+            cid_to_gid[cc * 2] = glyph >> 8
+            cid_to_gid[cc * 2 + 1] = glyph & 0xFF
+        self.cid_to_gid = zlib.compress(bytes(cid_to_gid))
+        writer = _WidthsWriter()
+        FPDF._putTTfontwidths(writer, dict(font, subset=set(subset)), ttf.maxUni)
+        self.widths = tuple(writer.lines)
+
+# ------------------ PDF Class ------------------
+class PDF(FPDF):
+    """FPDF with the TrueType work shared across documents.
+
+    fpdf registers a font by reading its metrics on every add_font, and on
+    output parses the TTF again to subset it and rebuilds the widths array
+    and CIDToGIDMap. Here a font is registered through fpdf once per
+    process and copied into later documents, and the embedded objects of
+    a (font, character set) pair are built once and reused by every
+    report that draws the same characters. The bytes written are the
+    ones FPDF writes (tests/test_pdf_report.py).
+    """
+
+    max_embedded = 64
+    _registered = {}
+    _embedded = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    def footer(self):
+        self.set_y(-20)
+        self.set_font("DejaVu", size=8)
+        self.set_text_color(100, 100, 100)
+        current_year = datetime.now().year
+        brand = TRADEMARK_INFO['brand_name']
+        disclaimer = TRADEMARK_INFO['disclaimer']
+        footer_text = f"© {current_year} {brand} | {disclaimer} | Page {self.page_no()}"
+        self.cell(0, 8, footer_text, align="C")
+
+    def add_font(self, family, style="", fname="", uni=False):
+        if not uni:
+            return FPDF.add_font(self, family, style, fname, uni)
+        # The initial subset fpdf picks depends on alias_nb_pages().
+        key = (family, style, fname, hasattr(self, "str_alias_nb_pages"))
+        with self._cache_lock:
+            registered = self._registered.get(key)
+        if registered is None:
+            fonts, files = set(self.fonts), set(self.font_files)
+            FPDF.add_font(self, family, style, fname, uni)
+            if os.path.isabs(fname):
+                # fpdf's metrics pickle keeps the path the font was first added
+                # with, which may be relative to another working directory.
+                for fontkey in set(self.fonts) - fonts:
+                    self.fonts[fontkey]["ttffile"] = fname
+                    self.font_files[fontkey]["ttffile"] = fname
+            registered = (
+                {k: dict(v, subset=list(v["subset"])) for k, v in self.fonts.items() if k not in fonts},
+                {k: dict(v) for k, v in self.font_files.items() if k not in files},
+            )
+            with self._cache_lock:
+                self._registered[key] = registered
+            return
+        added, files = registered
+        for fontkey, font in added.items():
+            if fontkey in self.fonts:
+                continue
+            self.fonts[fontkey] = dict(font, i=len(self.fonts) + 1, subset=list(font["subset"]))
+        for name, info in files.items():
+            self.font_files[name] = dict(info)
+
+    def embedded_font(self, font, subset):
+        key = (font["ttffile"], tuple(subset))
+        with self._cache_lock:
+            embedded = self._embedded.get(key)
+            if embedded is not None:
+                self._embedded.move_to_end(key)
+                return embedded
+        embedded = EmbeddedFont(font["ttffile"], subset, font)
+        with self._cache_lock:
+            self._embedded[key] = embedded
+            while len(self._embedded) > self.max_embedded:
+                self._embedded.popitem(last=False)
+        return embedded
+
+    def _putfonts(self):
+        # Written against fpdf 1.7.2's internals; other versions do their own.
+        if fpdf.FPDF_VERSION != "1.7.2":
+            return FPDF._putfonts(self)
+        if self.diffs or any(font["type"] != "TTF" for font in self.fonts.values()):
+            return FPDF._putfonts(self)
+        # Same objects, in the same order, as the TTF branch of FPDF._putfonts.
+        for _, fontkey, font in sorted((font["i"], fontkey, font) for fontkey, font in self.fonts.items()):
+            self.fonts[fontkey]["n"] = self.n + 1
+            subset = font["subset"]
+            del subset[0]
+            embedded = self.embedded_font(font, subset)
+            fontname = "MPDFAA+" + font["name"]
+
+            self._newobj()
+            self._out("<</Type /Font")
+            self._out("/Subtype /Type0")
+            self._out("/BaseFont /" + fontname)
+            self._out("/Encoding /Identity-H")
+            self._out("/DescendantFonts [" + str(self.n + 1) + " 0 R]")
+            self._out("/ToUnicode " + str(self.n + 2) + " 0 R")
+            self._out(">>")
+            self._out("endobj")
+
+            self._newobj()
+            self._out("<</Type /Font")
+            self._out("/Subtype /CIDFontType2")
+            self._out("/BaseFont /" + fontname)
+            self._out("/CIDSystemInfo " + str(self.n + 2) + " 0 R")
+            self._out("/FontDescriptor " + str(self.n + 3) + " 0 R")
+            if font["desc"].get("MissingWidth"):
+                self._out("/DW %d" % font["desc"]["MissingWidth"])
+            for line in embedded.widths:
+                self._out(line)
+            self._out("/CIDToGIDMap " + str(self.n + 4) + " 0 R")
+            self._out(">>")
+            self._out("endobj")
+
+            self._newobj()
+            self._out("<</Length " + str(len(TO_UNICODE_CMAP)) + ">>")
+            self._putstream(TO_UNICODE_CMAP)
+            self._out("endobj")
+
+            self._newobj()
+            self._out("<</Registry (Adobe)")
+            self._out("/Ordering (UCS)")
+            self._out("/Supplement 0")
+            self._out(">>")
+            self._out("endobj")
+
+            self._newobj()
+            self._out("<</Type /FontDescriptor")
+            self._out("/FontName /" + fontname)
+            for name in ("Ascent", "Descent", "CapHeight", "Flags", "FontBBox", "ItalicAngle", "StemV", "MissingWidth"):
+                value = font["desc"][name]
+                if name == "Flags":
+                    value = (value | 4) & ~32
+                self._out(" /%s %s" % (name, value))
+            self._out("/FontFile2 " + str(self.n + 2) + " 0 R")
+            self._out(">>")
+            self._out("endobj")
+
+            self._newobj()
+            self._out("<</Length " + str(len(embedded.cid_to_gid)))
+            self._out("/Filter /FlateDecode")
+            self._out(">>")
+            self._putstream(embedded.cid_to_gid)
+            self._out("endobj")
+
+            self._newobj()
+            self._out("<</Length " + str(len(embedded.stream)))
+            self._out("/Filter /FlateDecode")
+            self._out("/Length1 " + str(embedded.size))
+            self._out(">>")
+            self._putstream(embedded.stream)
+            self._out("endobj")
+
+def register_fonts(pdf, family="DejaVu"):
+    for style, filename in REPORT_FONTS.items():
+        pdf.add_font(family, style, os.path.join(FONT_DIR, filename), uni=True)
+
+# ------------------ PDF Helpers ------------------
+def safe_multicell(pdf, text, line_height=8, indent=5):
+    if not text:
+        return
+    x_start = pdf.get_x()
+    usable_width = pdf.w - pdf.l_margin - pdf.r_margin - indent
+    pdf.set_x(pdf.l_margin + indent)
+    pdf.multi_cell(usable_width, line_height, text)
+    pdf.set_x(x_start)
+
+# ------------------ PDF Report ------------------
+def draw_report(pdf, analysis, job_keywords=None, rewritten_cv=None):
+    pdf.add_page()
+    register_fonts(pdf)
+    pdf.set_font("DejaVu", "B", 16)
+    pdf.cell(0, 10, "ATS CV Analysis Report", ln=True, align="C")
+    pdf.ln(10)
+
+    pdf.set_font("DejaVu", "B", 12)
+    pdf.cell(0, 10, f"ATS-Friendliness Score: {analysis['ats_score']}%", ln=True)
+    pdf.ln(5)
+
+    pdf.set_font("DejaVu", "B", 12)
+    pdf.cell(0, 10, "Strengths:", ln=True)
+    pdf.set_font("DejaVu", "", 11)
+    for s in analysis["strengths"]:
+        safe_multicell(pdf, f"- {s}", indent=5)
+    pdf.ln(3)
+
+    pdf.set_font("DejaVu", "B", 12)
+    pdf.cell(0, 10, "Weaknesses:", ln=True)
+    pdf.set_font("DejaVu", "", 11)
+    for w in analysis["weaknesses"]:
+        safe_multicell(pdf, f"- {w}", indent=5)
+    pdf.ln(3)
+
+    if job_keywords:
+        pdf.set_font("DejaVu", "B", 12)
+        pdf.cell(0, 10, "Keywords Analysis:", ln=True)
+        pdf.set_font("DejaVu", "", 11)
+        safe_multicell(pdf, f"Matched Keywords: {', '.join(analysis['matched_keywords'])}", indent=5)
+        safe_multicell(pdf, f"Missing Keywords: {', '.join(analysis['missing_keywords'])}", indent=5)
+        pdf.ln(3)
+
+    if rewritten_cv:
+        pdf.set_font("DejaVu", "B", 12)
+        pdf.cell(0, 10, "Professional Rewritten CV:", ln=True)
+        pdf.set_font("DejaVu", "", 11)
+        for line in rewritten_cv.split("\n"):
+            safe_multicell(pdf, line, indent=5)
+        pdf.ln(3)
+    return pdf
+
+@get_metrics().timed("pdf_render")
+def render_report(analysis, job_keywords=None, rewritten_cv=None):
+    pdf = draw_report(PDF(), analysis, job_keywords, rewritten_cv)
+    # fpdf 1.7 builds the document as a latin-1 str
+    return pdf.output(dest="S").encode("latin1")
+
+def report_filename(cv_name="Uploaded_CV"):
+    return f"{cv_name}_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+
+def generate_pdf(analysis, cv_name="Uploaded_CV", job_keywords=None, rewritten_cv=None):
+    os.makedirs("reports", exist_ok=True)
+    filename = os.path.join("reports", report_filename(cv_name))
+    with open(filename, "wb") as f:
+        f.write(render_report(analysis, job_keywords, rewritten_cv))
+    return filename
+
+# ------------------ Batch Rendering ------------------
+def _render_job(job):
+    return render_report(job["analysis"], job.get("job_keywords"), job.get("rewritten_cv"))
+
+def render_reports(jobs, workers=None):
+    # jobs: iterable of {"analysis", "job_keywords", "rewritten_cv"} dicts;
+    # yields PDF bytes in order. Each worker process keeps its own font cache.
+    if workers == 1:
+        yield from map(_render_job, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_render_job, jobs, chunksize=4)
@@ -0,0 +1,121 @@
+import re
+import zlib
+
+# Weak phrasing -> stronger verb. Keys are matched as whole words, ignoring
+# case; the longest key wins where several start at the same place.
+VERB_UPGRADES = {
+    "worked": "developed",
+    "worked on": "developed",
+    "worked with": "collaborated with",
+    "responsible": "led",
+    "responsible for": "led",
+    "was responsible for": "led",
+    "in charge of": "led",
+    "was in charge of": "led",
+    "helped": "supported",
+    "helped with": "supported",
+    "assisted": "supported",
+    "assisted with": "supported",
+    "participated in": "contributed to",
+    "took part in": "contributed to",
+    "involved in": "contributed to",
+    "was involved in": "contributed to",
+    "handled": "managed",
+    "looked after": "managed",
+    "dealt with": "resolved",
+    "fixed": "resolved",
+    "set up": "established",
+    "made": "built",
+    "ran": "directed",
+    "used": "applied",
+    "utilized": "applied",
+}
+
+SECTION_TEMPLATES = {
+    "summary": [
+        "Professional with experience in {}.",
+        "Skilled in {}.",
+        "Accomplished in {}."
+    ],
+    "skills": [
+        "Proficient in {}.",
+        "Experienced with {}.",
+        "Hands-on experience in {}."
+    ],
+    "experience": [
+        "Developed expertise in {}.",
+        "Led projects involving {}.",
+        "Implemented solutions using {}.",
+        "Collaborated with teams to optimize {}."
+    ],
+    "education": [
+        "Completed {} degree.",
+        "Graduated in {}.",
+        "Certified in {}."
+    ]
+}
+
+SENTENCE_RE = re.compile(r"[^.\n]+")
+# Joins the sections of one batch so they are upgraded in a single pass.
+SEPARATOR = "\x00"
+
+
+def cv_seed(cv_text):
+    """Stable 32-bit seed of a CV, the same in every process and rerun."""
+    return zlib.crc32(cv_text.encode("utf-8", "surrogatepass"))
+
+
+# ------------------ Rewrite Engine ------------------
+class RewriteEngine:
+    """Precompiled rewrite rules for professional_rewrite_cv.
+
+    All verb upgrades are one alternation regex, applied once to a whole
+    batch of sections. Templates for missing keywords are picked from a
+    hash of (seed, section, keyword) instead of random.choice, so a CV is
+    always rewritten the same way and the result can be cached.
+    """
+
+    def __init__(self, upgrades=VERB_UPGRADES, templates=SECTION_TEMPLATES):
+        self.upgrades = {" ".join(k.lower().split()): v for k, v in upgrades.items()}
+        self.templates = templates
+        alternatives = sorted(self.upgrades, key=len, reverse=True)
+        # The lookahead on first letters lets the regex skip most positions
+        # without trying every alternative.
+        firsts = "".join(sorted({re.escape(k[0]) for k in alternatives}))
+        self._pattern = re.compile(
+            r"\b(?=[" + firsts + r"])(?:" + "|".join(re.escape(k).replace(r"\ ", r"[ \t]+") for k in alternatives)
+            + r")\b",
+            re.I,
+        )
+
+    def _replace(self, m):
+        phrase = m.group(0)
+        new = self.upgrades[" ".join(phrase.lower().split())]
+        return new[0].upper() + new[1:] if phrase[0].isupper() else new
+
+    def upgrade(self, text):
+        return self._pattern.sub(self._replace, text)
+
+    def template_for(self, keyword, section_type, seed):
+        options = self.templates.get(section_type)
+        if not options:
+            return "{}"
+        return options[zlib.crc32(f"{section_type}\x00{keyword}".encode("utf-8"), seed) % len(options)]
+
+    def rewrite_sections(self, sections, seed=0):
+        """Bullets for each (section_type, text, missing_keywords) in `sections`."""
+        joined = SEPARATOR.join(text.replace(SEPARATOR, " ") for _, text, _ in sections)
+        upgraded = self.upgrade(joined).split(SEPARATOR)
+        out = []
+        for (section_type, _, missing_keywords), text in zip(sections, upgraded):
+            bullets = [f"- {s.strip()}" for s in SENTENCE_RE.findall(text) if s.strip()]
+            bullets.extend(f"- {self.template_for(kw, section_type, seed).format(kw)}" for kw in missing_keywords)
+            out.append(bullets)
+        return out
+
+
+_engine = RewriteEngine()
+
+
+def get_rewrite_engine():
+    return _engine
@@ -0,0 +1,100 @@
+import numpy as np
+from scipy import sparse
+
+from cv_analysis import detected_sections, section_score
+from keyword_matcher import normalize_keyword
+from keyword_registry import get_registry
+
+
+# ------------------ Role Matrix ------------------
+class RoleScorer:
+    """Scores CVs against every role in the keyword registry at once.
+
+    Roles are rows of a sparse (roles x keywords) count matrix over the
+    union keyword vocabulary; a CV is a binary row over the same
+    vocabulary. Scoring N CVs against M roles is one sparse product, and
+    the result matches analyze_cv's ats_score for each role. With IDF
+    weights the role matrix columns are scaled by them once per snapshot.
+    """
+
+    def __init__(self, registry=None):
+        self.registry = registry or get_registry()
+        self._version = None
+        self._weighted = None
+        self._build()
+
+    def _build(self):
+        roles = self.registry.roles()
+        vocab = {}
+        rows, cols = [], []
+        for r, role in enumerate(roles):
+            for kw in role.keywords:
+                rows.append(r)
+                cols.append(vocab.setdefault(normalize_keyword(kw), len(vocab)))
+        self.roles = [role.name for role in roles]
+        self.vocab = vocab
+        # Duplicated keywords in a file count twice, as they do in analyze_cv.
+        self.matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float64), (rows, cols)), shape=(len(roles), len(vocab))
+        )
+        self.role_sizes = np.array([len(role.keywords) for role in roles], dtype=np.float64)
+        self.matcher = self.registry.union_matcher()
+        self._version = self.registry.version
+
+    def refresh(self):
+        if self.registry.version != self._version:
+            self._build()
+
+    def vectorize(self, scans):
+        rows, cols = [], []
+        for i, scan in enumerate(scans):
+            for key in scan.found:
+                j = self.vocab.get(key)
+                if j is not None:
+                    rows.append(i)
+                    cols.append(j)
+        return sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float64), (rows, cols)), shape=(len(scans), len(self.vocab))
+        )
+
+    def _weighted_matrix(self, weights):
+        if self._weighted is None or self._weighted[0] != (weights.version, self._version):
+            w = np.array([weights.weights.get(key, weights.default) for key in self.vocab], dtype=np.float64)
+            matrix = sparse.csr_matrix(self.matrix @ sparse.diags(w))
+            self._weighted = (weights.version, self._version), matrix, np.asarray(matrix.sum(axis=1)).ravel()
+        return self._weighted[1], self._weighted[2]
+
+    def score_matrix(self, cv_matrix, section_scores, weights=None):
+        if weights is None:
+            matrix, role_sizes = self.matrix, self.role_sizes
+        else:
+            matrix, role_sizes = self._weighted_matrix(weights)
+        # (N x V) @ (V x M) -> matched keyword counts (or weight sums) per CV and role
+        matched = (cv_matrix @ matrix.T).toarray()
+        sizes = np.where(role_sizes > 0, role_sizes, 1.0)
+        keyword_scores = np.where(role_sizes > 0, matched / sizes * 50, 0.0)
+        return np.floor(np.asarray(section_scores, dtype=np.float64)[:, None] + keyword_scores).astype(int)
+
+    def score_scans(self, scans, weights=None):
+        self.refresh()
+        section_scores = [section_score(detected_sections(scan)) for scan in scans]
+        return self.score_matrix(self.vectorize(scans), section_scores, weights)
+
+    def rank_scans(self, scans, top_k=None, weights=None):
+        scores = self.score_scans(scans, weights)
+        rankings = []
+        for row in scores:
+            # Highest score first; ties keep file-name order.
+            order = np.argsort(-row, kind="stable")[:top_k]
+            rankings.append([(self.roles[j], int(row[j])) for j in order])
+        return rankings
+
+    def rank(self, text=None, scan=None, top_k=None, weights=None):
+        if scan is None:
+            self.refresh()
+            scan = self.matcher.scan(text)
+        return self.rank_scans([scan], top_k, weights)[0]
+
+    def rank_texts(self, texts, top_k=None, weights=None):
+        self.refresh()
+        return self.rank_scans([self.matcher.scan(t) for t in texts], top_k, weights)
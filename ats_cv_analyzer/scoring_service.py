@@ -0,0 +1,328 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, quote, urlencode, urlsplit
+
+from batch_score import score_file
+from keyword_registry import get_registry
+from keyword_weights import IdfStats
+from metrics import get_metrics
+from text_extraction import DEFAULT_LIMITS, TYPE_LABELS, ExtractionLimitError, UploadBytes
+
+MAX_HEADER_BYTES = 16 * 1024
+
+
+class HTTPError(Exception):
+    # Raised before an upload's body was read: the body is still on the connection.
+    body_unread = False
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+# ------------------ Worker Side ------------------
+def _init_worker(keywords_dir):
+    get_registry(keywords_dir)
+
+
+def score_upload(data, filename, content_type, keywords_dir, role_name, rewrite, top_roles, weights=None):
+    upload = UploadBytes(data, filename, content_type)
+    record = score_file(filename, keywords_dir, role_name, rewrite, top_roles, source=upload, detail=True,
+                        weights=weights)
+    record.pop("path", None)
+    return record
+
+
+# ------------------ Service ------------------
+class ScoringService:
+    """Asyncio HTTP front of a bounded process pool.
+
+    At most `workers` CVs are scored at once and `max_queue` more may
+    wait; further requests are refused with 503 straight away instead of
+    piling up. A request that takes longer than `timeout` gets a 504; its
+    slot is only released once the worker is actually done with it.
+
+    CVs are scored with the IDF weights of the app's keyword_weights.db,
+    re-read every `weights_refresh` seconds, so API and app scores agree.
+    Until the app has created that file, CVs are scored unweighted.
+    """
+
+    def __init__(self, workers=None, max_queue=32, timeout=60.0, keywords_dir="job_keywords",
+                 max_body=DEFAULT_LIMITS.max_bytes, weights_path="keyword_weights.db", weights_refresh=60.0):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.keywords_dir = keywords_dir
+        self.max_body = max_body
+        self.inflight = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.weights_refresh = weights_refresh
+        self.weights_path = weights_path
+        self._idf_stats = None
+        self._open_weights()
+        self._weights_loaded = time.monotonic()
+        self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(keywords_dir,))
+        self._server = None
+
+    @property
+    def capacity(self):
+        return self.workers + self.max_queue
+
+    def _release(self, _future):
+        self.inflight -= 1
+
+    def _open_weights(self):
+        # Read-only: the service never creates or writes the app's file.
+        if os.path.exists(self.weights_path):
+            self._idf_stats = IdfStats(self.weights_path, get_registry(self.keywords_dir), readonly=True)
+
+    def weights(self):
+        if time.monotonic() - self._weights_loaded >= self.weights_refresh:
+            if self._idf_stats is None:
+                self._open_weights()
+            else:
+                self._idf_stats.reload()
+            self._weights_loaded = time.monotonic()
+        return self._idf_stats.weights() if self._idf_stats is not None else None
+
+    def _check_capacity(self):
+        if self.inflight >= self.capacity:
+            self.rejected += 1
+            get_metrics().inc("api_rejected")
+            raise HTTPError(503, "Scoring queue is full, retry shortly.", {"Retry-After": "1"})
+
+    async def score(self, data, filename, content_type=None, role_name=None, rewrite=False, top_roles=None):
+        self._check_capacity()
+        if role_name and get_registry(self.keywords_dir).get(role_name) is None:
+            raise HTTPError(404, f"Unknown role {role_name}")
+        loop = asyncio.get_running_loop()
+        # The slot belongs to the pool job, not to the awaiting request: it is
+        # freed when the worker is done, back on the event loop thread.
+        job = self._pool.submit(score_upload, data, filename, content_type, self.keywords_dir, role_name, rewrite,
+                                top_roles, self.weights())
+        self.inflight += 1
+        job.add_done_callback(lambda f: loop.call_soon_threadsafe(self._release, f))
+        start = time.perf_counter()
+        try:
+            record = await asyncio.wait_for(asyncio.wrap_future(job), self.timeout)
+        except asyncio.TimeoutError:
+            # Drops the job if it is still queued; a running one finishes in the
+            # background and keeps its slot until then.
+            job.cancel()
+            self.timeouts += 1
+            get_metrics().inc("api_timeouts")
+            raise HTTPError(504, f"Scoring took longer than {self.timeout}s.") from None
+        record["service_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        if record["error"]:
+            raise HTTPError(422, record["error"])
+        return record
+
+    def health(self):
+        return {"status": "ok", "workers": self.workers, "inflight": self.inflight, "capacity": self.capacity,
+                "rejected": self.rejected, "timeouts": self.timeouts}
+
+    # ------------------ HTTP ------------------
+    async def _route(self, method, target, headers, reader):
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if url.path == "/healthz" and method == "GET":
+            return 200, "application/json", json.dumps(self.health())
+        if url.path == "/metrics" and method == "GET":
+            return 200, "text/plain; version=0.0.4", get_metrics().to_prometheus()
+        if url.path == "/roles" and method == "GET":
+            return 200, "application/json", json.dumps(get_registry(self.keywords_dir).names())
+        if url.path == "/score":
+            try:
+                if method != "POST":
+                    raise HTTPError(405, "Use POST with the CV file as the request body.", {"Allow": "POST"})
+                length, top_roles = self._admit_upload(headers, query)
+            except HTTPError as e:
+                e.body_unread = True
+                raise
+            data = await reader.readexactly(length)
+            content_type = headers.get("content-type", "").split(";")[0].strip()
+            if content_type not in TYPE_LABELS:
+                content_type = None
+            record = await self.score(
+                data,
+                filename=query.get("filename", "upload.txt"),
+                content_type=content_type,
+                role_name=query.get("role"),
+                rewrite=query.get("rewrite") in ("1", "true"),
+                top_roles=top_roles,
+            )
+            return 200, "application/json", json.dumps(record, ensure_ascii=False)
+        raise HTTPError(404, f"No route for {method} {url.path}")
+
+    def _admit_upload(self, headers, query):
+        # Everything that can refuse an upload without its body, so a refused
+        # body (up to max_body) is never read. Returns (length, top_roles).
+        if "content-length" not in headers:
+            raise HTTPError(411, "Content-Length is required.")
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HTTPError(400, "Content-Length must be a non-negative integer.")
+        if length > self.max_body:
+            raise HTTPError(413, f"File is {length} bytes (limit {self.max_body}).")
+        top_roles = None
+        if query.get("top_roles"):
+            try:
+                top_roles = int(query["top_roles"])
+            except ValueError:
+                top_roles = 0
+            if top_roles < 1:
+                raise HTTPError(400, "top_roles must be a positive integer.")
+        self._check_capacity()
+        return length, top_roles
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 431, "application/json", json.dumps({"error": "Headers too large"}),
+                                        keep_alive=False)
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._respond(writer, 400, "application/json", json.dumps({"error": "Bad request line"}),
+                                        keep_alive=False)
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                route = urlsplit(target).path
+                start = time.perf_counter()
+                extra = {}
+                try:
+                    status, content_type, body = await self._route(method, target, headers, reader)
+                except HTTPError as e:
+                    status, content_type, body = e.status, "application/json", json.dumps({"error": e.message})
+                    extra = e.headers
+                    # An upload refused before its body was read leaves the body on
+                    # the connection, so it cannot be reused.
+                    keep_alive = keep_alive and not e.body_unread
+                except Exception as e:
+                    status, content_type, body = 500, "application/json", json.dumps({"error": f"{type(e).__name__}"})
+                    keep_alive = False
+                get_metrics().observe("api_request", time.perf_counter() - start, route=route)
+                get_metrics().inc("api_responses", route=route, status=status)
+                await self._respond(writer, status, content_type, body, keep_alive, extra)
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, content_type, body, keep_alive, headers=None):
+        payload = body.encode("utf-8")
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}", f"Content-Type: {content_type}",
+                 f"Content-Length: {len(payload)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def start(self, host="127.0.0.1", port=8080):
+        # The first job forks every worker. Forked later, they would inherit
+        # open client sockets and keep connections the service closed open.
+        await asyncio.wrap_future(self._pool.submit(os.getpid))
+        self._server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+        return self._server
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        if self._idf_stats is not None:
+            self._idf_stats.close()
+
+
+# ------------------ Client ------------------
+class ScoringServiceError(OSError):
+    # An OSError like urllib's HTTPError, so callers can treat a refused
+    # request and an unreachable service alike without importing this module.
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def score_remote(base_url, data, filename, role=None, top_roles=None, rewrite=False, timeout=120.0):
+    """POST a CV to a running scoring service and return its JSON record."""
+    params = {"filename": filename}
+    if role:
+        params["role"] = role
+    if top_roles:
+        params["top_roles"] = top_roles
+    if rewrite:
+        params["rewrite"] = 1
+    request = urllib.request.Request(f"{base_url.rstrip('/')}/score?{urlencode(params, quote_via=quote)}",
+                                     data=data, method="POST",
+                                     headers={"Content-Type": "application/octet-stream"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        try:
+            message = json.loads(e.read()).get("error", e.reason)
+        except ValueError:
+            message = e.reason
+        if e.code in (413, 422):
+            raise ExtractionLimitError(message) from None
+        raise ScoringServiceError(e.code, message) from None
+
+
+# ------------------ Entry Point ------------------
+async def serve(args):
+    service = ScoringService(workers=args.workers, max_queue=args.max_queue, timeout=args.timeout,
+                             keywords_dir=args.keywords_dir, weights_path=args.weights)
+    await service.start(args.host, args.port)
+    print(f"Scoring service on http://{args.host}:{args.port} "
+          f"({service.workers} workers, queue {service.max_queue})", flush=True)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+    await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP API for CV scoring: POST /score with the file as body.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Scoring processes (default: CPU count)")
+    parser.add_argument("--max-queue", type=int, default=32, help="Requests allowed to wait for a worker")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds before a request gets 504")
+    parser.add_argument("--keywords-dir", default="job_keywords")
+    parser.add_argument("--weights", default="keyword_weights.db", metavar="PATH",
+                        help="IDF keyword weights shared with the app (see keyword_weights.py)")
+    asyncio.run(serve(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
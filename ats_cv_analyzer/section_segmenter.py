@@ -0,0 +1,79 @@
+import re
+
+SECTION_HEADERS = {
+    "summary": ["summary", "profile", "about me", "professional summary"],
+    "skills": ["skills", "technologies", "competencies"],
+    "experience": ["experience", "employment", "work history", "projects"],
+    "education": ["education", "qualification", "degree", "academics"],
+    "contact": ["contact", "email", "phone"],
+}
+
+HEADER_SECTION = {h: sec for sec, headers in SECTION_HEADERS.items() for h in headers}
+# Longest first, so "professional summary" wins over "summary" at the same spot.
+HEADER_RE = re.compile(
+    r"({})[:\n]".format("|".join(re.escape(h) for h in sorted(HEADER_SECTION, key=len, reverse=True)))
+)
+MAX_HEADER_LEN = max(len(h) for h in HEADER_SECTION) + 1
+
+
+# ------------------ Segmenter ------------------
+class SectionSegmenter:
+    """Finds every section header in one pass over (lowercased) text.
+
+    Text can be fed in chunks; the unmatched tail of a chunk, at most one
+    header long, is carried into the next so headers split across chunks
+    are still found.
+
+    A chunk may come with the (start, end) of lines its document styles as
+    headings (DOCX). Once any of those names a section, headings alone
+    decide the sections, and a heading naming none (e.g. "Languages")
+    ends the section before it.
+    """
+
+    def __init__(self):
+        self._carry = ""
+        self._offset = 0
+        self.length = 0
+        # (section, header start, content start) in document order
+        self.hits = []
+        self.heading_hits = []
+
+    def feed(self, lower_chunk, final=False, headings=()):
+        for start, end in headings:
+            m = HEADER_RE.search(lower_chunk, start, end)
+            sec = HEADER_SECTION[m.group(1)] if m else None
+            self.heading_hits.append((sec, self._offset + start, self._offset + end))
+        buf = self._carry + lower_chunk
+        base = self._offset - len(self._carry)
+        last_end = 0
+        for m in HEADER_RE.finditer(buf):
+            self.hits.append((HEADER_SECTION[m.group(1)], base + m.start(), base + m.end()))
+            last_end = m.end()
+        keep = 0 if final else min(MAX_HEADER_LEN, len(buf) - last_end)
+        self._carry = buf[len(buf) - keep:] if keep else ""
+        self._offset += len(lower_chunk)
+        self.length = self._offset
+        return self
+
+    def finish(self):
+        self.feed("", final=True)
+        if any(sec for sec, _, _ in self.heading_hits):
+            return segment_spans(self.heading_hits, self.length)
+        return segment_spans(self.hits, self.length)
+
+
+def segment_spans(hits, length):
+    # Consecutive headers of the same section belong to one span, which runs
+    # until the next header of a different section (or an unnamed one).
+    spans = []
+    for sec, header_start, content_start in hits:
+        if spans and spans[-1][0] == sec:
+            continue
+        if spans:
+            spans[-1] = (spans[-1][0], spans[-1][1], header_start)
+        spans.append((sec, content_start, length))
+    return [span for span in spans if span[0] is not None]
+
+
+def segment(text_lower):
+    return SectionSegmenter().feed(text_lower).finish()
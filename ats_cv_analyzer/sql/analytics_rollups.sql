@@ -0,0 +1,87 @@
+-- Incrementally maintained rollups behind the admin dashboard.
+-- Run once in the Supabase SQL editor; the trigger keeps them current and
+-- analytics_summary() reads them in time proportional to the number of
+-- days/keywords in the window, not the number of analytics rows.
+-- The app only sends analytics.role once it finds the column (it checks
+-- every few minutes), so rows logged before this runs have no role.
+
+alter table analytics add column if not exists role text;
+
+create table if not exists analytics_rollup_daily (
+    day date not null,
+    role text not null default '',
+    score_bucket int not null,
+    cv_count bigint not null default 0,
+    primary key (day, role, score_bucket)
+);
+
+create table if not exists analytics_keyword_daily (
+    day date not null,
+    keyword text not null,
+    matched_count bigint not null default 0,
+    missing_count bigint not null default 0,
+    primary key (day, keyword)
+);
+
+create or replace function analytics_rollup_row(r analytics) returns void
+language plpgsql as $$
+declare
+    d date := (r."timestamp")::timestamptz::date;
+begin
+    insert into analytics_rollup_daily (day, role, score_bucket, cv_count)
+    values (d, coalesce(r.role, ''), least(greatest(r.ats_score, 0) / 10, 9), 1)
+    on conflict (day, role, score_bucket)
+    do update set cv_count = analytics_rollup_daily.cv_count + 1;
+
+    insert into analytics_keyword_daily (day, keyword, matched_count)
+    select d, trim(k), 1 from unnest(string_to_array(r.matched_keywords, ',')) as k where trim(k) <> ''
+    on conflict (day, keyword)
+    do update set matched_count = analytics_keyword_daily.matched_count + 1;
+
+    insert into analytics_keyword_daily (day, keyword, missing_count)
+    select d, trim(k), 1 from unnest(string_to_array(r.missing_keywords, ',')) as k where trim(k) <> ''
+    on conflict (day, keyword)
+    do update set missing_count = analytics_keyword_daily.missing_count + 1;
+end $$;
+
+create or replace function analytics_rollup_on_insert() returns trigger
+language plpgsql as $$
+begin
+    perform analytics_rollup_row(new);
+    return new;
+end $$;
+
+drop trigger if exists analytics_rollup_insert on analytics;
+create trigger analytics_rollup_insert after insert on analytics
+for each row execute function analytics_rollup_on_insert();
+
+-- One-off backfill of rows inserted before the trigger existed.
+do $$
+begin
+    if not exists (select 1 from analytics_rollup_daily) then
+        perform analytics_rollup_row(a) from analytics a;
+    end if;
+end $$;
+
+create or replace function analytics_summary(since date default null, top_n int default 20) returns json
+language sql stable as $$
+    select json_build_object(
+        'total', (select coalesce(sum(cv_count), 0) from analytics_rollup_daily
+                  where since is null or day >= since),
+        'score_histogram', (select coalesce(json_object_agg(score_bucket, n), '{}'::json) from (
+                  select score_bucket, sum(cv_count) as n from analytics_rollup_daily
+                  where since is null or day >= since group by score_bucket) h),
+        'role_counts', (select coalesce(json_object_agg(role, n), '{}'::json) from (
+                  select role, sum(cv_count) as n from analytics_rollup_daily
+                  where since is null or day >= since group by role) r),
+        'matched_total', (select coalesce(sum(matched_count), 0) from analytics_keyword_daily
+                  where since is null or day >= since),
+        'missing_total', (select coalesce(sum(missing_count), 0) from analytics_keyword_daily
+                  where since is null or day >= since),
+        'top_missing', (select coalesce(json_agg(json_build_array(keyword, n)), '[]'::json) from (
+                  select keyword, sum(missing_count) as n from analytics_keyword_daily
+                  where since is null or day >= since
+                  group by keyword having sum(missing_count) > 0
+                  order by n desc, keyword limit top_n) k)
+    );
+$$;
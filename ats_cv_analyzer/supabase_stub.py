@@ -0,0 +1,102 @@
+import threading
+import time
+from datetime import date
+from urllib.parse import parse_qs, urlsplit
+
+from analytics_rollups import summarize_rows
+
+
+# ------------------ Local Supabase Stand-in ------------------
+class StubResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class StubQuery:
+    def __init__(self, client, table):
+        self._client = client
+        self._table = table
+        self._rows = None
+        self._columns = None
+        self._order = None
+        self._range = None
+
+    def insert(self, rows):
+        self._rows = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def select(self, columns="*"):
+        self._columns = columns
+        return self
+
+    def order(self, column, desc=False):
+        self._order = (column, desc)
+        return self
+
+    def range(self, start, end):
+        self._range = (start, end)
+        return self
+
+    def execute(self):
+        return self._client._execute(self._table, self._rows, self._columns, self._order, self._range)
+
+
+class StubRpc:
+    def __init__(self, client, name, params):
+        self._client = client
+        self._name = name
+        self._params = params or {}
+
+    def execute(self):
+        if self._name != "analytics_summary":
+            raise ValueError(f"Unknown function {self._name}")
+        since = self._params.get("since")
+        with self._client._lock:
+            rows = list(self._client.tables.get("analytics", []))
+        data = summarize_rows(rows, date.fromisoformat(since) if since else None, self._params.get("top_n", 20))
+        return StubResponse(data)
+
+
+class StubSupabaseClient:
+    """In-memory client with the table().insert()/select().execute() surface
+    the app uses, plus latency and failure injection for tests."""
+
+    def __init__(self, latency=0.0, fail_next=0):
+        self.latency = latency
+        self.fail_next = fail_next
+        self.tables = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url):
+        # e.g. "stub://?latency=0.05&fail_next=3"
+        params = {k: v[-1] for k, v in parse_qs(urlsplit(url).query).items()}
+        return cls(latency=float(params.get("latency", 0.0)), fail_next=int(params.get("fail_next", 0)))
+
+    def table(self, name):
+        return StubQuery(self, name)
+
+    def rpc(self, name, params=None):
+        return StubRpc(self, name, params)
+
+    def _execute(self, table, rows, columns, order=None, row_range=None):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            if self.fail_next:
+                self.fail_next -= 1
+                raise ConnectionError("stub outage")
+            stored = self.tables.setdefault(table, [])
+            if rows is not None:
+                for row in rows:
+                    stored.append(dict(row, id=len(stored) + 1))
+                return StubResponse(rows)
+            result = [dict(r) for r in stored]
+        if order:
+            result.sort(key=lambda r: r.get(order[0]) or "", reverse=order[1])
+        if row_range:
+            result = result[row_range[0]:row_range[1] + 1]
+        return StubResponse(result, count=len(stored))
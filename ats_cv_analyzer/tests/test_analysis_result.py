@@ -0,0 +1,58 @@
+import gc
+import os
+import pickle
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_result import AnalysisResult  # noqa: E402
+from cv_analysis import analyze_cv  # noqa: E402
+
+KEYWORDS = ["Python", "SQL", "Docker", "Kubernetes", "C++", "Machine Learning", "Git", "Linux", "React"]
+CV = ("Summary\nData engineer in Zürich, naïve about nothing: Python, SQL and C++.\n"
+      "Experience\nShipped Docker images to Kubernetes; Python everywhere.\n"
+      "Education\nBSc Computer Science\n")
+
+
+def analyze(keywords=KEYWORDS):
+    return analyze_cv(CV, job_keywords=keywords)
+
+
+def test_bytes_round_trip_keeps_every_field():
+    result = analyze()
+    restored = AnalysisResult.from_bytes(result.to_bytes())
+    assert restored == result
+    assert restored.to_dict() == result.to_dict()
+    assert restored["common_words"][0] == ("python", 2)
+    assert "zürich" in dict(restored["common_words"])
+
+
+def test_pickle_round_trip_keeps_every_field():
+    result = analyze()
+    restored = pickle.loads(pickle.dumps(result))
+    assert restored == result
+    assert restored.to_dict() == result.to_dict()
+    # Same role, same interned vocabulary.
+    assert restored.vocab is result.vocab
+
+
+def test_pickle_brings_its_vocabulary_along():
+    # As in a fresh process: the role's vocabulary is not interned yet.
+    keywords = KEYWORDS + ["Only In This Test"]
+    result = analyze(keywords)
+    expected = result.to_dict()
+    data, pickled = result.to_bytes(), pickle.dumps(result)
+    del result
+    gc.collect()
+    with pytest.raises(KeyError):
+        AnalysisResult.from_bytes(data)
+    assert pickle.loads(pickled).to_dict() == expected
+
+
+def test_unknown_format_version_is_refused():
+    data = bytearray(analyze().to_bytes())
+    data[0] = 99
+    with pytest.raises(ValueError):
+        AnalysisResult.from_bytes(bytes(data))
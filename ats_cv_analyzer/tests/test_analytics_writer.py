@@ -0,0 +1,170 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics_writer import WriteBehindQueue  # noqa: E402
+from supabase_stub import StubSupabaseClient  # noqa: E402
+
+
+class NotNullViolation(Exception):
+    # What PostgREST reports for a row the table will never accept.
+    code = "23502"
+
+
+class RecordingClient(StubSupabaseClient):
+    """Stub that records each insert's size and refuses rows marked "bad"."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batches = []
+
+    def _execute(self, table, rows, columns, order=None, row_range=None):
+        if rows is not None and not self.fail_next:
+            if any(row.get("bad") for row in rows):
+                raise NotNullViolation("null value in column \"cv_name\"")
+            self.batches.append(len(rows))
+        return super()._execute(table, rows, columns, order, row_range)
+
+    def names(self, table="analytics"):
+        return [row["cv_name"] for row in self.tables.get(table, [])]
+
+
+def make_writer(client, tmp_path, **kwargs):
+    kwargs.setdefault("backoff", 0.05)
+    return WriteBehindQueue(client, spool_path=str(tmp_path / "spool.db"), **kwargs)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def rows(*names):
+    return [{"cv_name": name, "ats_score": 50} for name in names]
+
+
+def test_full_batch_is_sent_without_waiting_for_the_interval(tmp_path):
+    client = RecordingClient()
+    writer = make_writer(client, tmp_path, batch_size=3, flush_interval=60.0).start()
+    try:
+        for row in rows("a", "b", "c"):
+            writer.enqueue("analytics", row)
+        assert wait_for(lambda: writer.sent == 3)
+        assert client.batches == [3]
+    finally:
+        writer.stop()
+
+
+def test_partial_batch_is_sent_after_the_interval(tmp_path):
+    client = RecordingClient()
+    writer = make_writer(client, tmp_path, batch_size=50, flush_interval=0.1).start()
+    try:
+        writer.enqueue("analytics", rows("a")[0])
+        assert client.batches == []
+        assert wait_for(lambda: writer.sent == 1)
+        assert client.batches == [1]
+    finally:
+        writer.stop()
+
+
+def test_flush_splits_pending_rows_into_batches(tmp_path):
+    client = RecordingClient()
+    writer = make_writer(client, tmp_path, batch_size=3)
+    for row in rows(*"abcdefg"):
+        writer.enqueue("analytics", row)
+    writer.flush()
+    assert client.batches == [3, 3, 1]
+    assert client.names() == list("abcdefg")
+
+
+def test_failed_batch_is_retried_with_backoff(tmp_path):
+    client = RecordingClient(fail_next=2)
+    writer = make_writer(client, tmp_path, backoff=0.2)
+    writer.enqueue("analytics", rows("a")[0])
+    writer.flush()
+    assert writer.metrics()["spooled"] == 1
+    assert 0 < writer.metrics()["retry_in_s"]["analytics"] <= 0.2
+
+    # Within the backoff nothing is sent, not even new rows of that table.
+    calls = client.calls
+    writer.enqueue("analytics", rows("b")[0])
+    writer.flush()
+    assert client.calls == calls
+    assert writer.metrics()["spooled"] == 2
+
+    time.sleep(0.2)
+    writer.flush()
+    # Failed again: the backoff doubles.
+    assert 0.2 < writer.metrics()["retry_in_s"]["analytics"] <= 0.4
+    time.sleep(0.4)
+    writer.flush()
+    assert writer.metrics()["spooled"] == 0
+    assert client.names() == ["a", "b"]
+    assert writer.metrics()["retry_in_s"] == {}
+
+
+def test_backoff_of_one_table_does_not_hold_up_another(tmp_path):
+    client = RecordingClient(fail_next=1)
+    writer = make_writer(client, tmp_path, backoff=60.0)
+    writer.enqueue("analytics", rows("a")[0])
+    writer.flush()
+    writer.enqueue("subscribers", {"email": "a@example.com"})
+    writer.flush()
+    assert client.tables["subscribers"][0]["email"] == "a@example.com"
+    assert writer.metrics()["spooled"] == 1
+
+
+def test_spooled_rows_are_replayed_after_an_outage(tmp_path):
+    down = RecordingClient(fail_next=1000)
+    writer = make_writer(down, tmp_path)
+    for row in rows("a", "b", "c"):
+        writer.enqueue("analytics", row)
+    writer.stop()
+    assert writer.metrics()["spooled"] == 3
+    assert down.names() == []
+
+    # The next process finds the rows on disk and sends them, oldest first.
+    up = RecordingClient()
+    writer = make_writer(up, tmp_path)
+    writer.enqueue("analytics", rows("d")[0])
+    writer.flush()
+    assert up.names() == ["a", "b", "c", "d"]
+    assert writer.metrics()["spooled"] == 0
+
+
+def test_permanently_refused_row_is_dead_lettered(tmp_path):
+    client = RecordingClient()
+    writer = make_writer(client, tmp_path)
+    writer.enqueue("analytics", {"cv_name": None, "bad": True})
+    writer.flush()
+    metrics = writer.metrics()
+    assert metrics["dead_letters"] == 1
+    assert metrics["spooled"] == 0
+    assert metrics["retry_in_s"] == {}
+    assert "NotNullViolation" in metrics["last_error"]
+
+    # Not retried: later flushes leave it alone.
+    calls = client.calls
+    writer.flush()
+    assert client.calls == calls
+
+
+def test_batch_is_bisected_around_a_refused_row(tmp_path):
+    client = RecordingClient()
+    writer = make_writer(client, tmp_path, batch_size=8)
+    batch = rows(*"abcdefgh")
+    batch[5]["bad"] = True
+    for row in batch:
+        writer.enqueue("analytics", row)
+    writer.flush()
+    assert client.names() == ["a", "b", "c", "d", "e", "g", "h"]
+    # 8 -> 4 + 4; the second half -> 2 + 2; its first half -> 1 + 1 around the refused row.
+    assert client.batches == [4, 1, 2]
+    assert writer.metrics()["dead_letters"] == 1
+    assert writer.metrics()["spooled"] == 0
@@ -0,0 +1,69 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cv_analysis import analyze_cv, suggest_keyword_usage  # noqa: E402
+from incremental_analysis import IncrementalAnalyzer  # noqa: E402
+
+KEYWORDS = ["Python", "SQL", "Docker", "Kubernetes", "Machine Learning", "Project Management", "C++", "Git"]
+CV = ("Summary\nBackend engineer, 8 years of Python.\n"
+      "Skills\nSQL, Docker, Git\n"
+      "Experience\nLed the ML platform; deployed on k8s.\n"
+      "Education\nBSc Computer Science\n")
+
+EDITS = [
+    # Add a keyword inside a block
+    CV.replace("Docker, Git", "Docker, Git, C++"),
+    # Remove a section header: two blocks merge
+    CV.replace("Skills\n", ""),
+    # Add a section header in the middle of a block
+    CV.replace("deployed on", "deployed\nContact\nme on"),
+    # A two-word keyword across a section boundary
+    CV.replace("8 years of Python.\n", "8 years of Python. Machine\n").replace("Skills\n", "Skills\nLearning "),
+    # Exact-case alias turned into another case, then back
+    CV.replace("the ML platform", "the ml platform"),
+    CV,
+    # Everything replaced
+    "Project Management\nNothing else.",
+    "",
+]
+
+
+def assert_same_as_full_analysis(analyzer, text):
+    assert analyzer.update(text).to_dict() == analyze_cv(text, job_keywords=KEYWORDS).to_dict()
+
+
+def test_each_edit_scores_like_a_full_analysis():
+    analyzer = IncrementalAnalyzer(KEYWORDS)
+    assert_same_as_full_analysis(analyzer, CV)
+    for text in EDITS:
+        assert_same_as_full_analysis(analyzer, text)
+
+
+def test_an_edit_only_rescans_the_blocks_it_touches():
+    analyzer = IncrementalAnalyzer(KEYWORDS)
+    analyzer.update(CV)
+    rescanned = analyzer.rescanned
+    analyzer.update(CV.replace("Docker, Git", "Docker, Git, C++"))
+    assert analyzer.rescanned == rescanned + 1
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_edits_score_like_a_full_analysis(seed):
+    rng = random.Random(seed)
+    pieces = ["Python", " ", "\n", "Skills\n", "Education\n", "Machine", "Learning", "ML", "ml", "SQL", ",", "C++",
+              "Project", "Management", "k8s"]
+    analyzer = IncrementalAnalyzer(KEYWORDS)
+    text = CV
+    for _ in range(60):
+        at = rng.randrange(len(text) + 1)
+        if text and rng.random() < 0.4:
+            text = text[:at] + text[at + rng.randrange(1, 12):]
+        else:
+            text = text[:at] + rng.choice(pieces) + text[at:]
+        assert_same_as_full_analysis(analyzer, text)
+    assert analyzer.suggestions() == suggest_keyword_usage(analyzer.result["missing_keywords"], text)
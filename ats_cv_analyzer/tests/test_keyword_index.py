@@ -0,0 +1,105 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_index import KeywordIndex  # noqa: E402
+
+KEYWORDS = ["Python", "SQL", "Docker", "Kubernetes", "Machine Learning", "C++", "Git", "AWS"]
+ROLES = ["data_engineer", "software_engineer", "devops_engineer"]
+
+
+def make_rows(n, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        matched = rng.sample(KEYWORDS, rng.randrange(len(KEYWORDS) + 1))
+        rows.append({
+            "cv_name": f"cv_{i}",
+            "role": rng.choice(ROLES),
+            "ats_score": rng.randrange(101),
+            "matched_keywords": ",".join(matched),
+            "missing_keywords": ",".join(kw for kw in KEYWORDS if kw not in matched),
+            "timestamp": f"2024-01-{i % 28 + 1:02d}T00:00:00",
+        })
+    return rows
+
+
+def brute_force(rows, all_of=(), none_of=(), missing=(), role=None, min_score=None):
+    # (score, cv_name) of the rows a search should return, best first.
+    hits = []
+    for row in rows:
+        matched = {kw.lower() for kw in row["matched_keywords"].split(",") if kw}
+        not_found = {kw.lower() for kw in row["missing_keywords"].split(",") if kw}
+        if (all(kw.lower() in matched for kw in all_of) and not any(kw.lower() in matched for kw in none_of)
+                and all(kw.lower() in not_found for kw in missing) and (role is None or row["role"] == role)
+                and (min_score is None or row["ats_score"] >= min_score)):
+            hits.append((row["ats_score"], row["cv_name"]))
+    return sorted(hits, key=lambda hit: -hit[0])
+
+
+QUERIES = [
+    {"all_of": ["python"]},
+    {"all_of": ["Python", "SQL"], "none_of": ["AWS"]},
+    {"all_of": ["machine learning"], "role": "data_engineer"},
+    {"missing": ["C++", "Git"], "min_score": 50},
+    {},
+]
+
+
+def assert_matches(index, rows):
+    for terms in QUERIES:
+        expected = brute_force(rows, **terms)
+        total, docs = index.query(top_k=None, **terms)
+        assert total == len(expected)
+        assert [doc["ats_score"] for doc in docs] == [score for score, _ in expected]
+        assert {doc["cv_name"] for doc in docs} == {name for _, name in expected}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cv_index.db")
+
+
+def test_search_matches_a_scan_of_the_rows(path):
+    rows = make_rows(300)
+    index = KeywordIndex(path)
+    index.add_many(rows)
+    assert_matches(index, rows)
+    index.close()
+
+
+def test_search_after_checkpoint_and_reload(path):
+    rows = make_rows(300)
+    index = KeywordIndex(path, checkpoint_every=100)
+    index.add_many(rows[:250])
+    index.checkpoint()
+    # Added after the checkpoint: replayed from the docs table on reload.
+    for row in rows[250:]:
+        index.add(row)
+    del index  # no close(), as after a crash
+
+    reloaded = KeywordIndex(path)
+    assert len(reloaded) == 300
+    assert reloaded._checkpoint_id == 250
+    assert_matches(reloaded, rows)
+    reloaded.close()
+
+    # close() checkpoints everything; the next open replays nothing.
+    reopened = KeywordIndex(path)
+    assert reopened._checkpoint_id == 300
+    assert_matches(reopened, rows)
+    assert reopened.keyword_counts()[0][1] == max(
+        sum(kw in row["matched_keywords"].split(",") for row in rows) for kw in KEYWORDS)
+    reopened.close()
+
+
+def test_rebuild_skips_rows_already_indexed(path):
+    rows = [dict(row, id=i + 1) for i, row in enumerate(make_rows(50))]
+    index = KeywordIndex(path)
+    assert index.rebuild(rows + rows[:10]) == 50
+    assert_matches(index, rows)
+    index.close()
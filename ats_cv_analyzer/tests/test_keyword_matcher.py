@@ -0,0 +1,98 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cv_analysis import suggest_keyword_usage  # noqa: E402
+from keyword_matcher import FoundKeys, KeywordMatcher  # noqa: E402
+
+KEYWORDS = ["Python", "C++", "C#", "Machine Learning", "Natural Language Processing", "SQL", "Git"]
+TEXT = ("Summary\nBackend developer: Python, C++ and C# services.\n"
+        "Skills\nMachine Learning, Natural Language Processing, SQL; GitHub is not Git.")
+
+
+def stream_scan(matcher, chunks):
+    stream = matcher.stream()
+    for chunk in chunks:
+        stream.feed(chunk)
+    return stream.finish()
+
+
+def spans(scan):
+    return [(key, scan.text[start:end]) for key, start, end in scan.matches]
+
+
+def test_scan_finds_keywords_with_their_spans():
+    scan = KeywordMatcher(KEYWORDS).scan(TEXT)
+    assert spans(scan) == [
+        ("python", "Python"), ("c + +", "C++"), ("c #", "C#"), ("machine learning", "Machine Learning"),
+        ("natural language processing", "Natural Language Processing"), ("sql", "SQL"), ("git", "Git"),
+    ]
+    # Symbols belong to keywords, not to the counted words.
+    assert "+" not in scan.words and "github" in scan.words
+
+
+@pytest.mark.parametrize("cut", range(1, len(TEXT)))
+def test_any_chunk_boundary_gives_the_same_scan(cut):
+    matcher = KeywordMatcher(KEYWORDS)
+    whole = matcher.scan(TEXT)
+    split = stream_scan(matcher, [TEXT[:cut], TEXT[cut:]])
+    assert split.matches == whole.matches
+    assert split.words == whole.words
+    assert split.text == TEXT
+
+
+def test_word_cut_by_a_page_break_is_carried_over():
+    matcher = KeywordMatcher(KEYWORDS)
+    scan = stream_scan(matcher, ["Experience with Pyt", "hon and Machine ", "Learning"])
+    assert spans(scan) == [("python", "Python"), ("machine learning", "Machine Learning")]
+    assert scan.words == ["experience", "with", "python", "and", "machine", "learning"]
+
+
+def test_words_left_at_the_end_of_a_page_do_not_join_the_next():
+    scan = stream_scan(KeywordMatcher(["Git"]), ["Gi", "\n", "t"])
+    assert scan.matches == []
+    assert scan.words == ["gi", "t"]
+
+
+# ------------------ Aliases ------------------
+def found(keywords, *chunks):
+    return sorted(stream_scan(KeywordMatcher(keywords), chunks).found)
+
+
+def test_alias_counts_as_its_keyword():
+    assert found(["Kubernetes", "Node.js"], "Deployed NodeJS apps on K8S") == ["kubernetes", "node js"]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Led the ML platform team", ["machine learning"]),
+    ("Took 10 ml of water", []),
+    ("Ml, in title case", []),
+    ("Trained models in Torch", ["pytorch"]),
+    ("Carried a torch", []),
+])
+def test_short_aliases_match_only_in_their_exact_case(text, expected):
+    assert found(["Machine Learning", "PyTorch"], text) == expected
+
+
+def test_exact_case_alias_cut_by_a_page_break():
+    assert found(["Machine Learning"], "Led the M", "L team") == ["machine learning"]
+    assert found(["Machine Learning"], "Took 10 m", "l of water") == []
+
+
+def test_keyword_itself_matches_in_any_case():
+    # Only the alias spelling is case-sensitive, never the keyword.
+    assert found(["Project Management", "IDS"], "project management; ids") == ["ids", "project management"]
+    assert found(["Project Management"], "5 pm meeting, PM of the year") == ["project management"]
+
+
+# ------------------ Found Keys ------------------
+def test_found_keys_answer_like_the_scan():
+    scan = KeywordMatcher(KEYWORDS + ["Docker", "Kubernetes"]).scan(TEXT + " Shipped on k8s.")
+    found = FoundKeys(scan.found)
+    for kw in KEYWORDS + ["Docker", "Kubernetes", "machine  learning", "C + +"]:
+        assert found.contains(kw) == scan.contains(kw)
+    missing = ["Docker", "Java", "Kubernetes"]
+    assert suggest_keyword_usage(missing, TEXT, scan=found) == suggest_keyword_usage(["Docker", "Java"], TEXT)
@@ -0,0 +1,84 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest import mock
+
+import pytest
+from fpdf import FPDF
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_report import PDF, draw_report, render_report  # noqa: E402
+
+ANALYSIS = {
+    "ats_score": 64,
+    "strengths": ["Summary section is present.", "Skills section is present."],
+    "weaknesses": ["Education section missing.", "Contact section missing."],
+    "matched_keywords": ["Python", "SQL", "Docker"],
+    "missing_keywords": ["Kubernetes", "CI/CD", "Node.js"],
+}
+KEYWORDS = ANALYSIS["matched_keywords"] + ANALYSIS["missing_keywords"]
+REWRITTEN = "Summary:\n- Delivered platform improvements for production services.\n- Café, naïve, Zürich: ≥ 99.9% uptime"
+
+
+class PlainPDF(FPDF):
+    # The report layout on unmodified fpdf.
+    footer = PDF.footer
+
+
+class FixedDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2024, 1, 2, 3, 4, 5)
+
+
+@pytest.fixture(autouse=True)
+def fixed_creation_date():
+    # fpdf stamps /CreationDate from the clock.
+    with mock.patch("fpdf.fpdf.datetime", FixedDatetime):
+        yield
+
+
+def plain_report(analysis, job_keywords=None, rewritten_cv=None):
+    # Without fpdf's metrics pickles: one written from another working
+    # directory points plain FPDF at a relative font path.
+    with mock.patch("fpdf.fpdf.FPDF_CACHE_MODE", 1):
+        pdf = draw_report(PlainPDF(), analysis, job_keywords, rewritten_cv)
+        return pdf.output(dest="S").encode("latin1")
+
+
+@pytest.mark.parametrize("job_keywords, rewritten_cv", [
+    (None, None),
+    (KEYWORDS, None),
+    (KEYWORDS, REWRITTEN),
+])
+def test_cached_output_matches_fpdf(job_keywords, rewritten_cv):
+    expected = plain_report(ANALYSIS, job_keywords, rewritten_cv)
+    assert b"D:20240102030405" in expected
+    # First render fills the caches, the second one is served from them.
+    assert render_report(ANALYSIS, job_keywords, rewritten_cv) == expected
+    assert render_report(ANALYSIS, job_keywords, rewritten_cv) == expected
+
+
+def test_concurrent_renders_match_fpdf():
+    texts = [f"{REWRITTEN}\n- Report {i}: {chr(0x100 + i) * 3}" for i in range(16)]
+    expected = [plain_report(ANALYSIS, KEYWORDS, text) for text in texts]
+    with ThreadPoolExecutor(8) as pool:
+        assert list(pool.map(lambda text: render_report(ANALYSIS, KEYWORDS, text), texts * 2)) == expected * 2
+
+
+def test_other_fpdf_versions_write_fonts_themselves():
+    expected = plain_report(ANALYSIS, KEYWORDS, REWRITTEN)
+    with mock.patch("fpdf.FPDF_VERSION", "1.7.3"), mock.patch.object(PDF, "embedded_font") as embedded_font:
+        assert render_report(ANALYSIS, KEYWORDS, REWRITTEN) == expected
+    embedded_font.assert_not_called()
+
+
+def test_font_already_in_the_document_still_gets_its_files():
+    render_report(ANALYSIS)  # registers the report fonts
+    pdf = PDF()
+    draw_report(pdf, ANALYSIS)
+    pdf.font_files.clear()
+    draw_report(pdf, ANALYSIS)
+    assert pdf.font_files
@@ -0,0 +1,375 @@
+import io
+import math
+import multiprocessing
+import os
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from collections import deque
+
+from metrics import get_metrics
+
+PDF_TYPE = "application/pdf"
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+TXT_TYPE = "text/plain"
+EXTENSION_TYPES = {".pdf": PDF_TYPE, ".docx": DOCX_TYPE, ".txt": TXT_TYPE}
+TYPE_LABELS = {PDF_TYPE: "pdf", DOCX_TYPE: "docx", TXT_TYPE: "txt"}
+
+
+class ExtractionLimitError(ValueError):
+    pass
+
+
+class UploadBytes(io.BytesIO):
+    # Bytes shaped like streamlit's UploadedFile, for callers that only have the data.
+    def __init__(self, data, name, content_type=None):
+        super().__init__(data)
+        self.name = name
+        self.type = content_type
+        self.size = len(data)
+
+
+# ------------------ Limits ------------------
+class ExtractionLimits:
+    __slots__ = ("max_pages", "max_bytes", "timeout", "parallel_pages", "workers")
+
+    def __init__(self, max_pages=200, max_bytes=25 * 1024 * 1024, timeout=60.0, parallel_pages=24, workers=None):
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        # PDFs with at least this many pages are fanned out to worker processes,
+        # which are killed at the time limit. Shorter ones are read in-process
+        # and the limit is only checked between pages, so one slow page can overrun it.
+        self.parallel_pages = parallel_pages
+        self.workers = workers
+
+
+DEFAULT_LIMITS = ExtractionLimits()
+
+
+# ------------------ Source Helpers ------------------
+def file_type(file):
+    if isinstance(file, (str, os.PathLike)):
+        return EXTENSION_TYPES.get(os.path.splitext(str(file))[1].lower(), TXT_TYPE)
+    return getattr(file, "type", None) or EXTENSION_TYPES.get(
+        os.path.splitext(getattr(file, "name", ""))[1].lower(), TXT_TYPE
+    )
+
+
+def file_size(file):
+    if isinstance(file, (str, os.PathLike)):
+        return os.path.getsize(file)
+    size = getattr(file, "size", None)
+    if size is not None:
+        return size
+    pos = file.tell()
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(pos)
+    return size
+
+
+def read_bytes(file):
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as f:
+            return f.read()
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    file.seek(0)
+    return file.read()
+
+
+# ------------------ PDF Pages ------------------
+# Page-range processes running at once across every extraction in this
+# process, so concurrent uploads share the CPUs instead of each taking all.
+PDF_WORKER_SLOTS = threading.BoundedSemaphore(os.cpu_count() or 1)
+
+
+# PyPDF2 is imported on the first PDF, not when the app starts.
+def _extract_page_range(source, start, stop):
+    import PyPDF2
+    reader = PyPDF2.PdfReader(source if isinstance(source, str) else io.BytesIO(source))
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _page_range_worker(conn, source, start, stop):
+    try:
+        conn.send((True, _extract_page_range(source, start, stop)))
+    except Exception as e:
+        conn.send((False, e))
+    finally:
+        conn.close()
+
+
+def _start_page_range(source, start, stop):
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_page_range_worker, args=(sender, source, start, stop), daemon=True)
+    process.start()
+    sender.close()
+    return process, receiver
+
+
+def iter_pdf_pages(file, limits=DEFAULT_LIMITS):
+    import PyPDF2
+    deadline = time.monotonic() + limits.timeout
+    reader = PyPDF2.PdfReader(file)
+    page_count = len(reader.pages)
+    if page_count > limits.max_pages:
+        raise ExtractionLimitError(f"PDF has {page_count} pages (limit {limits.max_pages}).")
+
+    workers = limits.workers or os.cpu_count() or 1
+    if page_count < limits.parallel_pages or workers < 2:
+        for page in reader.pages:
+            if time.monotonic() > deadline:
+                raise ExtractionLimitError(f"PDF extraction exceeded {limits.timeout}s.")
+            yield page.extract_text() or ""
+        return
+
+    # Each chunk runs in its own process, holding one of PDF_WORKER_SLOTS,
+    # so one past the deadline can be killed without touching the others.
+    source = os.fspath(file) if isinstance(file, (str, os.PathLike)) else read_bytes(file)
+    chunk = math.ceil(page_count / (workers * 2))
+    pending = deque((start, min(start + chunk, page_count)) for start in range(0, page_count, chunk))
+    running = deque()
+    try:
+        while pending or running:
+            # Start chunks while slots are free; wait for one only when none of ours runs.
+            while pending and len(running) < workers:
+                acquired = (PDF_WORKER_SLOTS.acquire(blocking=False) if running
+                            else PDF_WORKER_SLOTS.acquire(timeout=max(deadline - time.monotonic(), 0)))
+                if not acquired:
+                    break
+                try:
+                    running.append(_start_page_range(source, *pending.popleft()))
+                except BaseException:
+                    PDF_WORKER_SLOTS.release()
+                    raise
+            if not running:
+                raise ExtractionLimitError(f"PDF extraction exceeded {limits.timeout}s.")
+            process, receiver = running[0]
+            if not receiver.poll(max(deadline - time.monotonic(), 0)):
+                raise ExtractionLimitError(f"PDF extraction exceeded {limits.timeout}s.")
+            try:
+                ok, pages = receiver.recv()
+            except EOFError:
+                ok, pages = False, None
+            running.popleft()
+            receiver.close()
+            process.join()
+            PDF_WORKER_SLOTS.release()
+            if not ok:
+                # The page's own error, as the in-process path would raise it.
+                raise pages or ExtractionLimitError(f"PDF page worker exited with code {process.exitcode}.")
+            yield from pages
+    finally:
+        # Past the deadline, or the caller stopped reading: nothing still running is needed.
+        for process, receiver in running:
+            process.kill()
+            process.join()
+            receiver.close()
+            PDF_WORKER_SLOTS.release()
+
+
+# ------------------ DOCX Paragraphs ------------------
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+# Text boxes are stored twice, as DrawingML and as a legacy VML fallback.
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+HEADER_PART_RE = re.compile(r"word/header\d*\.xml$")
+FOOTER_PART_RE = re.compile(r"word/footer\d*\.xml$")
+W_P, W_T, W_TAB, W_BR, W_CR = W + "p", W + "t", W + "tab", W + "br", W + "cr"
+W_PAGE_BREAK, W_PSTYLE, W_OUTLINE = W + "lastRenderedPageBreak", W + "pStyle", W + "outlineLvl"
+W_VAL, W_TYPE = W + "val", W + "type"
+HEADING_NAME_RE = re.compile(r"heading\s*(\d)$")
+# DOCX text is yielded in chunks of about this size, or at page breaks.
+DOCX_CHUNK_CHARS = 64 * 1024
+
+
+class DocxParagraph:
+    __slots__ = ("text", "style", "level", "page_break")
+
+    def __init__(self, text, style, level, page_break):
+        self.text = text
+        self.style = style
+        # Outline level for headings (0 = top), None for body text
+        self.level = level
+        self.page_break = page_break
+
+
+class ExtractedPage(str):
+    # Page text that also knows which of its lines are styled as headings,
+    # as (start, end) offsets; the section segmenter prefers these to regex.
+    headings = ()
+
+
+def _heading_styles(zf):
+    # styleId -> outline level of every heading style, following basedOn.
+    try:
+        stream = zf.open("word/styles.xml")
+    except KeyError:
+        return {}
+    levels, based_on = {}, {}
+    with stream:
+        for _, elem in ET.iterparse(stream):
+            if elem.tag != W + "style":
+                continue
+            style_id = elem.get(W + "styleId")
+            name = elem.find(W + "name")
+            outline = elem.find(f"{W}pPr/{W}outlineLvl")
+            base = elem.find(W + "basedOn")
+            name = name.get(W + "val", "").lower() if name is not None else ""
+            m = HEADING_NAME_RE.match(name)
+            if outline is not None and outline.get(W + "val", "9").isdigit() and int(outline.get(W + "val")) < 9:
+                levels[style_id] = int(outline.get(W + "val"))
+            elif m:
+                levels[style_id] = int(m.group(1)) - 1
+            elif name in ("title", "subtitle"):
+                levels[style_id] = 0
+            elif base is not None:
+                based_on[style_id] = base.get(W + "val")
+            elem.clear()
+    for style_id, base in based_on.items():
+        seen = set()
+        while base in based_on and base not in seen:
+            seen.add(base)
+            base = based_on[base]
+        if base in levels:
+            levels[style_id] = levels[base]
+    return levels
+
+
+def _iter_part_paragraphs(stream, heading_level):
+    # One pass of start/end events. Outside paragraphs every finished
+    # element is dropped from its parent, so memory stays flat however long
+    # the part is.
+    elements = []
+    open_paragraphs = []
+    fallback = 0
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            elements.append(elem)
+            if tag == W_P and not fallback:
+                open_paragraphs.append([[], None, None, False])
+            elif tag == MC_FALLBACK:
+                fallback += 1
+            continue
+        elements.pop()
+        if tag == MC_FALLBACK:
+            fallback -= 1
+        elif open_paragraphs and not fallback:
+            para = open_paragraphs[-1]
+            if tag == W_T:
+                para[0].append(elem.text or "")
+            elif tag == W_P:
+                parts, style, level, page_break = open_paragraphs.pop()
+                if level is None and style is not None:
+                    level = heading_level(style)
+                elem.clear()
+                yield DocxParagraph("".join(parts), style, level, page_break)
+            elif tag == W_TAB:
+                para[0].append("\t")
+            elif tag == W_BR or tag == W_CR:
+                para[0].append("\n")
+                if elem.get(W_TYPE) == "page":
+                    para[3] = True
+            elif tag == W_PAGE_BREAK:
+                para[3] = True
+            elif tag == W_PSTYLE:
+                para[1] = elem.get(W_VAL)
+            elif tag == W_OUTLINE:
+                level = elem.get(W_VAL, "9")
+                if level.isdigit() and int(level) < 9:
+                    para[2] = int(level)
+        if not open_paragraphs and elements:
+            elements[-1].clear()
+
+
+def iter_docx_paragraphs(file):
+    """Paragraphs of the headers, body and footers of a DOCX, in that order.
+
+    Only the XML parts holding text are opened, and decompressed as they
+    are parsed; styles.xml is read the first time a paragraph names a
+    style. Images and other media in the archive are never read.
+    """
+    with zipfile.ZipFile(file) as zf:
+        styles = None
+
+        def heading_level(style):
+            nonlocal styles
+            if styles is None:
+                styles = _heading_styles(zf)
+            return styles.get(style)
+
+        names = zf.namelist()
+        parts = ([n for n in names if HEADER_PART_RE.match(n)] + ["word/document.xml"]
+                 + [n for n in names if FOOTER_PART_RE.match(n)])
+        for name in parts:
+            with zf.open(name) as stream:
+                yield from _iter_part_paragraphs(stream, heading_level)
+
+
+def _docx_page(lines, headings):
+    page = ExtractedPage("\n".join(lines) + "\n")
+    page.headings = headings
+    return page
+
+
+def iter_docx_pages(file, limits=DEFAULT_LIMITS):
+    deadline = time.monotonic() + limits.timeout
+    lines, headings, size, breaks = [], [], 0, 0
+    for para in iter_docx_paragraphs(file):
+        if time.monotonic() > deadline:
+            raise ExtractionLimitError(f"DOCX extraction exceeded {limits.timeout}s.")
+        if para.text.strip():
+            if para.level is not None:
+                headings.append((size, size + len(para.text) + 1))
+            lines.append(para.text)
+            size += len(para.text) + 1
+        if para.page_break:
+            breaks += 1
+            if breaks >= limits.max_pages:
+                raise ExtractionLimitError(f"DOCX has more than {limits.max_pages} pages.")
+        if lines and (para.page_break or size >= DOCX_CHUNK_CHARS):
+            yield _docx_page(lines, headings)
+            lines, headings, size = [], [], 0
+    if lines:
+        yield _docx_page(lines, headings)
+
+
+# ------------------ Text Extraction ------------------
+def _iter_pages(file, kind, limits):
+    if kind == PDF_TYPE:
+        yield from iter_pdf_pages(file, limits)
+    elif kind == DOCX_TYPE:
+        yield from iter_docx_pages(file, limits)
+    else:
+        yield read_bytes(file).decode("utf-8")
+
+
+def iter_text(file, limits=DEFAULT_LIMITS):
+    size = file_size(file)
+    if size > limits.max_bytes:
+        raise ExtractionLimitError(f"File is {size} bytes (limit {limits.max_bytes}).")
+    kind = file_type(file)
+    label = TYPE_LABELS.get(kind, "other")
+    metrics = get_metrics()
+    metrics.inc("files_extracted", type=label)
+    metrics.inc("bytes_extracted", size, type=label)
+    # Only time spent producing pages counts, not the caller's work between them.
+    busy, pages = 0.0, 0
+    start = time.perf_counter()
+    try:
+        for page in _iter_pages(file, kind, limits):
+            busy += time.perf_counter() - start
+            pages += 1
+            yield page
+            start = time.perf_counter()
+    finally:
+        metrics.inc("pages_extracted", pages, type=label)
+        metrics.observe("extract", busy, type=label)
+
+
+def extract_text(file, limits=DEFAULT_LIMITS):
+    return "".join(iter_text(file, limits))